@@ -8,13 +8,19 @@ Design rationale:
  - Keep Controller free of low-level networking/serial code.
  - Controller should not create asyncio tasks directly except when scheduling model operations that return immediately.
 """
+import time
 from PySide6.QtCore import QTimer
 from view import View
 from model import AppModel
-from plot_view import AudioIntensityCanvas
+from canvas import create_intensity_canvas
+from history_view import SignalHistoryWidget
+from spectrogram_view import SpectrogramWidget
+from led_preview_view import LedRingPreviewWidget
+from latency_trace import STAGE_POLL_TICK, STAGE_CANVAS_DRAW, STAGE_SERIAL_SEND
 import numpy as np
 
 PLOT_UPDATE_INTERVAL_MS = 50  # UI polling interval
+PLOT_FPS_WINDOW_S = 1.0       # plot_fps gauge is recomputed once per window
 
 class AppController:
     def __init__(self):
@@ -22,12 +28,22 @@ class AppController:
         self.view = View(self.model)
 
         # Create and set the plot widget in the view (view owns layout)
-        self.plot_widget = AudioIntensityCanvas()
+        # (backend from app_config.json: native QPainter, or matplotlib, imported only if chosen)
+        self.plot_widget = create_intensity_canvas(self.model.config.plot_backend)
         self.view.set_plot_widget(self.plot_widget)
-
-        # Populate combobox with serial ports
-        ports = self.model.get_available_ports()
-        self.view.combo_box.addItems([""] + ports)
+        # Virtual ring: what the device (or the emulator) shows, refreshed at display rate
+        self.led_preview_widget = LedRingPreviewWidget(self.model.get_led_preview)
+        self.view.set_led_preview_widget(self.led_preview_widget)
+        # Live spectrogram of the Furhat audio stream, one column per analysed block
+        self.spectrogram_widget = SpectrogramWidget()
+        self.view.set_spectrogram_widget(self.spectrogram_widget)
+        self.model.add_spectrogram_listener(self.spectrogram_widget.push_columns)
+        # Raw / normalized / held / eased signals over the last seconds
+        self.history_widget = SignalHistoryWidget(self.model.signal_history)
+        self.view.set_history_widget(self.history_widget)
+
+        # The model is the combobox's list of serial ports (it keeps the list current)
+        self.view.combo_box.setModel(self.model)
 
         # Connect signals from view to controller handlers
         self._connect_signals()
@@ -39,17 +55,30 @@ class AppController:
         # Start timer if you want autorefresh; start only when user wants visualization.
         # self._poll_timer.start()
 
+        # Plot metrics
+        metrics = self.model.metrics
+        self._plot_frames = metrics.counter("plot_frames_total", "Frames drawn on the intensity canvas")
+        self._plot_draw_seconds = metrics.histogram("plot_draw_seconds", "Time spent redrawing the canvas")
+        self._plot_fps = metrics.gauge("plot_fps", "Canvas redraws per second over the last window")
+        self._fps_window_start = time.perf_counter()
+        self._fps_window_frames = 0
+
     def _connect_signals(self):
         # Text input - pressing Enter commits URL text
         self.view.text_input.returnPressed.connect(self._on_text_commit)
         self.view.button_connect.clicked.connect(self._on_ws_connect_clicked)
         self.view.button_fetch.clicked.connect(self._on_ws_fetch_clicked)
         self.view.combo_box.currentIndexChanged.connect(self._on_combo_changed)
+        self.view.button_profile.clicked.connect(self._on_profile_clicked)
 
         # Model signals
         self.model.input_text_commited.connect(self._on_committed_signal)
         self.model.input_text_cleared.connect(self._on_cleared_signal)
         self.model.async_task_completed.connect(self._on_async_task_completed)
+        self.model.serial_port_lost.connect(self._on_serial_port_lost)
+        self.model.serial_port_restored.connect(self._on_serial_port_restored)
+        self.model.device_power_changed.connect(self._on_device_power_changed)
+        self.model.device_version_received.connect(self._on_device_version_received)
 
     # -----------------------
     # UI Event Handlers
@@ -77,12 +106,21 @@ class AppController:
             self.view.set_async_status("Start WS connect before fetching.")
 
     def _on_combo_changed(self, idx):
+        if self.model.ports_updating:
+            # rows shifted by a port scan, not a user pick
+            return
         selected = self.view.combo_box.currentText()
         self.view.set_combo_result_text(f"Select Arduino Port: {selected}")
         if selected == "":
             self.model.disconnect_serial()
         else:
             self.model.connect_serial(selected)
+        self.led_preview_widget.set_caption(self.model.led_preview_source())
+
+    def _on_profile_clicked(self):
+        status = self.model.toggle_profiler()
+        self.view.set_profiling(self.model.profiler.is_running)
+        self.view.set_async_status(status)
 
     # -----------------------
     # Model signal handlers
@@ -96,6 +134,33 @@ class AppController:
     def _on_async_task_completed(self, message):
         self.view.set_async_status(f"Async: {message}")
 
+    def _on_serial_port_lost(self, port_name):
+        self._select_port_silently(port_name=None)
+        self.view.set_combo_result_text(f"Arduino unplugged from {port_name}, waiting for it to return")
+        self.led_preview_widget.set_caption(self.model.led_preview_source())
+
+    def _on_serial_port_restored(self, port_name):
+        self._select_port_silently(port_name)
+        self.view.set_combo_result_text(f"Select Arduino Port: {port_name} (reconnected)")
+        self.led_preview_widget.set_caption(self.model.led_preview_source())
+
+    def _on_device_power_changed(self, is_on):
+        if is_on:
+            self.view.set_async_status("Ring switched on: streaming to the LEDs")
+        else:
+            self.view.set_async_status("Ring switched off: LED streaming paused")
+
+    def _on_device_version_received(self, version):
+        self.view.set_combo_result_text(f"Select Arduino Port: {self.view.combo_box.currentText()} (firmware {version})")
+
+    def _select_port_silently(self, port_name):
+        """Shows port_name (None: the empty option) without triggering a connect."""
+        combo = self.view.combo_box
+        index = combo.findText(port_name) if port_name else 0
+        combo.blockSignals(True)
+        combo.setCurrentIndex(max(index, 0))
+        combo.blockSignals(False)
+
     # -----------------------
     # Polling / Rendering
     # -----------------------
@@ -104,15 +169,47 @@ class AppController:
         # frame is a tuple (left, right)
         if not frame:
             return
+        tracer = self.model.latency_tracer
+        trace = self.model.take_latest_trace()
+        tracer.mark(trace, STAGE_POLL_TICK)
         left, right = frame
         # Convert to an absolute amplitude and normalize (example rule)
         value = (abs(left) + abs(right)) / 2.0
         normalized = min(value / 30000.0, 1.0)
+        # spectral band levels while the Furhat audio stream is analysed, None otherwise
+        bands = self.model.get_band_levels()
         # update plot
-        self.plot_widget.plot_frame_intensity_normal(normalized)
-        # optionally send to serial as 0..255
-        rgb = int(normalized * 255)
-        self.model.send_serial_data(rgb)
+        with self._plot_draw_seconds.time():
+            if bands is not None:
+                self.plot_widget.plot_band_levels(bands)
+            else:
+                self.plot_widget.plot_frame_intensity_normal(normalized)
+        tracer.mark(trace, STAGE_CANVAS_DRAW)
+        self._count_plot_frame()
+        # optionally send to serial as 0..255 (the animation engine renders the ring itself when running)
+        if not self.model.led_animation_running:
+            brightness = self.model.map_led_brightness(normalized)
+            self.model.record_signal_history(normalized, self.model.led_luts.map_amplitude(normalized))
+            if bands is not None:
+                self.model.send_serial_frame(brightness, self.model.map_band_levels(bands))
+            else:
+                self.model.send_serial_frame(brightness)
+            tracer.mark(trace, STAGE_SERIAL_SEND)
+            # device group: each device picks its channel, gain and pixel range (the engine does this per tick)
+            self.model.publish_group_frame()
+        # with the engine running the ring is written from its own thread: no serial stage on this path
+        tracer.finish(trace)
+        self.history_widget.refresh()
+
+    def _count_plot_frame(self):
+        self._plot_frames.inc()
+        self._fps_window_frames += 1
+        now = time.perf_counter()
+        elapsed = now - self._fps_window_start
+        if elapsed >= PLOT_FPS_WINDOW_S:
+            self._plot_fps.set(self._fps_window_frames / elapsed)
+            self._fps_window_start = now
+            self._fps_window_frames = 0
 
     # -----------------------
     # Public
@@ -0,0 +1,537 @@
+# benchmarks.py
+"""
+Reproducible micro-benchmarks for the audio-to-LED hot paths.
+Responsibility:
+ - Time each hot path on the same synthetic input: WebSocket frame decode, base64 Furhat
+   audio decode, the README mapping pipeline (envelope_track and the LED tables), the LED
+   animation engine, the serial encoders, the two plot backends (and matplotlib full
+   redraw vs blit), the producer -> consumer handoff and the streaming spectral analyzer.
+ - Cases call the app's own functions and widgets, so a regression in them shows up in
+   the numbers; only the decode and handoff baselines are written out here.
+ - Emit machine-readable JSON (per case: per-call timings, items/s) together with the
+   git commit and library versions, so runs can be compared across commits.
+Design rationale:
+ - Inputs are generated from a fixed seed, so two runs on the same machine only differ
+   by the code under test.
+ - Timing uses time.perf_counter_ns over several repeats and reports the best and the
+   median repeat; the best is the least noisy number to track, the median shows jitter.
+ - Cases whose dependency is missing (pyserial, PySide6, matplotlib) are reported as
+   skipped instead of failing the whole run.
+Usage:
+    python -m benchmarks bench [--output results.json] [--repeat 7] [--filter decode]
+"""
+import os
+import sys
+import json
+import math
+import time
+import base64
+import struct
+import asyncio
+import argparse
+import platform
+import subprocess
+import collections
+import numpy as np
+
+DEFAULT_REPEAT = 7
+RANDOM_SEED = 1234
+
+# Workload sizes, chosen to match what the app sees
+FURHAT_AUDIO_SAMPLE_RATE = 16000  # same as model.FURHAT_AUDIO_SAMPLE_RATE (kept here: model needs Qt)
+FURHAT_AUDIO_CHANNELS = 2         # same as model.FURHAT_AUDIO_CHANNELS, 16-bit interleaved L/R
+FURHAT_CHUNK_MS = 100
+FURHAT_CHUNK_FRAMES = FURHAT_AUDIO_SAMPLE_RATE * FURHAT_CHUNK_MS // 1000
+WS_FRAMES_PER_BATCH = 2048      # 4-byte (left, right) frames as sent by the fake server
+MAPPING_FRAMES = 4096           # README pipeline frames per call
+LED_FRAMES = 256                # animation engine ticks per call
+SERIAL_FRAMES = 256             # encoded frames per call
+PLOT_BANDS = 16
+HANDOFF_ITEMS = 10000
+RING_CAPACITY = 64
+
+# envelope_track lives in the Furhat events app next to this folder
+FURHAT_EVENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "s-Python_fetching_furhat_events")
+
+
+class BenchmarkCase:
+    def __init__(self, name, group, setup, items=1, number=100, requires=None):
+        self.name = name
+        self.group = group
+        # setup() -> zero-argument callable to time
+        self.setup = setup
+        # items processed per call (frames, samples, messages)
+        self.items = items
+        # calls per repeat
+        self.number = number
+        # modules the case imports, directly or through the app's modules
+        self.requires = requires or ()
+
+
+def _rng():
+    return np.random.default_rng(RANDOM_SEED)
+
+
+# ------------------------------
+# WebSocket frame decode
+# ------------------------------
+def _ws_frames():
+    pcm = _rng().integers(-32768, 32767, size=(WS_FRAMES_PER_BATCH, 2), dtype=np.int16)
+    return [pcm[i].tobytes() for i in range(WS_FRAMES_PER_BATCH)]
+
+
+def setup_ws_decode_per_sample():
+    frames = _ws_frames()
+
+    def run():
+        # what WebSocketClient._listener does for each message
+        return [struct.unpack('<hh', frame) for frame in frames]
+    return run
+
+
+def setup_ws_decode_block():
+    payload = b"".join(_ws_frames())
+
+    def run():
+        return np.frombuffer(payload, dtype='<i2').reshape(-1, 2)
+    return run
+
+
+# ------------------------------
+# Furhat base64 audio decode
+# ------------------------------
+def _furhat_chunk():
+    samples = _rng().integers(-32768, 32767, size=FURHAT_CHUNK_FRAMES * FURHAT_AUDIO_CHANNELS, dtype=np.int16)
+    return base64.b64encode(samples.tobytes()).decode("ascii")
+
+
+def setup_base64_decode_struct():
+    chunk = _furhat_chunk()
+
+    def run():
+        raw = base64.b64decode(chunk)
+        values = struct.unpack(f"<{len(raw) // 2}h", raw)
+        # per-channel RMS of the interleaved L/R stream
+        return [math.sqrt(sum(v * v for v in values[channel::FURHAT_AUDIO_CHANNELS]) / FURHAT_CHUNK_FRAMES) / 32768.0
+                for channel in range(FURHAT_AUDIO_CHANNELS)]
+    return run
+
+
+def setup_base64_decode_numpy():
+    chunk = _furhat_chunk()
+
+    def run():
+        # what AppModel.audio_stream_handler does for the channel levels
+        samples = np.frombuffer(base64.b64decode(chunk), dtype='<i2')
+        rms = np.sqrt(np.mean(np.square(samples.reshape(-1, FURHAT_AUDIO_CHANNELS), dtype=np.float32), axis=0))
+        return np.minimum(rms / 32768.0, 1.0)
+    return run
+
+
+# ------------------------------
+# README mapping pipeline (steps 1-3)
+# ------------------------------
+def _mapping_input():
+    # a speech-like amplitude: bursts with silences in between
+    rng = _rng()
+    bursts = np.repeat(rng.random(MAPPING_FRAMES // 64) > 0.4, 64)
+    return (rng.random(MAPPING_FRAMES) * bursts).astype(np.float64)
+
+
+def _led_luts():
+    from config import AppConfig
+    from led_lut import get_led_luts
+    # the brightness tables do not depend on the pixel count
+    return get_led_luts(AppConfig(), 1)
+
+
+def setup_mapping_led_luts():
+    luts = _led_luts()
+    amplitudes = _mapping_input().tolist()
+
+    def run():
+        # AppModel.map_led_brightness, once per poll tick
+        return [luts.brightness_byte(luts.map_amplitude(x)) for x in amplitudes]
+    return run
+
+
+def setup_mapping_envelope_track():
+    if FURHAT_EVENTS_DIR not in sys.path:
+        sys.path.append(FURHAT_EVENTS_DIR)
+    from envelope_track import compute_led_track
+    amplitudes = _mapping_input()
+
+    def run():
+        # myApp's looping file playback: the whole track at once
+        return compute_led_track(amplitudes)
+    return run
+
+
+# ------------------------------
+# LED animation engine
+# ------------------------------
+def setup_led_animation_frame():
+    from led_animation import LedAnimationEngine
+    engine = LedAnimationEngine(lambda: (0.0, 0.0), lambda frame, force: None)
+    levels = _mapping_input()[:LED_FRAMES].tolist()
+
+    def run():
+        return [engine.render_frame(x, 1.0 - x) for x in levels]
+    return run
+
+
+def setup_led_animation_bands():
+    from led_animation import LedAnimationEngine
+    from serial_com import NUM_PIXELS
+    engine = LedAnimationEngine(lambda: (0.0, 0.0), lambda frame, force: None)
+    bands = _rng().random((LED_FRAMES, NUM_PIXELS)).astype(np.float32)
+
+    def run():
+        return [engine.render_frame(0.5, 0.5, row) for row in bands]
+    return run
+
+
+# ------------------------------
+# Spectral analyzer
+# ------------------------------
+def _stereo_chunk():
+    return _rng().integers(-8000, 8000, size=FURHAT_CHUNK_FRAMES * FURHAT_AUDIO_CHANNELS, dtype=np.int16)
+
+
+def setup_spectrum_per_block():
+    chunk = _stereo_chunk()
+    block, hop = 512, 256
+    window = np.hanning(block)
+
+    def run():
+        # one rfft and a Python loop over log-spaced bands per block
+        mono = chunk.reshape(-1, FURHAT_AUDIO_CHANNELS).mean(axis=1)
+        edges = np.geomspace(3, 224, 17).astype(int)
+        levels = []
+        for start in range(0, len(mono) - block + 1, hop):
+            power = np.abs(np.fft.rfft(mono[start:start + block] * window)) ** 2
+            levels.append([power[edges[i]:edges[i + 1]].sum() for i in range(16)])
+        return levels
+    return run
+
+
+def setup_spectrum_analyzer():
+    from spectral_analyzer import SpectralAnalyzer
+    chunk = _stereo_chunk()
+    analyzer = SpectralAnalyzer(FURHAT_AUDIO_SAMPLE_RATE, channels=FURHAT_AUDIO_CHANNELS)
+
+    def run():
+        return analyzer.process(chunk)
+    return run
+
+
+# ------------------------------
+# Serial encoder
+# ------------------------------
+def _brightness_values():
+    return _rng().integers(0, 256, size=SERIAL_FRAMES).tolist()
+
+
+def setup_serial_encode_brightness():
+    from serial_com import encode_brightness
+    values = _brightness_values()
+
+    def run():
+        # "NNN#seq" text line, the brightness-only fallback
+        return [encode_brightness(v, i & 0xFF) for i, v in enumerate(values)]
+    return run
+
+
+def setup_serial_encode_pixel_levels():
+    from serial_com import encode_pixel_levels, NUM_PIXELS
+    frames = _rng().integers(0, 256, size=(SERIAL_FRAMES, NUM_PIXELS)).tolist()
+
+    def run():
+        return [encode_pixel_levels(levels, i & 0xFF) for i, levels in enumerate(frames)]
+    return run
+
+
+def setup_serial_encode_rgb_frame():
+    from serial_com import encode_rgb_frame, RGB_FRAME_LEVELS, RGB_FRAME_SYNC
+    frames = _rng().integers(0, 256, size=(SERIAL_FRAMES, RGB_FRAME_LEVELS), dtype=np.uint8)
+
+    def run():
+        # sequence numbers below the sync byte, which SerialCom never uses as one
+        return [encode_rgb_frame(rgb, i % RGB_FRAME_SYNC) for i, rgb in enumerate(frames)]
+    return run
+
+
+# ------------------------------
+# Plot backends
+# ------------------------------
+_qt_app = None
+
+
+def _plot_canvas(backend):
+    global _qt_app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QImage
+    _qt_app = QApplication.instance() or QApplication([])
+    if backend == "matplotlib":
+        from plot_view import AudioIntensityCanvas
+        canvas = AudioIntensityCanvas()
+    else:
+        from painter_view import PainterIntensityCanvas
+        canvas = PainterIntensityCanvas()
+    # about the size the canvas gets in the fixed 400 px window
+    canvas.resize(400, 220)
+    image = QImage(canvas.size(), QImage.Format_ARGB32)
+
+    def show():
+        # the painter backend only draws on paint; matplotlib already drew in the setter
+        if backend != "matplotlib":
+            canvas.render(image)
+    return canvas, show
+
+
+def _setup_plot_intensity(backend):
+    canvas, show = _plot_canvas(backend)
+    heights = _rng().random(256)
+    state = {"i": 0}
+
+    def run():
+        canvas.plot_frame_intensity_normal(heights[state["i"] % heights.size])
+        state["i"] += 1
+        show()
+    return run
+
+
+def _setup_plot_bands(backend):
+    canvas, show = _plot_canvas(backend)
+    levels = _rng().random((256, PLOT_BANDS))
+    state = {"i": 0}
+
+    def run():
+        canvas.plot_band_levels(levels[state["i"] % len(levels)])
+        state["i"] += 1
+        show()
+    return run
+
+
+def setup_plot_matplotlib_full_redraw():
+    # AudioIntensityCanvas.plot_frame_intensity_normal: set the bar, canvas.draw()
+    return _setup_plot_intensity("matplotlib")
+
+
+def setup_plot_matplotlib_blit():
+    canvas, _ = _plot_canvas("matplotlib")
+    figure_canvas, ax, bar = canvas.canvas, canvas.ax, canvas.bar_norm[0]
+    # the same figure, but only the bar is redrawn over a saved background
+    bar.set_animated(True)
+    figure_canvas.draw()
+    background = figure_canvas.copy_from_bbox(ax.bbox)
+    heights = _rng().random(256)
+    state = {"i": 0}
+
+    def run():
+        bar.set_height(heights[state["i"] % heights.size])
+        state["i"] += 1
+        figure_canvas.restore_region(background)
+        ax.draw_artist(bar)
+        figure_canvas.blit(ax.bbox)
+    # the widget owns the FigureCanvas: keep it alive as long as run is
+    run.canvas = canvas
+    return run
+
+
+def setup_plot_matplotlib_bands():
+    return _setup_plot_bands("matplotlib")
+
+
+def setup_plot_qpainter_intensity():
+    return _setup_plot_intensity("qpainter")
+
+
+def setup_plot_qpainter_bands():
+    return _setup_plot_bands("qpainter")
+
+
+# ------------------------------
+# Producer -> consumer handoff
+# ------------------------------
+def setup_handoff_asyncio_queue():
+    loop = asyncio.new_event_loop()
+
+    async def exchange():
+        # WebSocketClient -> AppModel._drain_ws_queue_update_latest
+        queue = asyncio.Queue()
+        latest = None
+        for i in range(HANDOFF_ITEMS):
+            await queue.put((i, i))
+            if queue.qsize() >= 8:
+                while True:
+                    try:
+                        latest = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+        return latest
+
+    def run():
+        return loop.run_until_complete(exchange())
+    run.close = loop.close
+    return run
+
+
+def setup_handoff_deque():
+    def run():
+        ring = collections.deque(maxlen=RING_CAPACITY)
+        latest = None
+        for i in range(HANDOFF_ITEMS):
+            ring.append((i, i))
+            if len(ring) >= 8:
+                latest = ring[-1]
+                ring.clear()
+        return latest
+    return run
+
+
+def setup_handoff_numpy_ring():
+    def run():
+        ring = np.zeros((RING_CAPACITY, 2), dtype=np.int16)
+        write_index = 0
+        for i in range(HANDOFF_ITEMS):
+            ring[write_index % RING_CAPACITY] = i & 0x7FFF
+            write_index += 1
+        return ring[(write_index - 1) % RING_CAPACITY]
+    return run
+
+
+CASES = [
+    BenchmarkCase("ws_decode.per_sample_struct", "ws_decode", setup_ws_decode_per_sample, items=WS_FRAMES_PER_BATCH, number=20),
+    BenchmarkCase("ws_decode.block_frombuffer", "ws_decode", setup_ws_decode_block, items=WS_FRAMES_PER_BATCH, number=2000),
+    BenchmarkCase("furhat_decode.base64_struct", "furhat_decode", setup_base64_decode_struct, items=FURHAT_CHUNK_FRAMES, number=20),
+    BenchmarkCase("furhat_decode.base64_numpy", "furhat_decode", setup_base64_decode_numpy, items=FURHAT_CHUNK_FRAMES, number=500),
+    BenchmarkCase("readme_mapping.led_luts_per_frame", "readme_mapping", setup_mapping_led_luts, items=MAPPING_FRAMES, number=5),
+    BenchmarkCase("readme_mapping.envelope_track", "readme_mapping", setup_mapping_envelope_track, items=MAPPING_FRAMES, number=200),
+    BenchmarkCase("led_animation.envelope_frame", "led_animation", setup_led_animation_frame, items=LED_FRAMES, number=10, requires=("serial",)),
+    BenchmarkCase("led_animation.band_frame", "led_animation", setup_led_animation_bands, items=LED_FRAMES, number=10, requires=("serial",)),
+    BenchmarkCase("spectrum.per_block_loop", "spectrum", setup_spectrum_per_block, items=FURHAT_CHUNK_FRAMES, number=50),
+    BenchmarkCase("spectrum.batched_analyzer", "spectrum", setup_spectrum_analyzer, items=FURHAT_CHUNK_FRAMES, number=200, requires=("serial",)),
+    BenchmarkCase("serial_encode.brightness_line", "serial_encode", setup_serial_encode_brightness, items=SERIAL_FRAMES, number=100, requires=("serial",)),
+    BenchmarkCase("serial_encode.pixel_levels", "serial_encode", setup_serial_encode_pixel_levels, items=SERIAL_FRAMES, number=20, requires=("serial",)),
+    BenchmarkCase("serial_encode.rgb_frame", "serial_encode", setup_serial_encode_rgb_frame, items=SERIAL_FRAMES, number=20, requires=("serial",)),
+    BenchmarkCase("plot.matplotlib_full_redraw", "plot", setup_plot_matplotlib_full_redraw, number=20, requires=("PySide6", "matplotlib")),
+    BenchmarkCase("plot.matplotlib_blit", "plot", setup_plot_matplotlib_blit, number=200, requires=("PySide6", "matplotlib")),
+    BenchmarkCase("plot.matplotlib_bands", "plot", setup_plot_matplotlib_bands, number=20, requires=("PySide6", "matplotlib")),
+    BenchmarkCase("plot.qpainter_intensity", "plot", setup_plot_qpainter_intensity, number=200, requires=("PySide6",)),
+    BenchmarkCase("plot.qpainter_bands", "plot", setup_plot_qpainter_bands, number=200, requires=("PySide6",)),
+    BenchmarkCase("handoff.asyncio_queue", "handoff", setup_handoff_asyncio_queue, items=HANDOFF_ITEMS, number=3),
+    BenchmarkCase("handoff.deque_latest", "handoff", setup_handoff_deque, items=HANDOFF_ITEMS, number=10),
+    BenchmarkCase("handoff.numpy_ring", "handoff", setup_handoff_numpy_ring, items=HANDOFF_ITEMS, number=10),
+]
+
+
+# ------------------------------
+# Runner
+# ------------------------------
+def _module_available(name):
+    try:
+        __import__(name)
+        return True
+    except Exception:
+        return False
+
+
+def run_case(case, repeat=DEFAULT_REPEAT):
+    missing = [name for name in case.requires if not _module_available(name)]
+    if missing:
+        return {"name": case.name, "group": case.group, "skipped": f"{', '.join(missing)} not installed"}
+
+    func = case.setup()
+    try:
+        func()  # warm-up (imports, caches, first allocation)
+        per_call_ns = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(case.number):
+                func()
+            per_call_ns.append((time.perf_counter_ns() - start) / case.number)
+    finally:
+        # setups that own a resource (an event loop) expose close()
+        close = getattr(func, "close", None)
+        if close is not None:
+            close()
+    per_call_ns.sort()
+    best = per_call_ns[0]
+    return {
+        "name": case.name,
+        "group": case.group,
+        "items_per_call": case.items,
+        "calls_per_repeat": case.number,
+        "repeat": repeat,
+        "best_ns_per_call": best,
+        "median_ns_per_call": per_call_ns[len(per_call_ns) // 2],
+        "items_per_second": case.items * 1e9 / best if best else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def _versions():
+    versions = {"python": platform.python_version(), "numpy": np.__version__}
+    for name in ("matplotlib", "PySide6", "serial", "websockets"):
+        try:
+            module = __import__(name)
+            versions[name] = getattr(module, "__version__", "unknown")
+        except Exception:
+            versions[name] = None
+    return versions
+
+
+def run_benchmarks(repeat=DEFAULT_REPEAT, name_filter=None):
+    results = []
+    for case in CASES:
+        if name_filter and name_filter not in case.name:
+            continue
+        result = run_case(case, repeat)
+        results.append(result)
+        if "skipped" in result:
+            print(f"{case.name:<32} skipped ({result['skipped']})", file=sys.stderr)
+        else:
+            print(f"{case.name:<32} {result['best_ns_per_call'] / 1000.0:>12.2f} us/call "
+                  f"{result['items_per_second']:>14.0f} items/s", file=sys.stderr)
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "versions": _versions(),
+        "seed": RANDOM_SEED,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Audio-to-LED hot path benchmarks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench = subparsers.add_parser("bench", help="Run the benchmark suite and print JSON")
+    bench.add_argument("--output", type=str, default=None, help="Write the JSON here instead of stdout")
+    bench.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed repeats per case")
+    bench.add_argument("--filter", type=str, default=None, help="Only run cases whose name contains this")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(repeat=args.repeat, name_filter=args.filter)
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(encoded + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(encoded)
+
+
+if __name__ == "__main__":
+    main()
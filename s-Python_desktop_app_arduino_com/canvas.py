@@ -0,0 +1,32 @@
+# canvas.py
+"""
+Plot backend selection.
+Responsibility:
+ - Build the intensity canvas for the backend named in the config (config.plot_backend):
+     "qpainter"    painter_view.PainterIntensityCanvas (native, default)
+     "matplotlib"  plot_view.AudioIntensityCanvas
+ - Every backend is a QWidget with the same calls:
+     plot_frame_intensity_normal(value)   one normalized bar
+     plot_band_levels(levels)             one bar per spectral band
+Design rationale:
+ - Importing matplotlib and building a Figure dominate startup time and memory, so the
+   backend module is imported here, on demand: matplotlib is never loaded unless chosen.
+ - A missing or broken matplotlib falls back to the native backend instead of stopping the app.
+"""
+PLOT_BACKEND_QPAINTER = "qpainter"
+PLOT_BACKEND_MATPLOTLIB = "matplotlib"
+PLOT_BACKENDS = (PLOT_BACKEND_QPAINTER, PLOT_BACKEND_MATPLOTLIB)
+
+
+def create_intensity_canvas(backend=PLOT_BACKEND_QPAINTER, parent=None):
+    if backend not in PLOT_BACKENDS:
+        print(f"Canvas: unknown plot backend {backend!r}, using {PLOT_BACKEND_QPAINTER!r}")
+        backend = PLOT_BACKEND_QPAINTER
+    if backend == PLOT_BACKEND_MATPLOTLIB:
+        try:
+            from plot_view import AudioIntensityCanvas
+            return AudioIntensityCanvas(parent)
+        except ImportError as e:
+            print("Canvas: matplotlib backend unavailable, using the QPainter backend:", e)
+    from painter_view import PainterIntensityCanvas
+    return PainterIntensityCanvas(parent)
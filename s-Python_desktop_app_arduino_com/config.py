@@ -0,0 +1,73 @@
+# config.py
+"""
+Installation settings.
+Responsibility:
+ - Hold the defaults for settings that change between installations or setups
+   (LED mapping curves, animation rate, plot backend, ...).
+ - Override them from an optional JSON file next to the app (APP_CONFIG_FILE), e.g.
+   {"led_mapping": "linear", "led_dithering": false}.
+Design rationale:
+ - One flat namespace of plain values: modules read config.<name>, and a parameter set
+   can be used directly as a cache key (see led_lut.get_led_luts).
+ - Unknown keys and values of the wrong type are reported and ignored, so a typo in the
+   file never stops the app; without the file the defaults apply.
+"""
+import os
+import json
+
+APP_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_config.json")
+
+DEFAULTS = {
+    # LED output (see README: perceptual mapping, target hold and easing)
+    "led_animation_enabled": True,      # host renders RGB frames; False: one brightness per poll tick
+    "led_animation_rate_hz": 60.0,
+    "led_mapping": "exponential",       # "linear" | "exponential" (y = 1 - e^(-beta x))
+    "led_mapping_beta": 10.0,
+    "led_easing": "exponential",        # "none" | "linear" | "cubic" | "exponential"
+    "led_easing_hold_frames": 8,        # N: frames between target updates
+    "led_easing_cubic": [7.7, 0.9, 0.12],  # A, C, s in s(A t^3 + C t)
+    "led_easing_exp_b": 3.0,            # B in 1 - e^(-B t)
+    "led_gamma": 2.2,
+    "led_floor": 15,                    # idle glow in output units (firmware BASE_STATE)
+    "led_dithering": True,              # temporal dithering of the 8-bit output
+    # UI
+    "plot_backend": "qpainter",         # "qpainter" | "matplotlib" (see canvas.py)
+    # Development
+    "serial_emulator": False,           # run firmware_emulator in-process and list its port (POSIX only)
+}
+
+
+class AppConfig:
+    def __init__(self, values=None):
+        self.__dict__.update(DEFAULTS)
+        for key, value in (values or {}).items():
+            self.set(key, value)
+
+    def set(self, key, value):
+        if key not in DEFAULTS:
+            print("AppConfig: unknown setting ignored:", key)
+            return
+        default = DEFAULTS[key]
+        if isinstance(default, bool) != isinstance(value, bool) or (
+                not isinstance(value, type(default)) and not (isinstance(default, float) and isinstance(value, int))):
+            print(f"AppConfig: {key} should be like {default!r}, got {value!r}; keeping {getattr(self, key)!r}")
+            return
+        setattr(self, key, value)
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in DEFAULTS}
+
+
+def load_config(path=APP_CONFIG_FILE):
+    """Defaults overridden by the JSON file at path, if there is one."""
+    if not os.path.exists(path):
+        return AppConfig()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            values = json.load(f)
+        if not isinstance(values, dict):
+            raise ValueError("expected a JSON object")
+    except (OSError, ValueError) as e:
+        print("AppConfig: could not load", path, e)
+        return AppConfig()
+    return AppConfig(values)
@@ -0,0 +1,409 @@
+# firmware_emulator.py
+"""
+Emulator of s_HRI_audio_wave_NeoPixel.ino exposed on a pseudo-terminal (POSIX only).
+Responsibility:
+ - Open a pty pair; the slave path (e.g. /dev/pts/5) is what SerialCom.connect opens.
+ - Receive bytes like the Arduino UART: timestamped on arrival, kept in a 64-byte RX
+   buffer, and dropped when that buffer is full.
+ - Run the sketch's loop() faithfully: power button state and the line protocol
+   ("NNN" brightness with a BASE_STATE floor, "A" listening, "P<hex>" per-pixel levels,
+   "B<baud>" acknowledged baud switch, "V" query; the last complete line wins), and
+   answer like it: "V<version>" and "S0"/"S1" on boot, button presses and queries,
+   "K<seq>" once a frame ending in "#<seq>" (or a binary RGB frame) is on the ring.
+   Binary frames resync like the sketch: the sync byte always starts a frame, even inside
+   one (the host never sends it in a frame body), and after a bad checksum at most one
+   frame's worth of bytes is skipped until the next sync.
+ - Record every ring.show() as a timestamped LED trace for offline analysis, and keep
+   the pixels it shows (ring_frame) for a live preview when the emulator runs in-process.
+Design rationale:
+ - CI has no Arduino; this lets the host pipeline run end-to-end against the same
+   behaviour, including how many updates/s actually reach the ring.
+ - All timestamps use time.monotonic(), the same clock the host side uses, so
+   host-to-LED latency can be computed from the trace.
+"""
+import os
+import tty
+import time
+import select
+import argparse
+import threading
+import collections
+
+# --- Firmware constants (keep in sync with s_HRI_audio_wave_NeoPixel.ino) ---
+NUM_PIXELS = 16
+PIXEL_COLOR = (250, 200, 200)
+BASE_STATE = 15
+LISTENING_STATE = 5
+LOW = 0
+SERIAL_RX_BUFFER_SIZE = 64 # HardwareSerial RX buffer on AVR boards
+LINE_BUFFER_SIZE = 40      # line_buffer in the sketch
+SUPPORTED_BAUD_RATES = (9600, 19200, 38400, 57600, 115200)
+FIRMWARE_VERSION = "1.3.0"
+LOOP_POLL_S = 0.001        # one pass of loop() while nothing arrives
+IDLE_POLL_S = 0.01         # loop() while the ring is off
+RGB_FRAME_SYNC = 0xC3
+RGB_FRAME_LEVELS = NUM_PIXELS * 3
+RGB_FRAME_BODY_BYTES = 1 + RGB_FRAME_LEVELS + 1  # seq, RGB, checksum
+MODE_BRIGHTNESS, MODE_LISTENING, MODE_PIXELS, MODE_RGB = range(4)
+
+TRACE_HEADER = "time_s,brightness,r,g,b,source_rx_time_s,latency_ms\n"
+
+
+class NeoPixelFirmwareEmulator:
+    def __init__(self, powered_on=True):
+
+        # pty pair: we keep the master, the host opens the slave by path
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)
+        self.port_name = os.ttyname(self._slave_fd)
+
+        # UART receive side
+        self._rx_buffer = collections.deque()
+        self._rx_lock = threading.Lock()
+        self.rx_bytes = 0
+        self.rx_dropped = 0
+
+        # Firmware state
+        self.baudrate = SUPPORTED_BAUD_RATES[0]
+        self._line = bytearray()
+        self._line_overflow = False
+        self._line_rx_time = None
+        self._led_mode = MODE_BRIGHTNESS
+        self._target_brightness = BASE_STATE
+        self.pixel_levels = [0] * NUM_PIXELS
+        self.pixel_rgb = [(0, 0, 0)] * NUM_PIXELS
+        self._rgb_frame = None           # bytearray while a binary frame is being received
+        self._rgb_resync_skip = 0        # after a corrupted frame: bytes left to skip unless a sync comes first
+        self.rgb_checksum_errors = 0
+        self._needs_show = False
+        self._pending_ack_seq = None
+        self.acks_sent = 0
+        self._furhat_state_rx_time = None
+        self._is_on = False
+        self._pending_button_presses = 0  # written by press_button's caller, taken by loop(): under _rx_lock
+        if powered_on:
+            # the real ring boots off and waits for the button
+            self._pending_button_presses = 1
+
+        # LED trace: (time, brightness, (r, g, b), source_rx_time)
+        self.trace = []
+        self._trace_lock = threading.Lock()
+        # What the ring shows: NUM_PIXELS (r, g, b) after ring.show(), bumped version per show
+        self._ring_pixels = [(0, 0, 0)] * NUM_PIXELS
+        self._ring_version = 0
+
+        self._running = False
+        self._rx_thread = None
+        self._loop_thread = None
+
+    # ------------------------------
+    # Lifecycle
+    # ------------------------------
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        # setup(): announce the firmware and the (off) power state
+        self._report_version()
+        self._report_power_state()
+        self._rx_thread = threading.Thread(target=self._rx_worker, name="emulator-rx", daemon=True)
+        self._loop_thread = threading.Thread(target=self._loop_worker, name="emulator-loop", daemon=True)
+        self._rx_thread.start()
+        self._loop_thread.start()
+
+    def stop(self):
+        self._running = False
+        for t in (self._rx_thread, self._loop_thread):
+            if t:
+                t.join(timeout=1.0)
+        for fd in (self._master_fd, self._slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def press_button(self):
+        """Emulates a debounced press of the power button on BTN_PIN."""
+        with self._rx_lock:
+            self._pending_button_presses += 1
+
+    def _take_button_press(self):
+        with self._rx_lock:
+            if not self._pending_button_presses:
+                return False
+            self._pending_button_presses -= 1
+            return True
+
+    @property
+    def is_on(self):
+        return self._is_on
+
+    def ring_frame(self):
+        """(version, pixels) of the last ring.show(); version grows with every show."""
+        return self._ring_version, self._ring_pixels
+
+    def _show(self, pixels):
+        self._ring_pixels = pixels
+        self._ring_version += 1
+
+    # ------------------------------
+    # Threads
+    # ------------------------------
+    def _rx_worker(self):
+        while self._running:
+            try:
+                ready, _, _ = select.select([self._master_fd], [], [], 0.05)
+                if not ready:
+                    continue
+                data = os.read(self._master_fd, 1024)
+            except OSError:
+                return
+            now = time.monotonic()
+            with self._rx_lock:
+                for byte in data:
+                    self.rx_bytes += 1
+                    if len(self._rx_buffer) >= SERIAL_RX_BUFFER_SIZE:
+                        self.rx_dropped += 1
+                        continue
+                    self._rx_buffer.append((byte, now))
+
+    def _loop_worker(self):
+        while self._running:
+            self._loop()
+
+    # ------------------------------
+    # Firmware emulation
+    # ------------------------------
+    def _loop(self):
+        # toogleSystem(digitalRead(BTN_PIN))
+        if self._take_button_press():
+            self._is_on = not self._is_on
+            self._controll_neo_pixel(LISTENING_STATE if self._is_on else LOW)
+            self._report_power_state()
+
+        # lines are read while off too (queries get answered), frames are dropped
+        self._read_serial_lines()
+        if not self._is_on:
+            self._needs_show = False
+            self._pending_ack_seq = None
+            time.sleep(IDLE_POLL_S)
+            return
+        self._change_led_base_on_serial_messages()
+
+    def _write_line(self, text):
+        try:
+            os.write(self._master_fd, f"{text}\r\n".encode("ascii"))
+        except OSError:
+            pass
+
+    def _report_version(self):
+        self._write_line(f"V{FIRMWARE_VERSION}")
+
+    def _report_power_state(self):
+        self._write_line("S1" if self._is_on else "S0")
+
+    def _read_serial_lines(self):
+        # readSerialLines(): assemble '\n'-terminated lines, handle each complete one
+        with self._rx_lock:
+            received = list(self._rx_buffer)
+            self._rx_buffer.clear()
+        for byte, rx_time in received:
+            if byte == RGB_FRAME_SYNC:
+                # never part of a text line or a frame body: always (re)starts a frame,
+                # dropping a partial line or a frame that lost bytes
+                self._rgb_frame = bytearray()
+                self._rgb_resync_skip = 0
+                self._line.clear()
+                self._line_overflow = False
+                self._line_rx_time = rx_time
+            elif self._rgb_frame is not None:
+                self._rgb_frame.append(byte)
+                if len(self._rgb_frame) == RGB_FRAME_BODY_BYTES:
+                    frame, self._rgb_frame = bytes(self._rgb_frame), None
+                    self._handle_rgb_frame(frame, self._line_rx_time)
+            elif self._rgb_resync_skip > 0:
+                self._rgb_resync_skip -= 1
+            elif byte in (0x0A, 0x0D):
+                if self._line and not self._line_overflow:
+                    self._handle_line(bytes(self._line), self._line_rx_time)
+                self._line.clear()
+                self._line_overflow = False
+            elif len(self._line) < LINE_BUFFER_SIZE - 1:
+                if not self._line:
+                    self._line_rx_time = rx_time
+                self._line.append(byte)
+            else:
+                self._line_overflow = True
+
+    def _handle_rgb_frame(self, frame, rx_time):
+        # handleRGBFrame(): verify the 8-bit sum, then latch the pixels as sent
+        if sum(frame[:-1]) & 0xFF != frame[-1]:
+            self.rgb_checksum_errors += 1
+            self._rgb_resync_skip = RGB_FRAME_BODY_BYTES
+            return
+        data = frame[1:-1]
+        self.pixel_rgb = [tuple(data[i:i + 3]) for i in range(0, RGB_FRAME_LEVELS, 3)]
+        self._pending_ack_seq = frame[0]
+        self._led_mode = MODE_RGB
+        self._furhat_state_rx_time = rx_time
+        self._needs_show = True
+
+    def _handle_line(self, line, rx_time):
+        # optional "#<seq>" suffix, acknowledged once the frame is shown
+        line, separator, seq = line.partition(b"#")
+        if separator:
+            digits = seq[:len(seq) - len(seq.lstrip(b"0123456789"))]
+            self._pending_ack_seq = int(digits) & 0xFF if digits else 0
+        command = line[:1]
+        if command == b"A":
+            self._led_mode = MODE_LISTENING
+        elif command == b"B":
+            self._change_baud_rate(line[1:])
+            return
+        elif command == b"V":
+            self._report_version()
+            self._report_power_state()
+            return
+        elif command == b"P":
+            try:
+                levels = bytes.fromhex(line[1:1 + 2 * NUM_PIXELS].decode("ascii"))
+            except ValueError:
+                return
+            if len(levels) < NUM_PIXELS:
+                return
+            self.pixel_levels = list(levels)
+            self._led_mode = MODE_PIXELS
+        elif command.isdigit():
+            digits = line[:len(line) - len(line.lstrip(b"0123456789"))]
+            self._target_brightness = min(int(digits), 255)
+            self._led_mode = MODE_BRIGHTNESS
+        else:
+            self._pending_ack_seq = None
+            return
+        self._furhat_state_rx_time = rx_time
+        self._needs_show = True
+
+    def _change_baud_rate(self, digits):
+        try:
+            baud = int(digits)
+        except ValueError:
+            return
+        if baud not in SUPPORTED_BAUD_RATES:
+            return
+        # acknowledge at the old rate, then switch (a pty has no real line rate)
+        self._write_line(f"B{baud}")
+        self.baudrate = baud
+
+    def _change_led_base_on_serial_messages(self):
+        if not self._needs_show:
+            time.sleep(LOOP_POLL_S)
+            return
+        self._needs_show = False
+
+        if self._led_mode == MODE_LISTENING:
+            self._controll_neo_pixel(LISTENING_STATE)
+        elif self._led_mode == MODE_PIXELS:
+            self._controll_neo_pixel_levels(self.pixel_levels)
+        elif self._led_mode == MODE_RGB:
+            self._controll_neo_pixel_rgb(self.pixel_rgb)
+        else:
+            self._controll_neo_pixel(max(self._target_brightness, BASE_STATE))
+
+        if self._pending_ack_seq is not None:
+            self._write_line(f"K{self._pending_ack_seq}")
+            self._pending_ack_seq = None
+            self.acks_sent += 1
+
+    def _controll_neo_pixel(self, brightness):
+        # ring.setBrightness(uint8_t) + ring.show(); Adafruit_NeoPixel scales by brightness + 1 (255: none)
+        brightness &= 0xFF
+        scale = 256 if brightness == 255 else brightness + 1
+        self._show([tuple((c * scale) >> 8 for c in PIXEL_COLOR)] * NUM_PIXELS)
+        with self._trace_lock:
+            self.trace.append((time.monotonic(), brightness & 0xFF, PIXEL_COLOR, self._furhat_state_rx_time))
+
+    def _controll_neo_pixel_levels(self, levels):
+        # per-pixel colour scaled by level at full brightness; the trace keeps the mean level
+        mean_level = sum(max(level, BASE_STATE) for level in levels) // len(levels)
+        self._show([tuple(c * max(level, BASE_STATE) // 255 for c in PIXEL_COLOR) for level in levels])
+        with self._trace_lock:
+            self.trace.append((time.monotonic(), mean_level, PIXEL_COLOR, self._furhat_state_rx_time))
+
+    def _controll_neo_pixel_rgb(self, pixels):
+        # pixels latched at full brightness; the trace keeps the mean luma and the mean colour
+        count = len(pixels)
+        self._show(list(pixels))
+        mean_rgb = tuple(sum(pixel[channel] for pixel in pixels) // count for channel in range(3))
+        mean_luma = (299 * mean_rgb[0] + 587 * mean_rgb[1] + 114 * mean_rgb[2]) // 1000
+        with self._trace_lock:
+            self.trace.append((time.monotonic(), mean_luma, mean_rgb, self._furhat_state_rx_time))
+
+    # ------------------------------
+    # Trace analysis
+    # ------------------------------
+    def stats(self):
+        """Summary of the LED trace: update rate and host-to-LED latency."""
+        with self._trace_lock:
+            trace = list(self.trace)
+        result = {
+            "updates": len(trace),
+            "update_rate_hz": 0.0,
+            "rx_bytes": self.rx_bytes,
+            "rx_dropped": self.rx_dropped,
+            "rgb_checksum_errors": self.rgb_checksum_errors,
+            "latency_ms_p50": None,
+            "latency_ms_p95": None,
+            "latency_ms_max": None,
+        }
+        if len(trace) > 1:
+            result["update_rate_hz"] = (len(trace) - 1) / (trace[-1][0] - trace[0][0])
+
+        # latency of the first LED update that shows each newly received byte
+        latencies = []
+        last_source = None
+        for t, _, _, source in trace:
+            if source is not None and source != last_source:
+                latencies.append((t - source) * 1000.0)
+                last_source = source
+        if latencies:
+            latencies.sort()
+            result["latency_ms_p50"] = latencies[len(latencies) // 2]
+            result["latency_ms_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            result["latency_ms_max"] = latencies[-1]
+        return result
+
+    def write_trace(self, path):
+        """Writes the LED trace as CSV (monotonic seconds)."""
+        with self._trace_lock:
+            trace = list(self.trace)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(TRACE_HEADER)
+            for t, brightness, (r, g, b), source in trace:
+                if source is None:
+                    f.write(f"{t:.6f},{brightness},{r},{g},{b},,\n")
+                else:
+                    f.write(f"{t:.6f},{brightness},{r},{g},{b},{source:.6f},{(t - source) * 1000.0:.3f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulate the NeoPixel Arduino on a pseudo-terminal.")
+    parser.add_argument("--trace", type=str, default="led_trace.csv", help="CSV file for the LED trace")
+    parser.add_argument("--off", action="store_true", help="Boot with the ring off (like the real device)")
+    args = parser.parse_args()
+
+    emulator = NeoPixelFirmwareEmulator(powered_on=not args.off)
+    emulator.start()
+    print(f"Emulated Arduino listening on {emulator.port_name} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        emulator.write_trace(args.trace)
+        print(f"Trace written to {args.trace}: {emulator.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -72,7 +72,7 @@ class FurhatClient:
        if self._listner_task and not self._listner_task.done():
             #it already running
             return
-       self._listner_task = loop.create_task(self.__listener())
+       self._listner_task = loop.create_task(self.__listener(), name="furhat-audio-start")
 
     async def stop_audio_stream(self):
         """Stop the listening process (non-blocking)."""
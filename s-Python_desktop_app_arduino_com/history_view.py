@@ -0,0 +1,50 @@
+# history_view.py
+"""
+HistoryView (SignalHistoryWidget):
+ - Scrolling plot of the LED signal chain (raw, normalized, held, eased) over the last
+   10..60 seconds, read from a signal_history.SignalHistory.
+ - Drawn with painter_view.HistoryStripPainter: per series one vertical min..max stroke
+   per pixel column, so a repaint costs the same for 10 s or 60 s of history.
+ - Mouse wheel changes the span; Controller just calls refresh() on its poll tick.
+"""
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QColor
+from PySide6.QtCore import QRectF
+
+from signal_history import SignalHistory
+from painter_view import HistoryStripPainter, PLOT_BG_COLOR, MARGIN
+
+SPAN_CHOICES_S = (10, 20, 30, 60)
+DEFAULT_SPAN_S = 20
+HISTORY_HEIGHT = 140
+
+
+class SignalHistoryWidget(QWidget):
+    def __init__(self, history: SignalHistory, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.span_s = DEFAULT_SPAN_S
+        self.setMinimumHeight(HISTORY_HEIGHT)
+        self._strip = HistoryStripPainter(history.series)
+        self._background = QColor(PLOT_BG_COLOR)
+
+    def set_span_seconds(self, seconds):
+        self.span_s = seconds
+        self.update()
+
+    def refresh(self):
+        """Schedules one repaint (Qt merges repeated requests)."""
+        self.update()
+
+    def wheelEvent(self, event):
+        index = SPAN_CHOICES_S.index(self.span_s) if self.span_s in SPAN_CHOICES_S else 0
+        step = -1 if event.angleDelta().y() > 0 else 1
+        self.set_span_seconds(SPAN_CHOICES_S[min(max(index + step, 0), len(SPAN_CHOICES_S) - 1)])
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self._background)
+        area = QRectF(self.rect()).adjusted(MARGIN, MARGIN, -MARGIN, -MARGIN)
+        if area.width() > 0 and area.height() > 0:
+            self._strip.paint(painter, area, self.history, self.span_s)
+        painter.end()
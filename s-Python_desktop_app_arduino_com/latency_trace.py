@@ -0,0 +1,103 @@
+# latency_trace.py
+"""
+End-to-end latency tracing from audio sample arrival to LED byte.
+Responsibility:
+ - Give each traced frame (websocket package or Furhat audio chunk) a tiny list of monotonic timestamps, one slot per pipeline stage.
+ - On finish, store per-stage deltas and the end-to-end time in fixed-size rolling windows.
+ - Report p50/p95/p99 per stage and end-to-end on demand.
+Design rationale:
+ - Cheap enough to leave on: a stamp is one time.monotonic_ns() call and a list store,
+   frames dropped by the latest-frame handoff are simply never finished, and all the
+   numpy work happens in report(), not on the hot path.
+ - Optional sampling (sample_every) bounds the cost at high frame rates.
+"""
+import time
+import numpy as np
+
+# Pipeline stages, in the order a frame passes through them
+STAGE_WS_RECV = 0      # WebSocketClient._listener received the frame
+STAGE_QUEUE_DRAIN = 1  # Model drain task picked it as the latest frame
+STAGE_POLL_TICK = 2    # Controller poll timer read it
+STAGE_CANVAS_DRAW = 3  # Plot redrawn with it
+STAGE_SERIAL_SEND = 4  # LED byte written by SerialCom.send
+PIPELINE_STAGES = ("ws_recv", "queue_drain", "poll_tick", "canvas_draw", "serial_send")
+
+# Furhat stream stages (own tracer), the path the LEDs take while the animation engine runs
+STAGE_AUDIO_RECV = 0     # Model.audio_stream_handler received the chunk
+STAGE_SPECTRUM = 1       # Spectrum analysed, band levels updated
+STAGE_ENGINE_TICK = 2    # Animation engine rendered a frame from those levels
+STAGE_SERIAL_WRITE = 3   # Frame bytes written by SerialCom (possibly after waiting as the pending frame)
+AUDIO_PIPELINE_STAGES = ("audio_recv", "spectrum", "engine_tick", "serial_write")
+
+DEFAULT_WINDOW = 4096
+PERCENTILES = (50, 95, 99)
+_NS_PER_MS = 1e6
+
+
+class LatencyTracer:
+    def __init__(self, stages=PIPELINE_STAGES, window=DEFAULT_WINDOW, sample_every=1):
+        self.stages = stages
+        self.window = window
+        self.sample_every = max(1, int(sample_every))
+        self._started = 0
+        self._finished = 0
+        # column i holds the delta into stage i (column 0 = end-to-end), in ns; nan = not stamped
+        self._samples = np.full((window, len(stages)), np.nan)
+
+    def start(self):
+        """Begins a trace at the first stage. Returns None for frames that are not sampled."""
+        self._started += 1
+        if self._started % self.sample_every:
+            return None
+        trace = [0] * len(self.stages)
+        trace[0] = time.monotonic_ns()
+        return trace
+
+    @staticmethod
+    def mark(trace, stage):
+        if trace is not None:
+            trace[stage] = time.monotonic_ns()
+
+    def finish(self, trace):
+        """Stores the deltas of a completed trace. Stages that were skipped stay empty."""
+        if trace is None:
+            return
+        row = self._samples[self._finished % self.window]
+        row[:] = np.nan
+        previous = trace[0]
+        for stage in range(1, len(trace)):
+            stamp = trace[stage]
+            if stamp:
+                row[stage] = stamp - previous
+                previous = stamp
+        row[0] = previous - trace[0]
+        self._finished += 1
+
+    def reset(self):
+        self._started = 0
+        self._finished = 0
+        self._samples[:] = np.nan
+
+    def report(self):
+        """Returns {name: {"count", "p50", "p95", "p99"}} in milliseconds, plus "end_to_end"."""
+        filled = self._samples[:min(self._finished, self.window)]
+        names = ("end_to_end",) + tuple(self.stages[1:])
+        report = {}
+        for column, name in enumerate(names):
+            values = filled[:, column]
+            values = values[~np.isnan(values)]
+            entry = {"count": int(values.size)}
+            for p in PERCENTILES:
+                entry[f"p{p}"] = float(np.percentile(values, p) / _NS_PER_MS) if values.size else None
+            report[name] = entry
+        return report
+
+    def format_report(self, title="Latency"):
+        lines = [f"{title} (ms) over last {min(self._finished, self.window)} frames:"]
+        for name, entry in self.report().items():
+            if not entry["count"]:
+                lines.append(f"  {name:<12} n=0")
+                continue
+            lines.append(f"  {name:<12} n={entry['count']:<6} p50={entry['p50']:.2f} "
+                         f"p95={entry['p95']:.2f} p99={entry['p99']:.2f}")
+        return "\n".join(lines)
@@ -0,0 +1,178 @@
+# led_animation.py
+"""
+Host-side LED animation engine.
+Responsibility:
+ - Compute one RGB frame for the NeoPixel ring (NUM_PIXELS x (r, g, b)) at a fixed rate
+   (config.led_animation_rate_hz) from the latest audio envelope (left, right), or from
+   the spectral band levels (one band per pixel) while an audio stream is analysed.
+ - Map the envelope perceptually, ease between targets as the README describes (target hold
+   every N frames, eased interpolation in between), spread it around the ring (stereo pan
+   + a slowly rotating wave) and colour it through the palette, gamma and dither tables.
+   Band levels are already dB-scaled and smoothed (see spectral_analyzer) and go straight
+   to the colour tables.
+ - Hand every frame to a sink (normally SerialCom.send_frame(rgb_pixels=...)), which keeps
+   it within the serial budget and ships it as a binary RGB frame the firmware just latches.
+Design rationale:
+ - The per-tick work is a few numpy operations and table lookups: the curves come from
+   led_lut (built once per config), the pan weights and the rotation profile are built
+   with the engine.
+ - A dedicated thread with absolute deadlines keeps the rate steady regardless of the Qt
+   poll timer or the websocket arrival pattern; a late tick is skipped, not queued.
+ - The firmware no longer animates (no delay()), so what the host renders is what the
+   ring shows, and every frame can be acknowledged (see SerialCom).
+ - Dithered frames differ from the previous one by a single step on purpose; while the
+   undithered levels move they are sent past SerialCom's change threshold (as long as they
+   go out as RGB frames). Once the levels hold steady, e.g. the idle glow in silence, the
+   dither alone does not force a frame, so a steady ring costs nothing.
+"""
+import time
+import threading
+import numpy as np
+
+from config import AppConfig
+from led_lut import get_led_luts
+from metrics import MetricsRegistry
+from serial_com import NUM_PIXELS
+
+ENVELOPE_FULL_SCALE = 30000.0     # |sample| that maps to a full envelope (int16 audio)
+
+# Spatial shaping
+ROTATION_HZ = 0.25                # wave revolutions per second
+WAVE_DEPTH = 0.35                 # 0 = flat ring, 1 = pixels away from the crest go dark
+PROFILE_STEPS = 64                # rotation phases in the precomputed profile table
+
+
+def build_pan_weights(num_pixels=NUM_PIXELS):
+    """Per-pixel (left, right) weights: the left channel lights one half of the ring, the right the other."""
+    angle = 2.0 * np.pi * np.arange(num_pixels) / num_pixels
+    left = 0.5 * (1.0 + np.cos(angle))
+    return left, 1.0 - left
+
+
+def build_rotation_profile(depth=WAVE_DEPTH, steps=PROFILE_STEPS, num_pixels=NUM_PIXELS):
+    """(steps, num_pixels) gain table: one cosine crest travelling once around the ring."""
+    pixel = np.arange(num_pixels) / num_pixels
+    phase = np.arange(steps)[:, None] / steps
+    crest = 0.5 * (1.0 + np.cos(2.0 * np.pi * (pixel[None, :] - phase)))
+    return (1.0 - depth) + depth * crest
+
+
+class LedAnimationEngine:
+    def __init__(self, envelope_source, frame_sink, config: AppConfig = None, metrics: MetricsRegistry = None,
+                 band_source=None, history=None):
+        """
+        envelope_source() -> (left, right) normalized 0..1, called once per tick.
+        band_source() -> NUM_PIXELS band levels 0..1, or None when there is no spectrum (optional).
+        history: signal_history.SignalHistory receiving (raw, normalized, held, eased) per tick (optional).
+        frame_sink(rgb, force) receives a (NUM_PIXELS, 3) uint8 array on the engine thread;
+        force is True for dithered frames whose undithered levels changed since the previous tick.
+        """
+        config = config or AppConfig()
+        self.envelope_source = envelope_source
+        self.band_source = band_source
+        self.history = history
+        self.frame_sink = frame_sink
+        self.rate_hz = config.led_animation_rate_hz
+
+        # Precomputed once per parameter set
+        self.luts = get_led_luts(config, NUM_PIXELS)
+        self._pan_left, self._pan_right = build_pan_weights()
+        self._profile = build_rotation_profile()
+        self._phase_step = ROTATION_HZ * PROFILE_STEPS / self.rate_hz
+
+        # Target hold state (README: x_c current, x_t target, per channel)
+        self._current = np.zeros(2, dtype=np.float32)
+        self._target = np.zeros(2, dtype=np.float32)
+        self._tick = 0
+        self._phase = 0.0
+        self._last_level_index = None
+        self._levels_moved = True
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        metrics = metrics or MetricsRegistry()
+        self._frames = metrics.counter("led_frames_rendered_total", "LED frames computed by the animation engine")
+        self._render_seconds = metrics.histogram("led_frame_render_seconds", "Time to compute one LED frame")
+        self._overruns = metrics.counter("led_frame_overruns_total",
+                                         "Animation ticks skipped because the engine fell behind")
+
+    @property
+    def is_running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._worker, name="led-animation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def render_frame(self, left, right, bands=None):
+        """Advances the animation by one tick and returns the (NUM_PIXELS, 3) uint8 frame."""
+        luts = self.luts
+        if bands is not None:
+            bands = np.asarray(bands, dtype=np.float32)
+            if self.history is not None:
+                raw = 0.5 * (left + right)
+                level = float(bands.mean())
+                self.history.append((raw, float(luts.map_amplitude(raw)), level, level))
+            return self._colour(bands)
+
+        step = self._tick % luts.hold_frames
+        if step == 0:
+            self._current = self._target
+            self._target = luts.map_amplitude((left, right))
+        weight = luts.easing[step]
+        envelope = (1.0 - weight) * self._current + weight * self._target
+        if self.history is not None:
+            raw = 0.5 * (left + right)
+            self.history.append((raw, float(luts.map_amplitude(raw)), float(self._target.mean()),
+                                 float(envelope.mean())))
+
+        self._phase = (self._phase + self._phase_step) % PROFILE_STEPS
+        profile = self._profile[int(self._phase)]
+        levels = (envelope[0] * self._pan_left + envelope[1] * self._pan_right) * profile
+
+        return self._colour(levels)
+
+    def _colour(self, levels):
+        index = self.luts.level_index(levels)
+        self._levels_moved = self._last_level_index is None or not np.array_equal(index, self._last_level_index)
+        self._last_level_index = index
+        frame = self.luts.to_rgb(levels, self._tick)
+        self._tick += 1
+        return frame
+
+    def _emit(self, frame):
+        # only real level changes bypass the change filter, not the dither pattern alone
+        self.frame_sink(frame, self._levels_moved and self.luts.dithering)
+
+    def _worker(self):
+        interval = 1.0 / self.rate_hz
+        deadline = time.perf_counter()
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            try:
+                left, right = self.envelope_source()
+                bands = self.band_source() if self.band_source else None
+                frame = self.render_frame(left, right, bands)
+                self._render_seconds.observe(time.perf_counter() - start)
+                self._frames.inc()
+                self._emit(frame)
+            except Exception as e:
+                print("LedAnimationEngine: tick failed:", e)
+
+            deadline += interval
+            now = time.perf_counter()
+            if now > deadline:
+                # fell behind: skip the missed ticks instead of bursting to catch up
+                missed = int((now - deadline) / interval) + 1
+                self._overruns.inc(missed)
+                deadline += missed * interval
+            self._stop_event.wait(deadline - now)
@@ -0,0 +1,152 @@
+# led_lut.py
+"""
+Lookup tables for the 8-bit LED output.
+Responsibility:
+ - Precompute, once per parameter set, the curves the README describes and the output needs:
+     mapping  normalized amplitude -> perceptual level (linear, or y = 1 - e^(-beta x))
+     easing   transition weights f(t) for t = k / N over one target-hold period
+              (linear, cubic s(A t^3 + C t) or exponential 1 - e^(-B t), clamped to 1)
+     gamma    perceptual level -> LED PWM value in 8.8 fixed point, with the idle floor
+     palette  perceptual level -> tint (r, g, b) at full intensity
+     dither   per-frame, per-pixel thresholds for temporal dithering
+ - Turn float levels into 8-bit RGB (or a single brightness byte) with table lookups only.
+Design rationale:
+ - No exp() or power per value per tick: the hot path is indexing and integer adds.
+ - gamma keeps 8 fractional bits. Low levels, where one 8-bit step is a visible jump on a
+   NeoPixel, are rounded up or down frame by frame with an ordered pattern so the average
+   over DITHER_PERIOD frames hits the fractional value. The pattern is offset per pixel so
+   the ring does not pulse as a whole.
+ - get_led_luts caches by parameter values: every engine or device built from the same
+   config shares one set of tables.
+"""
+import functools
+import numpy as np
+
+MAPPING_STEPS = 1024       # input resolution of the mapping table
+LEVEL_STEPS = 4096         # resolution of the perceptual level fed to gamma / palette
+PALETTE_STEPS = 256
+DITHER_PERIOD = 16         # frames in one dither cycle (ordered thresholds 0..255 in 16 steps)
+
+# Palette stops (level 0..1 -> tint at full intensity); the ring's original colour at the top
+PALETTE_STOPS = (
+    (0.0, (120, 60, 140)),
+    (0.5, (220, 140, 170)),
+    (1.0, (250, 200, 200)),
+)
+
+# 4-bit bit-reversal order: consecutive frames land far apart in the threshold range
+_DITHER_ORDER = (0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)
+
+
+# ------------------------------
+# Curves
+# ------------------------------
+def build_mapping_lut(kind="exponential", beta=10.0, steps=MAPPING_STEPS):
+    x = np.linspace(0.0, 1.0, steps)
+    if kind == "linear":
+        y = x
+    elif kind == "exponential":
+        y = 1.0 - np.exp(-beta * x)
+    else:
+        raise ValueError(f"unknown mapping {kind!r}")
+    return y.astype(np.float32)
+
+
+def build_easing_lut(kind="exponential", hold_frames=8, cubic=(7.7, 0.9, 0.12), exp_b=3.0):
+    """f(t) for t = k / hold_frames, k = 0 .. hold_frames (the last entry always reaches the target)."""
+    hold_frames = max(1, int(hold_frames))
+    t = np.arange(hold_frames + 1) / hold_frames
+    if kind == "none":
+        f = np.ones_like(t)
+    elif kind == "linear":
+        f = t
+    elif kind == "cubic":
+        a, c, s = cubic
+        f = s * (a * t ** 3 + c * t)
+    elif kind == "exponential":
+        f = 1.0 - np.exp(-exp_b * t)
+    else:
+        raise ValueError(f"unknown easing {kind!r}")
+    f = np.minimum(f, 1.0)
+    f[-1] = 1.0
+    return f.astype(np.float32)
+
+
+def build_gamma_lut(gamma=2.2, floor=15, steps=LEVEL_STEPS):
+    """Perceptual level -> PWM value in 8.8 fixed point (0 .. 255 * 256), never below floor."""
+    x = np.linspace(0.0, 1.0, steps)
+    floor = floor / 255.0
+    intensity = floor + (1.0 - floor) * x ** gamma
+    return np.round(intensity * 255.0 * 256.0).astype(np.uint32)
+
+
+def build_palette_lut(stops=PALETTE_STOPS, steps=PALETTE_STEPS):
+    x = np.linspace(0.0, 1.0, steps)
+    positions = [position for position, _ in stops]
+    return np.stack([np.interp(x, positions, [color[channel] for _, color in stops]) for channel in range(3)],
+                    axis=1).astype(np.uint32)
+
+
+def build_dither_lut(num_pixels, period=DITHER_PERIOD):
+    """(period, num_pixels) thresholds in 1/256 units: pixel p at frame f uses order[(f + p * 5) % period]."""
+    order = np.array(_DITHER_ORDER[:period] if period == len(_DITHER_ORDER) else range(period))
+    frames = np.arange(period)[:, None]
+    pixels = np.arange(num_pixels)[None, :]
+    return (order[(frames + pixels * 5) % period] * 256 // period).astype(np.uint32)
+
+
+# ------------------------------
+# Table set
+# ------------------------------
+class LedLuts:
+    def __init__(self, num_pixels, mapping="exponential", beta=10.0, easing="exponential", hold_frames=8,
+                 cubic=(7.7, 0.9, 0.12), exp_b=3.0, gamma=2.2, floor=15, dithering=True):
+        self.num_pixels = num_pixels
+        self.mapping = build_mapping_lut(mapping, beta)
+        self.easing = build_easing_lut(easing, hold_frames, cubic, exp_b)
+        self.hold_frames = len(self.easing) - 1
+        self.gamma = build_gamma_lut(gamma, floor)
+        self.palette = build_palette_lut()
+        self.dithering = dithering
+        self.dither = build_dither_lut(num_pixels) if dithering else np.full((1, num_pixels), 128, np.uint32)
+        # 8-bit variants for paths without dithering (single brightness values)
+        self.gamma8 = np.minimum((self.gamma + 128) >> 8, 255).astype(np.uint8)
+
+    def map_amplitude(self, x):
+        """Normalized amplitude (scalar or array, 0..1) -> perceptual level 0..1."""
+        index = np.clip((np.asarray(x) * (MAPPING_STEPS - 1)).astype(np.intp), 0, MAPPING_STEPS - 1)
+        return self.mapping[index]
+
+    def brightness_byte(self, level):
+        """Perceptual level 0..1 -> one gamma-corrected byte (firmware "NNN" brightness)."""
+        return int(self.gamma8[min(max(int(level * (LEVEL_STEPS - 1)), 0), LEVEL_STEPS - 1)])
+
+    def brightness_bytes(self, levels):
+        """Perceptual levels (array 0..1) -> gamma-corrected bytes (firmware "P<hex>" pixel levels)."""
+        index = np.clip((np.asarray(levels) * (LEVEL_STEPS - 1)).astype(np.intp), 0, LEVEL_STEPS - 1)
+        return self.gamma8[index]
+
+    def level_index(self, levels):
+        """Perceptual levels (0..1) -> table index; equal indexes give the same undithered colour."""
+        return np.clip((np.asarray(levels) * (LEVEL_STEPS - 1)).astype(np.intp), 0, LEVEL_STEPS - 1)
+
+    def to_rgb(self, levels, frame_index):
+        """Perceptual levels (num_pixels floats 0..1) -> (num_pixels, 3) uint8, dithered over frames."""
+        index = self.level_index(levels)
+        fixed = self.gamma[index]
+        tint = self.palette[index * PALETTE_STEPS // LEVEL_STEPS]
+        value = fixed[:, None] * tint // 255 + self.dither[frame_index % len(self.dither)][:, None]
+        return np.minimum(value >> 8, 255).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_luts(num_pixels, mapping, beta, easing, hold_frames, cubic, exp_b, gamma, floor, dithering):
+    return LedLuts(num_pixels, mapping, beta, easing, hold_frames, cubic, exp_b, gamma, floor, dithering)
+
+
+def get_led_luts(config, num_pixels):
+    """Tables for the LED settings in config (an AppConfig); built once per distinct parameter set."""
+    return _cached_luts(num_pixels, config.led_mapping, float(config.led_mapping_beta), config.led_easing,
+                        int(config.led_easing_hold_frames), tuple(config.led_easing_cubic),
+                        float(config.led_easing_exp_b), float(config.led_gamma), int(config.led_floor),
+                        bool(config.led_dithering))
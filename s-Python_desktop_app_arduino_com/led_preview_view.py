@@ -0,0 +1,70 @@
+# led_preview_view.py
+"""
+LedPreviewView (LedRingPreviewWidget):
+ - A virtual NeoPixel ring showing what the device shows: the frames written through
+   SerialCom (as the firmware renders them), or the ring of an in-process firmware
+   emulator. Lets the output be checked on a laptop without hardware.
+ - frame_source() -> (version, pixels) is polled at display rate; pixels is NUM_PIXELS
+   (r, g, b) or None for a dark ring (off, or nothing sent yet).
+Design rationale:
+ - Polling (instead of a signal per frame) keeps the serial writer and the emulator free
+   of Qt, and caps repaints at the display rate however fast frames are sent.
+ - A repaint is only requested when the version changes: one repaint per new frame,
+   none while the ring is steady. Disc geometry is cached by painter_view.LedRingPainter.
+"""
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QColor, QPen
+from PySide6.QtCore import Qt, QRectF, QTimer
+
+from painter_view import LedRingPainter, PLOT_BG_COLOR, TEXT_COLOR, MARGIN
+from serial_com import NUM_PIXELS
+
+PREVIEW_HEIGHT = 120
+REFRESH_INTERVAL_MS = 16           # ~60 FPS
+
+
+class LedRingPreviewWidget(QWidget):
+    def __init__(self, frame_source, parent=None):
+        super().__init__(parent)
+        self.frame_source = frame_source
+        self.setMinimumHeight(PREVIEW_HEIGHT)
+        self._ring = LedRingPainter(NUM_PIXELS)
+        self._background = QColor(PLOT_BG_COLOR)
+        self._text_pen = QPen(QColor(TEXT_COLOR))
+        self._version = None
+        self._pixels = None
+        self._caption = ""
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self._on_refresh)
+        self._refresh_timer.start()
+
+    def set_caption(self, text):
+        self._caption = text
+        self.update()
+
+    def _on_refresh(self):
+        if not self.isVisible():
+            return
+        try:
+            version, pixels = self.frame_source()
+        except Exception as e:
+            print("LedRingPreviewWidget: frame source failed:", e)
+            return
+        if version != self._version:
+            self._version = version
+            self._pixels = pixels
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), self._background)
+        area = QRectF(self.rect()).adjusted(MARGIN, MARGIN, -MARGIN, -MARGIN)
+        if area.width() > 0 and area.height() > 0:
+            self._ring.paint(painter, area, self._pixels)
+            if self._caption:
+                painter.setPen(self._text_pen)
+                painter.drawText(area, Qt.AlignLeft | Qt.AlignTop, self._caption)
+        painter.end()
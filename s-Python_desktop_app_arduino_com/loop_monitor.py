@@ -0,0 +1,132 @@
+# loop_monitor.py
+"""
+Event-loop lag and stall monitor for the merged Qt + asyncio (qasync) loop.
+Responsibility:
+ - Heartbeat task: sleeps a fixed interval and measures how late it actually woke up
+   (scheduled vs actual wakeup); the lag goes into a histogram.
+ - Watchdog thread: notices when the heartbeat stops beating for longer than a threshold
+   and captures the stack of the loop thread at that moment, i.e. the callback that is
+   blocking (a slow canvas.draw(), a blocking serial write, ...).
+Design rationale:
+ - Qt painting and asyncio share one thread, so any blocking call delays every coroutine
+   on the audio path; lag measured from inside the loop shows how much.
+ - A stalled loop cannot report on itself, so the stack is taken from another thread
+   via sys._current_frames(), which is cheap and needs no tracing hooks.
+ - One stack per stall (not per watchdog check) keeps the log readable.
+"""
+import sys
+import time
+import asyncio
+import threading
+import traceback
+import collections
+
+from metrics import MetricsRegistry
+
+HEARTBEAT_INTERVAL_S = 0.05
+STALL_THRESHOLD_S = 0.25
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+LAG_HISTORY = 2048   # recent lag samples kept for the summary percentiles
+MAX_STALL_REPORTS = 32
+
+
+class LoopMonitor:
+    def __init__(self, interval_s=HEARTBEAT_INTERVAL_S, stall_threshold_s=STALL_THRESHOLD_S,
+                 metrics: MetricsRegistry = None):
+        self.interval_s = interval_s
+        self.stall_threshold_s = stall_threshold_s
+
+        metrics = metrics or MetricsRegistry()
+        self._lag_seconds = metrics.histogram("event_loop_lag_seconds",
+                                              "Heartbeat wakeup delay of the event loop", LAG_BUCKETS)
+        self._stalls_total = metrics.counter("event_loop_stalls_total",
+                                             "Times the event loop was blocked beyond the stall threshold")
+        self._max_lag = metrics.gauge("event_loop_max_lag_seconds", "Largest heartbeat lag seen")
+
+        self._recent_lags = collections.deque(maxlen=LAG_HISTORY)
+        # (time, blocked_for_s, formatted stack) per stall
+        self.stalls = collections.deque(maxlen=MAX_STALL_REPORTS)
+
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._watchdog_thread = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------
+    # Lifecycle
+    # ------------------------------
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self._heartbeat_task and not self._heartbeat_task.done():
+            return
+        self._stop_event.clear()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = loop.create_task(self._heartbeat(), name="loop-monitor-heartbeat")
+        self._watchdog_thread = threading.Thread(target=self._watchdog, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog_thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._watchdog_thread:
+            self._watchdog_thread.join(timeout=1.0)
+            self._watchdog_thread = None
+
+    # ------------------------------
+    # Heartbeat (runs on the loop)
+    # ------------------------------
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        try:
+            while True:
+                scheduled = loop.time() + self.interval_s
+                self._last_beat = time.monotonic()
+                await asyncio.sleep(self.interval_s)
+                lag = max(0.0, loop.time() - scheduled)
+                self._lag_seconds.observe(lag)
+                self._recent_lags.append(lag)
+                if lag > self._max_lag.value:
+                    self._max_lag.set(lag)
+        except asyncio.CancelledError:
+            return
+
+    # ------------------------------
+    # Watchdog (separate thread)
+    # ------------------------------
+    def _watchdog(self):
+        check_interval = self.stall_threshold_s / 4.0
+        reported_beat = None
+        while not self._stop_event.wait(check_interval):
+            beat = self._last_beat
+            blocked_for = time.monotonic() - beat - self.interval_s
+            if blocked_for < self.stall_threshold_s or beat == reported_beat:
+                continue
+            # first check that sees this stall: grab the loop thread's stack while it is stuck
+            reported_beat = beat
+            self._report_stall(blocked_for)
+
+    def _report_stall(self, blocked_for):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "<loop thread not found>\n"
+        self._stalls_total.inc()
+        self.stalls.append((time.time(), blocked_for, stack))
+        print(f"LoopMonitor: event loop blocked for >{blocked_for * 1000.0:.0f} ms, loop thread stack:\n{stack}",
+              file=sys.stderr)
+
+    # ------------------------------
+    # Reporting
+    # ------------------------------
+    def summary(self):
+        lags = sorted(self._recent_lags)
+        if not lags:
+            return "LoopMonitor: no heartbeats recorded"
+
+        def percentile(p):
+            return lags[min(len(lags) - 1, int(len(lags) * p / 100.0))] * 1000.0
+
+        return (f"LoopMonitor: lag p50={percentile(50):.2f} ms p95={percentile(95):.2f} ms "
+                f"p99={percentile(99):.2f} ms max={self._max_lag.value * 1000.0:.2f} ms, "
+                f"stalls={int(self._stalls_total.value)}")
@@ -9,19 +9,28 @@ from qasync import QApplication as QAsyncApplication, run
 from PySide6.QtCore import QCoreApplication
 
 from app_controller import AppController
+from loop_monitor import LoopMonitor
 
 # A cancelable Future used to keep the asyncio loop alive until the Qt app quits.
 _future_keep_alive = None
 
-async def _wait_for_app_exit():
+async def _wait_for_app_exit(controller: AppController, loop_monitor: LoopMonitor):
     """Hold the running asyncio loop until the Future is cancelled on shutdown."""
     global _future_keep_alive
-    _future_keep_alive = asyncio.get_running_loop().create_future()
+    loop = asyncio.get_running_loop()
+    _future_keep_alive = loop.create_future()
+    # Task CPU accounting + `kill -USR1 <pid>` profiler toggle (before any task is created)
+    controller.model.attach_event_loop(loop)
+    # Watch the merged Qt + asyncio loop for lag and stalls while the app runs
+    loop_monitor.start(loop)
     try:
         await _future_keep_alive
     except asyncio.CancelledError:
         # expected on shutdown
         pass
+    finally:
+        loop_monitor.stop()
+        print(loop_monitor.summary())
 
 def _shutdown_async_loop():
     """Synchronous callback: cancel the keep-alive future so asyncio tasks can exit."""
@@ -39,11 +48,12 @@ def main():
     # Instantiate controller (which constructs model + view)
     controller = AppController()
     controller.show()
+    loop_monitor = LoopMonitor(metrics=controller.model.metrics)
 
     print("Starting qasync (merged Qt + asyncio) event loops...")
     try:
         # Run until the keep-alive finishes (cancelled on Qt exit)
-        run(_wait_for_app_exit())
+        run(_wait_for_app_exit(controller, loop_monitor))
     except Exception as e:
         print("Unhandled exception in application:", e)
     finally:
@@ -0,0 +1,326 @@
+# metrics.py
+"""
+In-process runtime metrics: counters, gauges and histograms.
+Responsibility:
+ - Hold named metrics that the model, the clients and the controller update on their hot paths.
+ - Render them in the Prometheus text exposition format.
+ - Export them through a tiny local HTTP endpoint (GET /metrics on 127.0.0.1) and,
+   optionally, through a rolling text file.
+Design rationale:
+ - No external services or client libraries: http.server and a daemon thread are enough
+   for a single scraper or `curl localhost:9108/metrics`.
+ - Updates are a lock and an add; all formatting happens when the endpoint is scraped.
+ - Gauges can be backed by a callback (e.g. queue.qsize) so values that already exist
+   somewhere are read at scrape time instead of being mirrored on every change.
+ - Components take an optional registry; without one they get a private registry, so the
+   update calls need no "if metrics" branches.
+ - Optional constant labels (e.g. device="/dev/ttyACM0") give one series per instance of a
+   component; series of the same name share one HELP/TYPE header.
+"""
+import os
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+METRICS_PATH = "/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Prometheus client default buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+FILE_WRITE_INTERVAL_S = 10.0
+FILE_MAX_BYTES = 1024 * 1024
+FILE_BACKUP_COUNT = 3
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    return repr(float(value))
+
+
+def _series_name(name, labels, extra=None):
+    pairs = list(labels.items()) + list((extra or {}).items())
+    if not pairs:
+        return name
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return name + "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+# ------------------------------
+# Metric types
+# ------------------------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def samples(self):
+        return [(_series_name(self.name, self.labels), self._value)]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback=None, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self._value = 0.0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self._value = float(value)
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+    def set_callback(self, callback):
+        """Reads the value from callback() at scrape time instead of from set()."""
+        self._callback = callback
+
+    @property
+    def value(self):
+        if self._callback is not None:
+            try:
+                return float(self._callback())
+            except Exception:
+                return float("nan")
+        return self._value
+
+    def samples(self):
+        return [(_series_name(self.name, self.labels), self.value)]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.buckets = tuple(sorted(buckets))
+        # one slot per bucket plus the +Inf overflow; cumulated when rendered
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self):
+        """Context manager that observes the elapsed seconds of its block."""
+        return _HistogramTimer(self)
+
+    @property
+    def count(self):
+        return self._count
+
+    def samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        result = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            result.append((_series_name(f"{self.name}_bucket", self.labels, {"le": _format_value(bound)}), cumulative))
+        result.append((_series_name(f"{self.name}_sum", self.labels), total))
+        result.append((_series_name(f"{self.name}_count", self.labels), count))
+        return result
+
+
+class _HistogramTimer:
+    def __init__(self, histogram):
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+# ------------------------------
+# Registry
+# ------------------------------
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, labels, *args, **kwargs):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            existing = self._metrics.get(key)
+            if existing is not None:
+                if not isinstance(existing, metric_class):
+                    raise ValueError(f"metric {name} already registered as {existing.kind}")
+                return existing
+            metric = metric_class(name, *args, labels=labels, **kwargs)
+            self._metrics[key] = metric
+            return metric
+
+    def counter(self, name, help_text="", labels=None):
+        return self._register(Counter, name, labels, help_text)
+
+    def gauge(self, name, help_text="", callback=None, labels=None):
+        return self._register(Gauge, name, labels, help_text, callback)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS, labels=None):
+        return self._register(Histogram, name, labels, help_text, buckets)
+
+    def render(self):
+        """Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        # series of one name must be consecutive, under a single header
+        metrics.sort(key=lambda metric: metric.name)
+        previous_name = None
+        for metric in metrics:
+            if metric.name != previous_name:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                previous_name = metric.name
+            for sample_name, value in metric.samples():
+                lines.append(f"{sample_name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# ------------------------------
+# Exporters
+# ------------------------------
+class MetricsServer:
+    """Serves registry.render() on GET /metrics from a daemon thread."""
+
+    def __init__(self, registry, host=METRICS_HOST, port=METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        if self._server:
+            return True
+        registry = self.registry
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != METRICS_PATH:
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # keep scrapes out of the console
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        except OSError as e:
+            print("MetricsServer: could not bind", f"{self.host}:{self.port}", e)
+            self._server = None
+            return False
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        print(f"MetricsServer: serving http://{self.host}:{self.port}{METRICS_PATH}")
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+
+class MetricsFileWriter:
+    """Appends a timestamped snapshot every interval; rotates path -> path.1 ... by size."""
+
+    def __init__(self, registry, path, interval_s=FILE_WRITE_INTERVAL_S,
+                 max_bytes=FILE_MAX_BYTES, backup_count=FILE_BACKUP_COUNT):
+        self.registry = registry
+        self.path = path
+        self.interval_s = interval_s
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._worker, name="metrics-file", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+            # final snapshot so the file covers the whole session
+            self.write_snapshot()
+
+    def _worker(self):
+        while not self._stop_event.wait(self.interval_s):
+            self.write_snapshot()
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def write_snapshot(self):
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"# snapshot {time.strftime('%Y-%m-%dT%H:%M:%S%z')}\n")
+                f.write(self.registry.render())
+        except OSError as e:
+            print("MetricsFileWriter: write failed:", e)
@@ -4,16 +4,33 @@ AppModel: central, thin state holder & coordinator.
  - Owns high-level state and instances of WebSocketClient and SerialCom.
  - Exposes synchronous methods the Controller can call safely (they schedule async tasks).
  - Provides a thread-safe method to get the latest websocket package (a single atomic tuple).
+ - Lists the serial ports (as the combo box model), kept current by a background port scan;
+   reconnects to the last used Arduino by USB identity when it is re-plugged.
  - Emits Qt signals for UI events.
 Design choices explained inline.
 """
 import os
+import base64
 import numpy as np
-from PySide6.QtCore import QAbstractListModel, Qt, Signal, QTimer
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, Signal, QTimer
+import time
 import asyncio
+import bisect
+from collections import deque
 
 from websocket_client import WebSocketClient
-from serial_com import SerialCom
+from serial_com import SerialCom, DEVICE_EVENT_POWER, DEVICE_EVENT_VERSION, DEFAULT_MAX_FRAME_RATE_HZ, NUM_PIXELS
+from serial_group import SerialDeviceGroup, SERIAL_DEVICES_FILE
+from port_discovery import PortDiscovery, PortInfo, PORT_SCAN_INTERVAL_S
+from led_animation import LedAnimationEngine, ENVELOPE_FULL_SCALE
+from led_lut import get_led_luts
+from spectral_analyzer import SpectralAnalyzer
+from signal_history import SignalHistory
+from config import load_config
+from latency_trace import (LatencyTracer, STAGE_QUEUE_DRAIN, AUDIO_PIPELINE_STAGES, STAGE_SPECTRUM,
+                           STAGE_ENGINE_TICK)
+from metrics import MetricsRegistry, MetricsServer, MetricsFileWriter, METRICS_PORT
+from profiler import SamplingProfiler, TaskCpuAccounting
 
 # TODO: Adding Furhat
 from furhat_client import FurhatClient
@@ -25,28 +42,83 @@ except Exception:
 
 WEB_SOCKET_SERVER_URL = "ws://127.0.0.1:8765"
 SERIAL_BAUDRATE = 9600
-DEFAULT_COMBO_OPTIONS = [f"Item {i}" for i in range(1, 11)]
+SERIAL_TARGET_BAUDRATE = 115200  # negotiated after connecting; old firmware simply stays at 9600
+METRICS_HTTP_PORT = METRICS_PORT
+METRICS_FILE_PATH = None  # e.g. "metrics.prom" to also keep a rolling text file
+NO_PORT_OPTION = ""  # first combo row: no serial port selected
+FURHAT_AUDIO_SAMPLE_RATE = 16000  # requested in FurhatClient (request_audio_start)
+FURHAT_AUDIO_CHANNELS = 2         # 16-bit little-endian interleaved L/R (see furhat_script.py)
+POLL_HISTORY_RATE_HZ = 20.0       # controller poll rate (PLOT_UPDATE_INTERVAL_MS), history rate without the engine
+IDENTITY_RETRY_MAX_BACKOFF_S = 30.0  # longest wait between reopen attempts of a listed but busy Arduino
 
 class AppModel(QAbstractListModel):
     # Signals for view/controller
     input_text_commited = Signal()
     input_text_cleared = Signal()
     async_task_completed = Signal(str)
+    serial_port_lost = Signal(str)       # the connected Arduino was unplugged
+    serial_port_restored = Signal(str)   # ... and came back (possibly under a new path)
+    device_power_changed = Signal(bool)  # ring switched on / off with its button
+    device_version_received = Signal(str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        # UI dropdown options (simple list model)
-        self._dropdown_options = DEFAULT_COMBO_OPTIONS
+        # UI dropdown options: "" followed by the serial ports, sorted by path
+        self._dropdown_options = [NO_PORT_OPTION]
 
         # Input text state
         self._live_input_text = ""
         self._committed_input_text = "N/A"
 
+        # Runtime metrics shared by the model, the clients and the controller
+        self.metrics = MetricsRegistry()
+        self._metrics_server = MetricsServer(self.metrics, port=METRICS_HTTP_PORT)
+        self._metrics_server.start()
+        self._metrics_file = None
+        if METRICS_FILE_PATH:
+            self._metrics_file = MetricsFileWriter(self.metrics, METRICS_FILE_PATH)
+            self._metrics_file.start()
+
         # Serial and WS clients (separate classes)
-        self.serial = SerialCom(baudrate=SERIAL_BAUDRATE)
+        # Installation settings (app_config.json) and the LED tables they select
+        self.config = load_config()
+        self.led_luts = get_led_luts(self.config, NUM_PIXELS)
+
+        max_frame_rate_hz = DEFAULT_MAX_FRAME_RATE_HZ
+        if self.config.led_animation_enabled:
+            max_frame_rate_hz = self.config.led_animation_rate_hz
+        # Latency trace points from Furhat audio chunk to the LED frame bytes (the animation engine path)
+        self.audio_latency_tracer = LatencyTracer(AUDIO_PIPELINE_STAGES)
+        self.serial = SerialCom(baudrate=SERIAL_BAUDRATE, metrics=self.metrics, max_frame_rate_hz=max_frame_rate_hz,
+                                latency_tracer=self.audio_latency_tracer)
+        self.serial.add_device_listener(self._on_serial_device_event)
+        # Multi-ring installations: extra devices listed in serial_devices.json, each with its own writer
+        self.serial_group = SerialDeviceGroup(self.metrics, self.led_luts)
+        if self.serial_group.load_config(SERIAL_DEVICES_FILE):
+            self.serial_group.open_all()
+
+        # Serial port discovery; the first scan fills the combo box, later ones run in the background
+        self.port_discovery = PortDiscovery()
+        self._serial_port = None
+        self._serial_identity = None   # USB identity of the port the user picked, kept while it is unplugged
+        self._identity_retry_at = 0.0  # monotonic time of the next reopen attempt by identity
+        self._identity_retry_backoff_s = PORT_SCAN_INTERVAL_S
+        self._ports_updating = False
+        self._apply_port_diff(*self.port_discovery.scan())
+        # Optional in-process firmware emulator (tuning without hardware); its pty is listed like a port
+        self.emulator = None
+        if self.config.serial_emulator:
+            self._start_emulator()
+        # Latency trace points from websocket arrival to the LED byte
+        self.latency_tracer = LatencyTracer()
         # internal asyncio queue for websocket -> model communication
         self._ws_queue = asyncio.Queue()
-        self.ws_client = WebSocketClient(WEB_SOCKET_SERVER_URL, self._ws_queue)
+        self.ws_client = WebSocketClient(WEB_SOCKET_SERVER_URL, self._ws_queue, self.latency_tracer, self.metrics)
+        self.metrics.gauge("ws_queue_depth", "Frames waiting in the websocket queue", self._ws_queue.qsize)
+        self._frames_superseded = self.metrics.counter(
+            "ws_frames_superseded_total", "Queued frames skipped because a newer one was waiting")
+        self._furhat_audio_chunks = self.metrics.counter(
+            "furhat_audio_chunks_total", "Audio chunks received from the Furhat stream")
 
         # TODO: Adding Furhat API
         self.furhat_client = FurhatClient("127.0.0.1","")
@@ -55,6 +127,14 @@ class AppModel(QAbstractListModel):
         # The "latest frame" - atomic access via asyncio tasks (controller polls this synchronously)
         # We keep a simple Python attribute protected by minimal invariants (single-writer in model)
         self._latest_ws_package = (0, 0)
+        # Normalized (left, right) RMS of the latest Furhat audio chunk; feeds the device group while streaming
+        self._stream_channel_levels = (0.0, 0.0)
+        # Trace of the latest package; handed to the controller once (see take_latest_trace)
+        self._latest_trace = None
+        # Trace of the latest Furhat chunk, taken once by the engine thread (deque append/popleft are atomic);
+        # _tick_trace carries it from the tick's band read to the frame it renders
+        self._latest_audio_trace = deque(maxlen=1)
+        self._tick_trace = None
 
         # Timer used by the Controller/View for regular UI refresh (polling style)
         self.data_for_draw_calls_updated = QTimer()
@@ -66,10 +146,30 @@ class AppModel(QAbstractListModel):
         # Keep references to scheduled tasks (so controller or model can cancel)
         self._worker_tasks = []
 
+        # Spectrum of the Furhat audio stream: one band per ring pixel
+        self.spectrum = SpectralAnalyzer(FURHAT_AUDIO_SAMPLE_RATE, FURHAT_AUDIO_CHANNELS, self.metrics)
+
+        # Signal chain history for the history plot; one row per animation tick (or poll tick without the engine)
+        history_rate_hz = self.config.led_animation_rate_hz if self.config.led_animation_enabled else POLL_HISTORY_RATE_HZ
+        self.signal_history = SignalHistory(history_rate_hz)
+
+        # Host-side LED animation: renders from the latest envelope (or spectrum), ships through self.serial
+        self.led_animation = LedAnimationEngine(self.get_envelope, self._ship_led_frame, self.config, self.metrics,
+                                                band_source=self._engine_band_levels, history=self.signal_history)
+
+        # Sampling profiler, off until toggled from the UI or SIGUSR1
+        self.task_accounting = TaskCpuAccounting()
+        self.profiler = SamplingProfiler(task_accounting=self.task_accounting)
+
     # List model support (for combo box if needed)
     def data(self, index, role=Qt.DisplayRole):
-        if 0 <= index.row() < self.rowCount() and role == Qt.DisplayRole:
-            return self._dropdown_options[index.row()]
+        if 0 <= index.row() < self.rowCount():
+            option = self._dropdown_options[index.row()]
+            if role == Qt.DisplayRole:
+                return option
+            if role == Qt.ToolTipRole:
+                info = self.port_discovery.get(option)
+                return info.label() if info else None
         return None
 
     def rowCount(self, parent=None):
@@ -98,7 +198,7 @@ class AppModel(QAbstractListModel):
             return 44100, np.array([0], dtype=np.int16)
         try:
             absolute_file_path = os.path.join(os.path.dirname(__file__), file_path)
-            fs, samples = wavfile.read(absolute_file_path)
+            fs, samples = wavfile.read(absolute_file_path, mmap=True)
             if samples.ndim > 1:
                 samples = samples[:, 0]
             self._sample_rate = fs
@@ -123,19 +223,19 @@ class AppModel(QAbstractListModel):
 
         """""
         if self.ws_client.is_connected:
-            loop.create_task(self.ws_client.disconnect())
+            loop.create_task(self.ws_client.disconnect(), name="ws-disconnect")
             return "WS disconnect scheduled"
         else:
-            loop.create_task(self.ws_client.connect())
+            loop.create_task(self.ws_client.connect(), name="ws-connect")
             return "WS connect scheduled"
         """""
 
         # TODO: Adding Furhat connection
         if self.furhat_client.is_connected:
-            loop.create_task(self.furhat_client.disconnect())
+            loop.create_task(self.furhat_client.disconnect(), name="furhat-disconnect")
             return "Furhat disconnect scheduled"
         else:
-            loop.create_task(self.furhat_client.connect())
+            loop.create_task(self.furhat_client.connect(), name="furhat-connect")
             return "Furhat connect scheduled"
 
     def schedule_ws_data_toggle(self):
@@ -164,7 +264,7 @@ class AppModel(QAbstractListModel):
             # start fetching tasks inside client; client will populate the _ws_queue
             self.ws_client.start_fetching(loop)
             # schedule a local coroutine that consumes the queue and updates latest package
-            t = loop.create_task(self._drain_ws_queue_update_latest())
+            t = loop.create_task(self._drain_ws_queue_update_latest(), name="ws-drain")
             self._worker_tasks.append(t)
             return True
         """
@@ -179,10 +279,12 @@ class AppModel(QAbstractListModel):
                 while True:
                     try:
                         latest = self._ws_queue.get_nowait()
+                        self._frames_superseded.inc()
                     except asyncio.QueueEmpty:
                         break
                 # update the single shared package — controller will read it synchronously
-                self._latest_ws_package = latest
+                self._latest_ws_package, self._latest_trace = latest
+                self.latency_tracer.mark(self._latest_trace, STAGE_QUEUE_DRAIN)
                 # yield briefly
                 await asyncio.sleep(0)
         except asyncio.CancelledError:
@@ -193,28 +295,296 @@ class AppModel(QAbstractListModel):
         """Synchronous read of the latest package (very cheap, single tuple read)."""
         return self._latest_ws_package
 
+    def get_envelope(self):
+        """Latest package as normalized (left, right) levels 0..1; safe from any thread."""
+        left, right = self._latest_ws_package
+        return min(abs(left) / ENVELOPE_FULL_SCALE, 1.0), min(abs(right) / ENVELOPE_FULL_SCALE, 1.0)
+
+    def get_band_levels(self):
+        """Latest spectral band levels (NUM_PIXELS, 0..1) while audio is streaming, else None; any thread."""
+        return self.spectrum.latest_levels()
+
+    def add_spectrogram_listener(self, listener):
+        """listener(columns) gets every analysed block as 8-bit spectrogram rows (on the event loop)."""
+        self.spectrum.add_column_listener(listener)
+
+    def take_latest_trace(self):
+        """Returns the latency trace of the latest package once; None if already taken."""
+        trace, self._latest_trace = self._latest_trace, None
+        return trace
+
+    def _engine_band_levels(self):
+        # engine thread: take the chunk trace before reading the levels, so they include that chunk
+        try:
+            self._tick_trace = self._latest_audio_trace.popleft()
+        except IndexError:
+            self._tick_trace = None
+        return self.get_band_levels()
+
+    def get_latency_report(self):
+        return (f"{self.latency_tracer.format_report()}\n"
+                f"{self.audio_latency_tracer.format_report('Furhat stream latency')}")
+
     async def audio_stream_handler(self,data):
         base64_audio_data = data.get('speaker')
+        self._furhat_audio_chunks.inc()
     
-        # NEW: Print the raw base64 data fragment
-        print(f"Getting raw (first 30 chars): {base64_audio_data[:30]}...")
+        if not base64_audio_data:
+            return
+        trace = self.audio_latency_tracer.start()
+        try:
+            raw = base64.b64decode(base64_audio_data)
+        except ValueError as e:
+            print("Model: undecodable audio chunk:", e)
+            return
+        # a 100 ms chunk is a few blocks: cheap enough to analyse right here on the loop
+        self.spectrum.process_bytes(raw[:len(raw) - len(raw) % 2])
+        self.audio_latency_tracer.mark(trace, STAGE_SPECTRUM)
+        if trace is not None:
+            # a newer chunk replaces one the engine has not picked up yet
+            self._latest_audio_trace.append(trace)
+        frame_bytes = 2 * FURHAT_AUDIO_CHANNELS
+        samples = np.frombuffer(raw[:len(raw) - len(raw) % frame_bytes], dtype="<i2")
+        if len(samples):
+            rms = np.sqrt(np.mean(np.square(samples.reshape(-1, FURHAT_AUDIO_CHANNELS), dtype=np.float32), axis=0))
+            levels = np.minimum(rms / ENVELOPE_FULL_SCALE, 1.0)
+            self._stream_channel_levels = (float(levels[0]), float(levels[-1]))
      
 
+    # ------------------------------
+    # Profiling
+    # ------------------------------
+    def attach_event_loop(self, loop: asyncio.AbstractEventLoop):
+        """Called once the qasync loop runs: the SIGUSR1 profiler toggle and the port scan."""
+        self.profiler.install_signal_toggle(loop)
+        self._worker_tasks.append(loop.create_task(self._watch_serial_ports(), name="port-watch"))
+        if self.config.led_animation_enabled:
+            self.led_animation.start()
+
+    def toggle_profiler(self):
+        """Start/stop sampling. Returns a status message for the view."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        path = self.profiler.toggle(loop)
+        if self.profiler.is_running:
+            return "Profiling..."
+        return f"Profile written to {path}"
+
     # ------------------------------
     # Serial surface
     # ------------------------------
     def get_available_ports(self):
-        return self.serial.list_ports()
+        return [info.device for info in self.port_discovery.ports]
+
+    @property
+    def ports_updating(self):
+        """True while the port list is being changed by a scan (combo index changes are not user picks)."""
+        return self._ports_updating
 
     def connect_serial(self, port_name):
-        return self.serial.connect(port_name)
+        connected = self._open_serial(port_name)
+        info = self.port_discovery.get(port_name)
+        # only a port that opened is followed across re-plugs
+        self._serial_identity = info.usb_identity if connected and info else None
+        return connected
+
+    def _open_serial(self, port_name):
+        if self.serial_group.owns_port(port_name):
+            # a group writer already has this port open; a second handle would mix frames on the wire
+            print("Model: serial port", port_name, "belongs to the device group")
+            self._serial_port = None
+            return False
+        connected = self.serial.connect(port_name)
+        self._serial_port = port_name if connected else None
+        if not connected:
+            return False
+        self._identity_retry_at = 0.0
+        self._identity_retry_backoff_s = PORT_SCAN_INTERVAL_S
+        if SERIAL_TARGET_BAUDRATE != SERIAL_BAUDRATE:
+            # negotiation waits for the device's answer (and its boot after the port opens): off the UI thread
+            try:
+                loop = asyncio.get_running_loop()
+                loop.run_in_executor(None, self.serial.negotiate_baudrate, SERIAL_TARGET_BAUDRATE)
+            except RuntimeError:
+                pass
+        return True
 
     def disconnect_serial(self):
         self.serial.disconnect()
+        self._serial_port = None
+        self._serial_identity = None
+
+    def _on_serial_device_event(self, event, value):
+        # serial reader thread: the signals are delivered queued to the GUI thread
+        if event == DEVICE_EVENT_POWER:
+            self.device_power_changed.emit(value)
+        elif event == DEVICE_EVENT_VERSION:
+            self.device_version_received.emit(value)
+
+    def get_serial_frame_rtt_ms(self):
+        """Round trip of the last acknowledged LED frame, None until the firmware acknowledges frames."""
+        rtt = self.serial.last_rtt_s
+        return None if rtt is None else rtt * 1000.0
+
+    async def _watch_serial_ports(self):
+        """Rescans the ports in an executor and applies the diff here, on the loop (GUI) thread."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await asyncio.sleep(PORT_SCAN_INTERVAL_S)
+                added, removed = await loop.run_in_executor(None, self.port_discovery.scan)
+                if added or removed:
+                    self._apply_port_diff(added, removed)
+                else:
+                    # a re-plugged port that failed to open (udev permissions, ModemManager probing,
+                    # another program holding it) does not show up in the diff again: keep retrying
+                    # it, backing off while it stays busy
+                    self._reconnect_by_identity()
+        except asyncio.CancelledError:
+            return
+
+    def _apply_port_diff(self, added, removed):
+        """Updates the list model row by row, then handles the connected device leaving or returning."""
+        lost_port = None
+        self._ports_updating = True
+        try:
+            for info in removed:
+                if info.device == self._serial_port:
+                    # keep _serial_identity: this is what we wait for
+                    self.serial.disconnect()
+                    self._serial_port = None
+                    lost_port = info.device
+                if info.device in self._dropdown_options:
+                    row = self._dropdown_options.index(info.device)
+                    self.beginRemoveRows(QModelIndex(), row, row)
+                    del self._dropdown_options[row]
+                    self.endRemoveRows()
+            if added:
+                # a port that just appeared is worth an immediate attempt
+                self._identity_retry_at = 0.0
+                self._identity_retry_backoff_s = PORT_SCAN_INTERVAL_S
+            for info in added:
+                if self.serial_group.owns_port(info.device):
+                    continue
+                # row 0 stays the "no port" option
+                row = bisect.bisect_left(self._dropdown_options, info.device, 1)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._dropdown_options.insert(row, info.device)
+                self.endInsertRows()
+        finally:
+            self._ports_updating = False
+
+        if lost_port is not None:
+            self.serial_port_lost.emit(lost_port)
+        self._reconnect_by_identity()
+
+    def _reconnect_by_identity(self):
+        """Reopens the Arduino the user picked if it is listed again (under any path) but not connected."""
+        if self._serial_port is not None or self._serial_identity is None:
+            return
+        now = time.monotonic()
+        if now < self._identity_retry_at:
+            return
+        match = self.port_discovery.find_by_identity(self._serial_identity)
+        if match is None:
+            return
+        if self._open_serial(match.device):
+            self.serial_port_restored.emit(match.device)
+        else:
+            self._identity_retry_at = now + self._identity_retry_backoff_s
+            self._identity_retry_backoff_s = min(2 * self._identity_retry_backoff_s, IDENTITY_RETRY_MAX_BACKOFF_S)
+
+    def _start_emulator(self):
+        try:
+            from firmware_emulator import NeoPixelFirmwareEmulator
+            self.emulator = NeoPixelFirmwareEmulator()
+        except Exception as e:
+            # pty based: not available on Windows
+            print("Model: firmware emulator unavailable:", e)
+            return
+        self.emulator.start()
+        self._apply_port_diff([PortInfo(self.emulator.port_name, description="Firmware emulator")], [])
+
+    def get_led_preview(self):
+        """
+        (version, pixels) for the ring preview: the emulator's ring while connected to it,
+        otherwise the last frame written through SerialCom as the firmware shows it.
+        """
+        if self.emulator is not None and self._serial_port == self.emulator.port_name:
+            return self.emulator.ring_frame()
+        return self.serial.last_sent_ring()
+
+    def led_preview_source(self):
+        if self.emulator is not None and self._serial_port == self.emulator.port_name:
+            return "emulator"
+        return "serial" if self._serial_port else "no port"
 
     def send_serial_data(self, data):
         return self.serial.send(data)
 
+    @property
+    def led_animation_running(self):
+        return self.led_animation.is_running
+
+    def _ship_led_frame(self, rgb, force=False):
+        # animation thread; nothing to do (and nothing to complain about) without a port
+        trace, self._tick_trace = self._tick_trace, None
+        self.audio_latency_tracer.mark(trace, STAGE_ENGINE_TICK)
+        if self.serial.is_connected():
+            self.serial.send_frame(rgb_pixels=rgb, force=force, trace=trace)
+        else:
+            # still worth the spectrum and engine stages
+            self.audio_latency_tracer.finish(trace)
+        # the extra rings follow the same tick
+        self.publish_group_frame(rgb)
+
+    def map_led_brightness(self, normalized):
+        """Normalized amplitude -> brightness byte through the configured mapping and gamma tables."""
+        return self.led_luts.brightness_byte(self.led_luts.map_amplitude(normalized))
+
+    def record_signal_history(self, raw, normalized):
+        """History row from the poll tick, used while the animation engine is off (no hold, no easing)."""
+        self.signal_history.append((raw, normalized, normalized, normalized))
+
+    def map_band_levels(self, levels):
+        """Band levels (0..1) -> per-pixel brightness bytes through the gamma table."""
+        return self.led_luts.brightness_bytes(levels)
+
+    def send_serial_frame(self, brightness=None, pixel_levels=None):
+        """LED frame through the serial byte budget; may be held back (latest wins) until it fits."""
+        return self.serial.send_frame(brightness, pixel_levels)
+
+    def group_channel_levels(self):
+        """Normalized (left, right) input of the device group: the Furhat stream while it runs, else the websocket."""
+        if self.spectrum.is_active:
+            return self._stream_channel_levels
+        return self.get_envelope()
+
+    def _group_pixel_levels(self, rgb=None):
+        # group-wide pixel array that each device slices by its pixel_range
+        bands = self.get_band_levels()
+        if bands is not None:
+            return self.led_luts.brightness_bytes(bands)
+        if rgb is not None:
+            # Rec. 601 luma of the rendered frame
+            return (np.asarray(rgb, dtype=np.uint32) @ np.array([299, 587, 114], dtype=np.uint32)) // 1000
+        return None
+
+    def publish_group_frame(self, rgb=None):
+        """
+        Hands the main ring's input to every device of the group (channel levels, plus the band
+        levels or the rendered frame rgb as a group-wide pixel array); never blocks on a port.
+        """
+        if not len(self.serial_group):
+            return
+        left, right = self.group_channel_levels()
+        self.serial_group.publish(left, right, self._group_pixel_levels(rgb))
+
+    def get_serial_group_health(self):
+        return self.serial_group.health()
+
     # ------------------------------
     # Cleanup helpers (called on app exit)
     # ------------------------------
@@ -244,6 +614,17 @@ class AppModel(QAbstractListModel):
             print("Model.shutdown error:", e)
             
         # close serial
+        self.led_animation.stop()
         self.serial.disconnect()
+        self.serial_group.close_all()
+        if self.emulator is not None:
+            self.emulator.stop()
+        print(self.get_latency_report())
+        if self.profiler.is_running:
+            self.profiler.stop()
+        # stop exporting metrics
+        self._metrics_server.stop()
+        if self._metrics_file:
+            self._metrics_file.stop()
         # emit completion
         self.async_task_completed.emit("shutdown_complete")
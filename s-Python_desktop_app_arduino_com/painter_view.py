@@ -0,0 +1,190 @@
+# painter_view.py
+"""
+PainterView: native QPainter drawing for the plots (no matplotlib).
+ - BarsPainter: one bar per value (normalized intensity, or one per spectral band).
+ - HistoryStripPainter: min/max columns of a SignalHistory (see history_view).
+ - LedRingPainter: num_pixels discs laid out like the NeoPixel ring, filled with a frame's RGB.
+ - PainterIntensityCanvas: the "qpainter" plot backend (see canvas.py); same calls as
+   plot_view.AudioIntensityCanvas, drawing the bars.
+Design rationale:
+ - Painters hold no widget state; they draw into any rect, so the same code serves the
+   canvas, the history plot and the LED ring preview (led_preview_view). Drawing only:
+   nothing here imports the serial side.
+ - Everything that only depends on the rect (ring disc positions) is cached per size.
+ - Setters store the values and call update(); Qt merges requests into one paint.
+"""
+import math
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QPen, QColor, QBrush
+from PySide6.QtCore import Qt, QLineF, QRectF, QPointF
+
+PLOT_BG_COLOR = "#323232"
+GRID_COLOR = "#505050"
+TEXT_COLOR = "#ffffff"
+BAR_COLOR = "#1f77b4"
+RING_OFF_COLOR = "#1a1a1a"
+CANVAS_HEIGHT = 220
+TITLE_HEIGHT = 20
+LABEL_HEIGHT = 16
+MARGIN = 4
+Y_LIMIT = 1.1                       # bars are drawn against 0..1.1, like the matplotlib canvas
+
+
+# ------------------------------
+# Painters
+# ------------------------------
+class BarsPainter:
+    def __init__(self):
+        self._grid_pen = QPen(QColor(GRID_COLOR))
+        self._text_pen = QPen(QColor(TEXT_COLOR))
+        self._bar_brush = QBrush(QColor(BAR_COLOR))
+
+    def paint(self, painter, rect, values, labels=(), bar_width=0.35):
+        """values 0..1; labels are spread evenly under the plot (e.g. ('Low', 'High'))."""
+        plot = QRectF(rect.left(), rect.top(), rect.width(), rect.height() - LABEL_HEIGHT)
+        painter.setPen(self._grid_pen)
+        for fraction in (0.2, 0.4, 0.6, 0.8, 1.0):
+            y = plot.bottom() - plot.height() * fraction / Y_LIMIT
+            painter.drawLine(QLineF(plot.left(), y, plot.right(), y))
+
+        count = len(values)
+        if count:
+            slot = plot.width() / count
+            width = slot * (bar_width if count == 1 else 0.8)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self._bar_brush)
+            for index, value in enumerate(values):
+                height = plot.height() * min(max(float(value), 0.0), 1.0) / Y_LIMIT
+                x = plot.left() + slot * index + (slot - width) / 2.0
+                painter.drawRect(QRectF(x, plot.bottom() - height, width, height))
+
+        if labels:
+            painter.setPen(self._text_pen)
+            slot = rect.width() / len(labels)
+            for index, label in enumerate(labels):
+                painter.drawText(QRectF(rect.left() + slot * index, plot.bottom(), slot, LABEL_HEIGHT),
+                                 Qt.AlignCenter, label)
+
+
+class HistoryStripPainter:
+    SERIES_COLORS = {
+        "raw": "#7f7f7f",
+        "normalized": "#1f77b4",
+        "held": "#ff7f0e",
+        "eased": "#2ca02c",
+    }
+
+    def __init__(self, series):
+        self._pens = {name: QPen(QColor(self.SERIES_COLORS.get(name, TEXT_COLOR))) for name in series}
+        self._grid_pen = QPen(QColor(GRID_COLOR))
+        self._text_pen = QPen(QColor(TEXT_COLOR))
+
+    def paint(self, painter, rect, history, span_s):
+        """One vertical min..max stroke per pixel column and series; newest on the right."""
+        left, top, width, height = rect.left(), rect.top(), int(rect.width()), rect.height()
+        painter.setPen(self._grid_pen)
+        for fraction in (0.0, 0.5, 1.0):
+            y = top + height * (1.0 - fraction)
+            painter.drawLine(QLineF(left, y, left + width, y))
+
+        mins, maxs = history.decimate(width, span_s)
+        x0 = left + width - len(mins)
+        for series, name in enumerate(history.series):
+            low = top + height * (1.0 - mins[:, series].clip(0.0, 1.0))
+            high = top + height * (1.0 - maxs[:, series].clip(0.0, 1.0))
+            painter.setPen(self._pens[name])
+            painter.drawLines([QLineF(x0 + column, low[column] + 0.5, x0 + column, high[column] - 0.5)
+                               for column in range(len(low))])
+
+        painter.setPen(self._text_pen)
+        painter.drawText(QPointF(left + 2, top + 12), f"last {span_s} s")
+        x = left + 60
+        for name in history.series:
+            painter.setPen(self._pens[name])
+            painter.drawText(QPointF(x, top + 12), name)
+            x += 8 * len(name) + 8
+
+
+class LedRingPainter:
+    def __init__(self, num_pixels):
+        self.num_pixels = num_pixels
+        self._geometry_key = None
+        self._discs = []
+        self._off_brush = QBrush(QColor(RING_OFF_COLOR))
+
+    def _geometry(self, rect):
+        """Disc rects for rect, cached until the size or position changes. Pixel 0 at the top, clockwise."""
+        key = (rect.left(), rect.top(), rect.width(), rect.height())
+        if key != self._geometry_key:
+            size = min(rect.width(), rect.height())
+            center = rect.center()
+            disc = size * math.pi / self.num_pixels * 0.8
+            radius = (size - disc) / 2.0
+            self._discs = []
+            for index in range(self.num_pixels):
+                angle = 2.0 * math.pi * index / self.num_pixels
+                x = center.x() + radius * math.sin(angle)
+                y = center.y() - radius * math.cos(angle)
+                self._discs.append(QRectF(x - disc / 2.0, y - disc / 2.0, disc, disc))
+            self._geometry_key = key
+        return self._discs
+
+    def paint(self, painter, rect, rgb=None):
+        """rgb: (num_pixels, 3) 0..255, or None for a dark ring."""
+        painter.setPen(Qt.NoPen)
+        discs = self._geometry(rect)
+        if rgb is None:
+            painter.setBrush(self._off_brush)
+            for disc in discs:
+                painter.drawEllipse(disc)
+            return
+        for disc, (r, g, b) in zip(discs, np.asarray(rgb, dtype=np.uint8).tolist()):
+            painter.setBrush(QColor(r, g, b))
+            painter.drawEllipse(disc)
+
+
+# ------------------------------
+# Canvas backend
+# ------------------------------
+class PainterIntensityCanvas(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(CANVAS_HEIGHT)
+        self._background = QColor(PLOT_BG_COLOR)
+        self._text_pen = QPen(QColor(TEXT_COLOR))
+        self._bars = BarsPainter()
+        self._title = ""
+        self._values = ()
+        self._labels = ()
+        self._bar_width = 0.35
+        self.plot_frame_intensity_normal(0.0)
+
+    def plot_frame_intensity_normal(self, normalized_value: float):
+        self._title = "Real-Time normalized audio intensity"
+        self._values = (max(0.0, min(1.0, float(normalized_value))),)
+        self._labels = ("Normalized",)
+        self._bar_width = 0.35
+        self.update()
+
+    def plot_band_levels(self, levels):
+        self._title = "Real-Time audio spectrum"
+        self._values = np.clip(np.asarray(levels, dtype=np.float32), 0.0, 1.0)
+        self._labels = ("Low", "High")
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), self._background)
+        area = QRectF(self.rect()).adjusted(MARGIN, MARGIN, -MARGIN, -MARGIN)
+        if area.width() <= 0 or area.height() <= TITLE_HEIGHT + LABEL_HEIGHT:
+            painter.end()
+            return
+
+        painter.setPen(self._text_pen)
+        painter.drawText(QRectF(area.left(), area.top(), area.width(), TITLE_HEIGHT), Qt.AlignCenter, self._title)
+        body = QRectF(area.left(), area.top() + TITLE_HEIGHT, area.width(), area.height() - TITLE_HEIGHT)
+
+        self._bars.paint(painter, body, self._values, self._labels, self._bar_width)
+        painter.end()
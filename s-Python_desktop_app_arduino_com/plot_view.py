@@ -2,7 +2,9 @@
 """
 PlotView (AudioIntensityCanvas):
  - Dedicated file for plotting so view.py stays small.
- - Keeps the exact plotting details isolated; Controller just calls plot_frame_intensity_normal(value).
+ - Keeps the exact plotting details isolated; Controller just calls plot_frame_intensity_normal(value),
+   or plot_band_levels(levels) while a spectrum is available (one bar per band).
+ - The "matplotlib" plot backend (see canvas.py); only imported when it is selected.
 """
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
@@ -20,6 +22,7 @@ class AudioIntensityCanvas(QWidget):
         self.layout.setContentsMargins(0,0,0,0)
         self.ax = self.figure.add_subplot(111)
         self.bar_norm = None
+        self.bar_bands = None
         self.init_plot_style_only_normal()
 
     def init_plot_style_only_normal(self):
@@ -31,11 +34,31 @@ class AudioIntensityCanvas(QWidget):
         self.ax.set_ylim(0, 1.1)
         self.ax.grid(axis='y', alpha=0.3, color='gray')
         self.bar_norm = self.ax.bar(0.5, 0, width=0.35)
+        self.bar_bands = None
+        self.figure.tight_layout(pad=1.5)
+
+    def init_plot_style_bands(self, num_bands):
+        self.ax.clear()
+        self.ax.set_facecolor(PLOT_BG_COLOR)
+        self.ax.set_title("Real-Time audio spectrum", color='white')
+        self.ax.set_xticks([0, num_bands - 1])
+        self.ax.set_xticklabels(['Low', 'High'], color='white')
+        self.ax.set_ylim(0, 1.1)
+        self.ax.grid(axis='y', alpha=0.3, color='gray')
+        self.bar_bands = self.ax.bar(range(num_bands), [0] * num_bands, width=0.8)
+        self.bar_norm = None
         self.figure.tight_layout(pad=1.5)
 
     def plot_frame_intensity_normal(self, normalized_value: float):
         if not self.bar_norm:
-            return
+            self.init_plot_style_only_normal()
         clamped = max(0.0, min(1.0, float(normalized_value)))
         self.bar_norm[0].set_height(clamped)
         self.canvas.draw()
+
+    def plot_band_levels(self, levels):
+        if not self.bar_bands or len(self.bar_bands) != len(levels):
+            self.init_plot_style_bands(len(levels))
+        for bar, level in zip(self.bar_bands, levels):
+            bar.set_height(max(0.0, min(1.0, float(level))))
+        self.canvas.draw()
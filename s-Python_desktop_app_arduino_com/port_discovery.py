@@ -0,0 +1,93 @@
+# port_discovery.py
+"""
+Serial port discovery with hot-plug detection.
+Responsibility:
+ - Enumerate serial ports (serial.tools.list_ports.comports) and keep a cache of their
+   USB metadata (VID, PID, serial number, location, description).
+ - Diff each scan against the cache and report which ports appeared and which disappeared.
+ - Identify devices by USB identity rather than by path, so a re-plugged Arduino that
+   comes back as /dev/ttyACM1 instead of /dev/ttyACM0 is still recognised.
+Design rationale:
+ - scan() is plain blocking code (comports() walks sysfs / the registry and can take
+   tens of ms); the model runs it in an executor and applies the diff on the loop thread,
+   so the Qt list model is only touched from the GUI thread.
+ - Identity prefers the USB serial number; boards without one (CH340 clones) fall back
+   to the physical USB location, which is stable as long as the cable goes back in the
+   same socket. Non-USB ports have no identity and are never auto-selected.
+"""
+import serial.tools.list_ports
+
+PORT_SCAN_INTERVAL_S = 1.0
+
+
+class PortInfo:
+    __slots__ = ("device", "vid", "pid", "serial_number", "location", "description")
+
+    def __init__(self, device, vid=None, pid=None, serial_number=None, location=None, description=""):
+        self.device = device
+        self.vid = vid
+        self.pid = pid
+        self.serial_number = serial_number
+        self.location = location
+        self.description = description or ""
+
+    @classmethod
+    def from_list_ports(cls, port):
+        return cls(port.device, port.vid, port.pid, port.serial_number, port.location, port.description)
+
+    @property
+    def usb_identity(self):
+        """(vid, pid, serial or location) for USB devices, None otherwise."""
+        if self.vid is None or self.pid is None:
+            return None
+        return (self.vid, self.pid, self.serial_number or f"@{self.location}")
+
+    def label(self):
+        if self.vid is None:
+            return self.description
+        return f"{self.description} [{self.vid:04X}:{self.pid:04X}]"
+
+    def __eq__(self, other):
+        return isinstance(other, PortInfo) and self.device == other.device and self.usb_identity == other.usb_identity
+
+    def __hash__(self):
+        return hash((self.device, self.usb_identity))
+
+    def __repr__(self):
+        return f"PortInfo({self.device!r}, identity={self.usb_identity!r})"
+
+
+class PortDiscovery:
+    def __init__(self):
+        # device path -> PortInfo from the last scan
+        self._ports = {}
+
+    @property
+    def ports(self):
+        return sorted(self._ports.values(), key=lambda info: info.device)
+
+    def get(self, device):
+        return self._ports.get(device)
+
+    def find_by_identity(self, identity):
+        if identity is None:
+            return None
+        for info in self._ports.values():
+            if info.usb_identity == identity:
+                return info
+        return None
+
+    def scan(self):
+        """
+        Enumerates ports and updates the cache. Returns (added, removed) lists of PortInfo.
+        A path that now belongs to a different device counts as removed and added.
+        """
+        try:
+            current = {port.device: PortInfo.from_list_ports(port) for port in serial.tools.list_ports.comports()}
+        except Exception as e:
+            print("PortDiscovery: error listing ports:", e)
+            return [], []
+        removed = [info for device, info in self._ports.items() if current.get(device) != info]
+        added = [info for device, info in current.items() if self._ports.get(device) != info]
+        self._ports = current
+        return sorted(added, key=lambda info: info.device), removed
@@ -0,0 +1,336 @@
+# profiler.py
+"""
+Sampling profiler that can be switched on and off in a running session.
+Responsibility:
+ - A sampler thread walks every thread's current stack (sys._current_frames) at a fixed
+   interval and aggregates identical stacks.
+ - Samples on the event-loop thread are prefixed with the asyncio task that was running
+   (name and coroutine), so time in _listener, the drain loop, audio_stream_handler or the
+   OpenAI bridge handlers is attributed to its coroutine, not just to "the loop".
+ - Each sample is weighted by the CPU time the thread used since the previous sample,
+   so an idle loop contributes nothing.
+ - TaskCpuAccounting (a loop task factory, installed only while sampling) measures the
+   exact CPU time of every step of the tasks created meanwhile, so their per-coroutine
+   totals do not depend on where samples happened to land.
+ - On stop, writes the folded-stack format ("frame;frame;frame weight", weight in
+   microseconds of CPU) that flamegraph.pl, speedscope and inferno read directly, plus a
+   per-task CPU table next to it.
+Design rationale:
+ - No tracing hooks: the profiled code runs untouched, and the cost is one stack walk
+   per thread per interval on a separate thread; it can stay off until needed.
+   Task accounting costs two thread_time_ns calls per task step, so it is switched on and
+   off with the sampler: with profiling off, tasks run unwrapped and wrappers left from an
+   earlier run step straight through. Long-lived tasks started before profiling was
+   switched on are attributed by the stack samples only.
+ - The sampler only gets the GIL when the loop thread releases it, often right as the
+   loop goes idle in select(). CPU seen while the loop is idle is therefore charged to
+   the stack sampled before it, where it was actually spent.
+ - Toggled from the UI or by a signal (SIGUSR1), so a misbehaving session can be
+   profiled without restarting it.
+ - Where per-thread CPU clocks are unavailable (time.pthread_getcpuclockid), each sample
+   counts as one wall-clock tick instead.
+"""
+import os
+import sys
+import time
+import signal
+import asyncio
+import threading
+import collections
+import collections.abc
+
+PROFILE_INTERVAL_S = 0.005
+PROFILE_OUTPUT_DIR = "."
+PROFILE_FILE_PREFIX = "profile"
+TASKS_FILE_SUFFIX = ".tasks.txt"
+MAX_STACK_DEPTH = 128
+# leaf frames that mean "this thread is waiting for events"
+IDLE_LEAF_FILES = ("selectors.py",)
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _task_label(task):
+    coro = task.get_coro()
+    coro_name = getattr(coro, "coroutine_name", None) or getattr(coro, "__qualname__", type(coro).__name__)
+    return f"task:{task.get_name()} [{coro_name}]".replace(";", ",")
+
+
+# ------------------------------
+# Per-task CPU accounting
+# ------------------------------
+class _AccountedCoroutine(collections.abc.Coroutine):
+    """Wraps a task's coroutine and adds the thread CPU time of every step to a total while accounting is active."""
+
+    __slots__ = ("_coro", "_accounting", "task", "coroutine_name")
+
+    def __init__(self, coro, accounting):
+        self._coro = coro
+        self._accounting = accounting
+        self.task = None
+        self.coroutine_name = getattr(coro, "__qualname__", type(coro).__name__)
+
+    def _account(self, start_ns):
+        key = (self.task.get_name() if self.task else "?", self.coroutine_name)
+        self._accounting.totals[key] += time.thread_time_ns() - start_ns
+
+    def send(self, value):
+        if not self._accounting.active:
+            return self._coro.send(value)
+        start_ns = time.thread_time_ns()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._account(start_ns)
+
+    def throw(self, *args):
+        if not self._accounting.active:
+            return self._coro.throw(*args)
+        start_ns = time.thread_time_ns()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._account(start_ns)
+
+    def close(self):
+        return self._coro.close()
+
+    def __next__(self):
+        return self.send(None)
+
+    def __await__(self):
+        return self
+
+
+class TaskCpuAccounting:
+    """Loop task factory that keeps CPU ns per (task name, coroutine); SamplingProfiler installs it while sampling."""
+
+    def __init__(self):
+        self.totals = collections.Counter()
+        self.active = False
+        self._previous_factory = None
+        self._loop = None
+
+    def install(self, loop: asyncio.AbstractEventLoop):
+        """Only tasks created after this call are accounted."""
+        if self._loop is not None:
+            return
+        self._loop = loop
+        self._previous_factory = loop.get_task_factory()
+        loop.set_task_factory(self._factory)
+        self.active = True
+
+    def uninstall(self):
+        """Restores the previous factory; tasks still wrapped stop measuring."""
+        self.active = False
+        if self._loop is not None:
+            self._loop.set_task_factory(self._previous_factory)
+            self._loop = None
+
+    def _factory(self, loop, coro, **kwargs):
+        wrapped = _AccountedCoroutine(coro, self)
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, wrapped, **kwargs)
+        else:
+            task = asyncio.Task(wrapped, loop=loop, **kwargs)
+        wrapped.task = task
+        return task
+
+    def snapshot(self):
+        return collections.Counter(self.totals)
+
+
+# ------------------------------
+# Sampling profiler
+# ------------------------------
+class SamplingProfiler:
+    def __init__(self, interval_s=PROFILE_INTERVAL_S, output_dir=PROFILE_OUTPUT_DIR,
+                 task_accounting: TaskCpuAccounting = None):
+        self.interval_s = interval_s
+        self.output_dir = output_dir
+        self.task_accounting = task_accounting
+        self._task_cpu_at_start = collections.Counter()
+        self._folded = collections.Counter()
+        self._cpu_clocks = {}
+        self._last_cpu_ns = {}
+        self._last_busy_stack = {}
+        self._loop = None
+        self._loop_thread_id = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.last_output_path = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None
+
+    # ------------------------------
+    # Control
+    # ------------------------------
+    def start(self, loop: asyncio.AbstractEventLoop = None):
+        """Starts sampling. Call from the loop thread so its samples get task attribution."""
+        with self._lock:
+            if self._thread:
+                return
+            self._folded.clear()
+            self._cpu_clocks.clear()
+            self._last_cpu_ns.clear()
+            self._last_busy_stack.clear()
+            if self.task_accounting:
+                self._task_cpu_at_start = self.task_accounting.snapshot()
+                if loop is not None:
+                    self.task_accounting.install(loop)
+            self.samples = 0
+            self._loop = loop
+            self._loop_thread_id = threading.get_ident() if loop else None
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._sampler, name="profiler-sampler", daemon=True)
+            self._thread.start()
+        print("Profiler: sampling started")
+
+    def stop(self):
+        """Stops sampling and writes the folded stacks. Returns the output path (or None)."""
+        with self._lock:
+            if not self._thread:
+                return None
+            self._stop_event.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+            if self.task_accounting:
+                self.task_accounting.uninstall()
+        path = self.write_folded()
+        print(f"Profiler: {self.samples} samples written to {path}")
+        return path
+
+    def toggle(self, loop: asyncio.AbstractEventLoop = None):
+        if self.is_running:
+            return self.stop()
+        self.start(loop)
+        return None
+
+    def install_signal_toggle(self, loop: asyncio.AbstractEventLoop = None, signum=getattr(signal, "SIGUSR1", None)):
+        """
+        Toggles profiling on `kill -USR1 <pid>` (POSIX only). Must be called from the main thread.
+        The toggle never runs inside the signal handler itself (it takes the non-reentrant
+        lock, and stop() writes files): it is scheduled on the loop, or on a helper thread.
+        """
+        if signum is None:
+            print("Profiler: signal toggle not available on this platform")
+            return False
+        if loop is not None:
+            try:
+                loop.add_signal_handler(signum, self.toggle, loop)
+                return True
+            except (NotImplementedError, RuntimeError):
+                # e.g. the qasync loop: fall back to a minimal handler below
+                pass
+
+        def _handler(received_signum, frame):
+            if loop is not None:
+                loop.call_soon_threadsafe(self.toggle, loop)
+            else:
+                threading.Thread(target=self.toggle, name="profiler-toggle", daemon=True).start()
+        signal.signal(signum, _handler)
+        return True
+
+    # ------------------------------
+    # Sampling
+    # ------------------------------
+    def _thread_cpu_ns(self, thread_id):
+        """CPU time of a thread in ns, or None where per-thread clocks are unavailable."""
+        clock = self._cpu_clocks.get(thread_id)
+        if clock is None:
+            try:
+                clock = time.pthread_getcpuclockid(thread_id)
+            except (AttributeError, OSError, OverflowError):
+                clock = False
+            self._cpu_clocks[thread_id] = clock
+        if clock is False:
+            return None
+        try:
+            return time.clock_gettime_ns(clock)
+        except OSError:
+            # thread has exited
+            return None
+
+    def _weight(self, thread_id):
+        cpu_ns = self._thread_cpu_ns(thread_id)
+        if cpu_ns is None:
+            return 1
+        previous = self._last_cpu_ns.get(thread_id)
+        self._last_cpu_ns[thread_id] = cpu_ns
+        if previous is None:
+            return 0
+        # microseconds of CPU since the previous sample
+        return (cpu_ns - previous) // 1000
+
+    def _sampler(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval_s):
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                weight = self._weight(thread_id)
+                idle = os.path.basename(frame.f_code.co_filename) in IDLE_LEAF_FILES
+                if not idle:
+                    self._last_busy_stack[thread_id] = self._folded_stack(thread_id, frame, thread_names)
+                if weight <= 0:
+                    continue
+                # CPU noticed while idle was spent where the thread was last seen busy
+                stack = self._last_busy_stack.get(thread_id) if idle else self._last_busy_stack[thread_id]
+                if stack is None:
+                    stack = self._folded_stack(thread_id, frame, thread_names)
+                self._folded[stack] += weight
+                self.samples += 1
+
+    def _folded_stack(self, thread_id, frame, thread_names):
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        labels.append(thread_names.get(thread_id, f"thread-{thread_id}").replace(";", ","))
+        labels.reverse()
+
+        if thread_id == self._loop_thread_id and self._loop is not None:
+            task = asyncio.current_task(self._loop)
+            if task is not None:
+                # group by task right under the thread, so each coroutine is its own tower
+                labels.insert(1, _task_label(task))
+        return ";".join(labels)
+
+    # ------------------------------
+    # Output
+    # ------------------------------
+    def write_folded(self, path=None):
+        if path is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(self.output_dir, f"{PROFILE_FILE_PREFIX}-{stamp}-{os.getpid()}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, weight in self._folded.most_common():
+                f.write(f"{stack} {weight}\n")
+        if self.task_accounting:
+            self.write_task_table(path + TASKS_FILE_SUFFIX)
+        self.last_output_path = path
+        return path
+
+    def task_cpu(self):
+        """CPU ns per (task name, coroutine) since start(); empty without task accounting."""
+        if not self.task_accounting:
+            return collections.Counter()
+        delta = self.task_accounting.snapshot()
+        delta.subtract(self._task_cpu_at_start)
+        return +delta
+
+    def write_task_table(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("cpu_ms\ttask\tcoroutine\n")
+            for (task_name, coro_name), cpu_ns in self.task_cpu().most_common():
+                f.write(f"{cpu_ns / 1e6:.3f}\t{task_name}\t{coro_name}\n")
@@ -5,16 +5,300 @@ Responsibility:
  - List available ports
  - Connect/disconnect
  - Provide a simple send(data) method
+ - Keep LED frames within the link's bandwidth (send_frame) and negotiate faster baud rates
+ - Read what the device sends back: frame acknowledgements, power button state, firmware version
 Design rationale:
  - Keeps serial concerns in one place and shields Model / Controller from pyserial details.
+ - The byte budget comes from the baud rate and the character frame (start + data + parity
+   + stop bits), e.g. 9600 baud 8N1 = 960 bytes/s. A token bucket holds the sender under
+   SERIAL_BUDGET_HEADROOM of that; frames that do not fit are kept as the single pending
+   frame (latest wins) instead of queueing up in the OS buffer and adding latency.
+ - Payload richness adapts to the budget: per-pixel RGB frames (binary, see
+   encode_rgb_frame) and per-pixel levels ("P" + hex) are only sent when they fit at
+   MIN_PIXEL_FRAME_RATE_HZ, otherwise the next simpler payload down to a single brightness
+   ("NNN") is sent. RGB frames also need firmware that announced RGB_FRAME_MIN_VERSION.
+ - Frames that would not visibly change the ring are suppressed (ChangeThresholdFilter):
+   values are compared in CIE L* lightness, with the firmware's BASE_STATE floor applied,
+   so silence costs nothing; a keyframe is still resent every KEYFRAME_INTERVAL_S so the
+   device recovers from dropped bytes.
+ - Baud negotiation waits for the device's answer, so it is meant to run off the UI thread;
+   a write lock makes frame sends skip (and keep their frame pending) while it runs.
+ - send_frame is called from the animation and UI threads and the link is restored from
+   the reconnect thread, so the budget and the pending frame are guarded by one lock
+   (_frame_lock). It is only held for bookkeeping; the port write happens outside it.
+ - The link is supervised: a failed write (USB hiccup, cable wiggle) closes the port and a
+   background thread reopens the same path with exponential backoff (capped at
+   RECONNECT_MAX_BACKOFF_S, which bounds how long a device that is back stays dark).
+   While the link is down only the latest frame is kept; on reopen the negotiated baud rate
+   is restored and the latest state is resent. Only disconnect() ends supervision.
+ - A reader thread per open port parses device lines ("K<seq>" ack, "S0"/"S1" ring off/on,
+   "V<version>", "B<baud>" baud ack) so writes never wait on reads. Frames carry a "#<seq>"
+   suffix once the firmware has announced a version (old firmware ignores it either way);
+   the ack gives the round-trip time of every frame. While the ring is off, frames are not
+   sent at all.
 """
+import time
+import threading
 import serial
 import serial.tools.list_ports
 
+from metrics import MetricsRegistry
+from latency_trace import LatencyTracer, STAGE_SERIAL_WRITE
+
+# Budget
+SERIAL_BUDGET_HEADROOM = 0.8    # fraction of the raw link rate we plan to use
+DEFAULT_MAX_FRAME_RATE_HZ = 30  # upper bound on LED frames/s, whatever the baud
+MIN_PIXEL_FRAME_RATE_HZ = 20    # below this, per-pixel frames fall back to brightness only
+
+# Change suppression
+DELTA_THRESHOLD_LSTAR = 2.0     # smallest change worth sending, in CIE L* units (~1 JND)
+KEYFRAME_INTERVAL_S = 1.0       # unchanged frames are still resent this often
+BASE_STATE_FLOOR = 15           # firmware shows anything below BASE_STATE as BASE_STATE
+RING_COLOR = (250, 200, 200)    # firmware colour for brightness and per-pixel frames
+
+# Firmware line protocol (see s_HRI_audio_wave_NeoPixel.ino)
+NUM_PIXELS = 16
+LISTENING_COMMAND = "A"
+PIXEL_FRAME_PREFIX = "P"
+BAUD_COMMAND_PREFIX = "B"
+SUPPORTED_BAUDRATES = (9600, 19200, 38400, 57600, 115200)
+BAUD_ACK_TIMEOUT_S = 1.0
+BAUD_NEGOTIATION_ATTEMPTS = 3
+BAUD_SWITCH_SETTLE_S = 0.05
+
+# Device -> host messages
+VERSION_QUERY = "V"
+ACK_PREFIX = "K"
+POWER_PREFIX = "S"
+VERSION_PREFIX = "V"
+FRAME_SEQ_SEPARATOR = "#"
+FRAME_SEQ_MODULO = 256
+READ_TIMEOUT_S = 0.2             # the reader wakes up this often to notice a closed port
+MAX_DEVICE_LINE_BYTES = 64
+RTT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+DEVICE_EVENT_POWER = "power"     # value: True (ring on) / False (ring off)
+DEVICE_EVENT_VERSION = "version" # value: firmware version string
+
+# Binary RGB frame: sync, seq, NUM_PIXELS * (r, g, b), checksum. The sync byte is outside
+# ASCII and never sent after it (sequence numbers skip it, colours and the checksum are
+# nudged by one level), so the firmware starts a frame wherever it sees it (dropping a
+# partial text line or a frame that lost bytes), and after a bad checksum it skips at most
+# one frame's worth of bytes until the next sync, so text commands get through again after that.
+RGB_FRAME_SYNC = 0xC3
+RGB_FRAME_LEVELS = NUM_PIXELS * 3
+RGB_FRAME_BYTES = 1 + 1 + RGB_FRAME_LEVELS + 1
+RGB_FRAME_MIN_VERSION = (1, 2)
+
+# Link supervision
+WRITE_TIMEOUT_S = 0.5               # a write stuck longer than this counts as a link failure
+RECONNECT_INITIAL_BACKOFF_S = 0.1
+RECONNECT_MAX_BACKOFF_S = 2.0
+LINK_DOWNTIME_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def bits_per_character(bytesize=serial.EIGHTBITS, parity=serial.PARITY_NONE, stopbits=serial.STOPBITS_ONE):
+    """UART frame length of one byte: start bit + data bits + parity bit + stop bits."""
+    parity_bits = 0 if parity == serial.PARITY_NONE else 1
+    return 1 + bytesize + parity_bits + stopbits
+
+
+def _seq_suffix(seq):
+    return "" if seq is None else f"{FRAME_SEQ_SEPARATOR}{seq}"
+
+
+def encode_brightness(value, seq=None):
+    return f"{int(value)}{_seq_suffix(seq)}\n".encode("ascii")
+
+
+def encode_pixel_levels(levels, seq=None):
+    return (PIXEL_FRAME_PREFIX + bytes(int(v) & 0xFF for v in levels).hex() + _seq_suffix(seq) + "\n").encode("ascii")
+
+
+def encode_rgb_frame(rgb_levels, seq=0):
+    """
+    rgb_levels: RGB_FRAME_LEVELS values (r, g, b per pixel). Checksum: 8-bit sum of seq and data.
+    RGB_FRAME_SYNC only appears as the first byte: levels equal to it are sent one lower, and
+    a checksum that would equal it is moved by changing the first level by one.
+    """
+    seq &= 0xFF
+    if seq == RGB_FRAME_SYNC:
+        raise ValueError(f"sequence number {seq} is the RGB frame sync byte")
+    data = bytearray(int(v) & 0xFF for v in rgb_levels).replace(bytes([RGB_FRAME_SYNC]), bytes([RGB_FRAME_SYNC - 1]))
+    checksum = (seq + sum(data)) & 0xFF
+    if checksum == RGB_FRAME_SYNC:
+        data[0] += 1 if data[0] in (0, RGB_FRAME_SYNC + 1) else -1
+        checksum = (seq + sum(data)) & 0xFF
+    return bytes([RGB_FRAME_SYNC, seq]) + bytes(data) + bytes([checksum])
+
+
+def _version_tuple(version):
+    parts = []
+    for part in version.split("."):
+        if not part.isdigit():
+            break
+        parts.append(int(part))
+    return tuple(parts)
+
+
+def ring_pixels_for_levels(levels):
+    """
+    What the firmware puts on the ring for a frame's levels: NUM_PIXELS (r, g, b) tuples.
+    Mirrors controllNeoPixel (setBrightness scaling), controllNeoPixelLevels and controllNeoPixelRGB.
+    """
+    if len(levels) == RGB_FRAME_LEVELS:
+        return [tuple(int(v) for v in levels[i:i + 3]) for i in range(0, RGB_FRAME_LEVELS, 3)]
+    if len(levels) == NUM_PIXELS:
+        return [tuple(c * max(int(level), BASE_STATE_FLOOR) // 255 for c in RING_COLOR) for level in levels]
+    brightness = max(int(levels[0]), BASE_STATE_FLOOR)
+    # Adafruit_NeoPixel keeps brightness + 1 and scales by it (255 -> no scaling)
+    pixel = RING_COLOR if brightness >= 255 else tuple((c * (brightness + 1)) >> 8 for c in RING_COLOR)
+    return [pixel] * NUM_PIXELS
+
+
+# largest per-pixel frame, sequence suffix included
+PIXEL_FRAME_BYTES = len(encode_pixel_levels([0] * NUM_PIXELS, FRAME_SEQ_MODULO - 1))
+MAX_FRAME_BYTES = max(PIXEL_FRAME_BYTES, RGB_FRAME_BYTES)
+
+
+def _lightness(level):
+    """CIE L* (0..100) of an LED level 0..255, treating the PWM level as relative luminance."""
+    y = level / 255.0
+    return 116.0 * y ** (1.0 / 3.0) - 16.0 if y > 0.008856 else 903.3 * y
+
+
+LIGHTNESS_LUT = [_lightness(level) for level in range(256)]
+
+
+class ChangeThresholdFilter:
+    """Skips frames within a perceptual threshold of the last sent one, except for periodic keyframes."""
+
+    def __init__(self, threshold=DELTA_THRESHOLD_LSTAR, keyframe_interval_s=KEYFRAME_INTERVAL_S,
+                 floor=BASE_STATE_FLOOR):
+        self.threshold = threshold
+        self.keyframe_interval_s = keyframe_interval_s
+        self.floor = floor
+        self._last_lightness = None
+        self._last_sent_time = 0.0
+
+    def _to_lightness(self, levels):
+        # RGB channel bytes are latched as sent (controllNeoPixelRGB), without the BASE_STATE floor
+        floor = 0 if len(levels) == RGB_FRAME_LEVELS else self.floor
+        return [LIGHTNESS_LUT[max(floor, min(255, int(level)))] for level in levels]
+
+    def is_significant(self, levels, now):
+        # read once: invalidate() may run on another thread (UI send, device reader)
+        last_lightness = self._last_lightness
+        if last_lightness is None or len(levels) != len(last_lightness):
+            return True
+        if now - self._last_sent_time >= self.keyframe_interval_s:
+            return True
+        lightness = self._to_lightness(levels)
+        return max(abs(a - b) for a, b in zip(lightness, last_lightness)) >= self.threshold
+
+    def mark_sent(self, levels, now):
+        self._last_lightness = self._to_lightness(levels)
+        self._last_sent_time = now
+
+    def invalidate(self):
+        """The device state changed some other way (command, reconnect): the next frame always goes out."""
+        self._last_lightness = None
+
+
 class SerialCom:
-    def __init__(self, baudrate=9600):
+    def __init__(self, baudrate=9600, metrics: MetricsRegistry = None, max_frame_rate_hz=DEFAULT_MAX_FRAME_RATE_HZ,
+                 bytesize=serial.EIGHTBITS, parity=serial.PARITY_NONE, stopbits=serial.STOPBITS_ONE,
+                 metric_labels=None, supervise=True, latency_tracer: LatencyTracer = None):
+        # the firmware boots at the base rate; negotiate_baudrate may raise it per connection
+        self._base_baudrate = baudrate
         self._baudrate = baudrate
+        self._negotiated_baudrate = None
+        self._bytesize = bytesize
+        self._parity = parity
+        self._stopbits = stopbits
         self._conn = None
+        self._write_lock = threading.Lock()
+
+        # Link supervision state
+        self.supervise = supervise
+        self._port_name = None
+        self._link_generation = 0          # bumped by connect/disconnect; a stale reconnect thread gives up
+        self._link_lock = threading.Lock()
+        self._reconnect_thread = None
+        self._reconnect_stop = threading.Event()
+        self._link_up_since = None
+        self._link_down_since = None
+        self._supervised_since = None
+        self._uptime_total_s = 0.0
+
+        # Device -> host state, filled in by the reader thread
+        self._reader_thread = None
+        self._device_listeners = []
+        self.device_on = None              # None until the firmware reports its power state
+        self.firmware_version = None       # None: old firmware, no acks or state reports
+        self.last_rtt_s = None
+        self._next_seq = 0
+        self._frames_in_flight = {}        # seq -> monotonic write time
+        self._baud_ack = None
+        self._baud_ack_event = threading.Event()
+
+        # Budget state (token bucket in bytes); budget, pending frame and change filter are guarded by _frame_lock
+        self.max_frame_rate_hz = max_frame_rate_hz
+        self._frame_lock = threading.RLock()
+        self._tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._last_frame_time = 0.0
+        self._pending_frame = None
+        self._pending_levels = None
+        self._pending_seq = None
+        self._pending_trace = None         # latency trace of the pending frame, finished once it is written
+        self.latency_tracer = latency_tracer
+        self.change_filter = ChangeThresholdFilter()
+        self._last_levels = None  # last levels written (what the ring shows), None while the link is down
+        self._restore_levels = None  # last levels before the link failed, resent after a reconnect
+        self._ring_version = 0    # bumped whenever what the ring shows may have changed (see last_sent_ring)
+
+        # metric_labels (e.g. {"device": port}) keep one series per SerialCom in a shared registry
+        metrics = metrics or MetricsRegistry()
+        labels = metric_labels
+        self._sends = metrics.counter("serial_sends_total", "Payloads written to the serial port", labels)
+        self._send_failures = metrics.counter("serial_send_failures_total",
+                                              "Payloads that could not be written", labels)
+        self._bytes_sent = metrics.counter("serial_bytes_sent_total", "Bytes written to the serial port", labels)
+        self._send_seconds = metrics.histogram("serial_send_seconds", "Time spent in SerialCom.send", labels=labels)
+        self._connected = metrics.gauge("serial_connected", "1 while a serial port is open",
+                                        self.is_connected, labels)
+        self._frames_deferred = metrics.counter("serial_frames_deferred_total",
+                                                "LED frames held back because the byte budget was used up", labels)
+        self._frames_downgraded = metrics.counter("serial_frames_downgraded_total",
+                                                  "Per-pixel frames sent as a single brightness to fit the budget",
+                                                  labels)
+        self._frames_suppressed = metrics.counter("serial_frames_suppressed_total",
+                                                  "LED frames skipped because they would not visibly change the ring",
+                                                  labels)
+        metrics.gauge("serial_budget_bytes_per_second", "Planned serial byte budget",
+                      self.budget_bytes_per_second, labels)
+        self._link_failures = metrics.counter("serial_link_failures_total",
+                                              "Times the serial link went down on an I/O error", labels)
+        self._link_reconnects = metrics.counter("serial_link_reconnects_total",
+                                                "Times the supervisor reopened a failed serial link", labels)
+        self._link_downtime = metrics.histogram("serial_link_downtime_seconds",
+                                                "Time from a link failure to its reconnect",
+                                                LINK_DOWNTIME_BUCKETS, labels)
+        metrics.gauge("serial_link_uptime_seconds", "Seconds since the serial link was last (re)opened",
+                      self.link_uptime_s, labels)
+        metrics.gauge("serial_link_availability_ratio", "Fraction of the supervised time the link was up",
+                      self.link_availability, labels)
+        self._frame_rtt = metrics.histogram("serial_frame_rtt_seconds",
+                                            "Time from writing an LED frame to the device acknowledging it",
+                                            RTT_BUCKETS, labels)
+        self._frames_acked = metrics.counter("serial_frames_acked_total", "LED frames acknowledged by the device",
+                                             labels)
+        self._frames_unacked = metrics.counter("serial_frames_unacked_total",
+                                               "LED frames whose acknowledgement never arrived", labels)
+        self._frames_device_off = metrics.counter("serial_frames_device_off_total",
+                                                  "LED frames not sent because the ring was switched off", labels)
+        metrics.gauge("serial_device_on", "1 while the ring reports on, 0 when off, NaN when unknown",
+                      lambda: float("nan") if self.device_on is None else float(self.device_on), labels)
 
     def list_ports(self):
         try:
@@ -27,36 +311,527 @@ class SerialCom:
     def connect(self, port_name: str):
         # close existing connection
         self.disconnect()
+        self._baudrate = self._base_baudrate
+        self._negotiated_baudrate = None
         try:
-            self._conn = serial.Serial(port=port_name, baudrate=self._baudrate, timeout=1)
-            print(f"SerialCom: connected to {port_name}")
-            return True
+            conn = self._open(port_name)
         except Exception as e:
             print("SerialCom: connect failed:", e)
-            self._conn = None
             return False
+        with self._link_lock:
+            self._conn = conn
+            self._port_name = port_name
+        with self._frame_lock:
+            self._reset_budget()
+            self._restore_levels = None
+            self._forget_ring()
+        self._reset_device_state()
+        self._start_reader(conn)
+        now = time.monotonic()
+        self._supervised_since = now
+        self._uptime_total_s = 0.0
+        self._link_up_since = now
+        self._link_down_since = None
+        print(f"SerialCom: connected to {port_name}")
+        # boards that do not reset on open would not announce themselves otherwise
+        self.send(VERSION_QUERY)
+        return True
 
     def disconnect(self):
-        if self._conn:
-            try:
-                if self._conn.is_open:
-                    self._conn.close()
-                self._conn = None
-            except Exception:
-                self._conn = None
+        """Closes the port and ends supervision (no reconnect attempts after this)."""
+        with self._link_lock:
+            self._link_generation += 1
+            self._port_name = None
+            self._reconnect_stop.set()
+            thread, self._reconnect_thread = self._reconnect_thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=WRITE_TIMEOUT_S + 1.0)
+        self._close_conn()
+        reader, self._reader_thread = self._reader_thread, None
+        if reader is not None and reader is not threading.current_thread():
+            reader.join(timeout=READ_TIMEOUT_S + 1.0)
+        self._mark_link_down()
+        self._forget_ring()
+        self._supervised_since = None
+        self._link_down_since = None
 
     def is_connected(self):
         return self._conn is not None and getattr(self._conn, "is_open", False)
 
+    def is_reconnecting(self):
+        return self._reconnect_thread is not None
+
+    def _open(self, port_name):
+        return serial.Serial(port=port_name, baudrate=self._base_baudrate, timeout=READ_TIMEOUT_S,
+                             write_timeout=WRITE_TIMEOUT_S,
+                             bytesize=self._bytesize, parity=self._parity, stopbits=self._stopbits)
+
+    def _close_conn(self):
+        with self._link_lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                if conn.is_open:
+                    conn.close()
+            except Exception:
+                pass
+
+    # ------------------------------
+    # Link supervision
+    # ------------------------------
+    def _mark_link_down(self):
+        if self._link_up_since is not None:
+            self._uptime_total_s += time.monotonic() - self._link_up_since
+            self._link_up_since = None
+
+    def _forget_ring(self):
+        # nothing reaches the ring any more; the preview must not keep showing the last frame
+        with self._frame_lock:
+            self._last_levels = None
+            self._ring_version += 1
+
+    def link_uptime_s(self):
+        return time.monotonic() - self._link_up_since if self._link_up_since is not None else 0.0
+
+    def link_availability(self):
+        if self._supervised_since is None:
+            return 0.0
+        elapsed = time.monotonic() - self._supervised_since
+        if elapsed <= 0:
+            return 1.0
+        return min(1.0, (self._uptime_total_s + self.link_uptime_s()) / elapsed)
+
+    def _link_failed(self, error):
+        """A write or read failed: close the port and, if supervised, start reopening it in the background."""
+        self._link_failures.inc()
+        self._close_conn()
+        self._mark_link_down()
+        with self._frame_lock:
+            if self._last_levels is not None:
+                self._restore_levels = self._last_levels
+            self._forget_ring()
+        with self._link_lock:
+            if not self.supervise or self._port_name is None or self._reconnect_thread is not None:
+                return
+            self._link_down_since = time.monotonic()
+            self._reconnect_stop.clear()
+            self._reconnect_thread = threading.Thread(
+                target=self._reconnect_worker, args=(self._port_name, self._link_generation),
+                name=f"serial-reconnect {self._port_name}", daemon=True)
+            self._reconnect_thread.start()
+        print(f"SerialCom: link to {self._port_name} lost ({error}), reconnecting")
+
+    def _reconnect_worker(self, port_name, generation):
+        backoff = RECONNECT_INITIAL_BACKOFF_S
+        while not self._reconnect_stop.wait(backoff):
+            try:
+                conn = self._open(port_name)
+            except Exception:
+                backoff = min(backoff * 2, RECONNECT_MAX_BACKOFF_S)
+                continue
+            with self._link_lock:
+                if generation != self._link_generation:
+                    # disconnect() or connect() happened meanwhile; this port is no longer ours
+                    conn.close()
+                    return
+                self._conn = conn
+                self._reconnect_thread = None
+            self._reset_device_state()
+            self._start_reader(conn)
+            self._restore_link()
+            return
+
+    def _restore_link(self):
+        now = time.monotonic()
+        if self._link_down_since is not None:
+            self._link_downtime.observe(now - self._link_down_since)
+            self._link_down_since = None
+        self._link_up_since = now
+        self._link_reconnects.inc()
+        print(f"SerialCom: reconnected to {self._port_name}")
+
+        # the board rebooted on open: back to the base rate, then the latest state again
+        with self._frame_lock:
+            pending_levels = self._pending_levels or self._restore_levels
+            self._baudrate = self._base_baudrate
+            self._reset_budget()
+        if self._negotiated_baudrate:
+            self.negotiate_baudrate(self._negotiated_baudrate)
+        with self._frame_lock:
+            if pending_levels is None or self._pending_frame is not None:
+                # a newer frame arrived while the baud rate was restored
+                return
+            if len(pending_levels) == RGB_FRAME_LEVELS and not self.supports_rgb_frames():
+                return
+            self._set_pending(pending_levels)
+        self.flush_pending()
+
     def send(self, payload):
+        """Writes payload as a text line right away (commands such as "A"); still counted against the budget."""
+        self.change_filter.invalidate()
+        return self._write(f"{payload}\n".encode("utf-8"))
+
+    def _write(self, data: bytes):
         if not self.is_connected():
-            print("SerialCom: cannot send, not connected")
+            if not self.is_reconnecting():
+                print("SerialCom: cannot send, not connected")
+            self._send_failures.inc()
+            return False
+        if not self._write_lock.acquire(blocking=False):
+            # baud negotiation in progress
+            self._send_failures.inc()
             return False
+        start = time.perf_counter()
         try:
-            data = f"{payload}\n".encode("utf-8")
             self._conn.write(data)
+            self._consume_tokens(len(data))
+            self._sends.inc()
+            self._bytes_sent.inc(len(data))
             return True
         except Exception as e:
             print("SerialCom: send error", e)
-            self.disconnect()
+            self._send_failures.inc()
+            self._link_failed(e)
+            return False
+        finally:
+            self._write_lock.release()
+            self._send_seconds.observe(time.perf_counter() - start)
+
+    # ------------------------------
+    # Device -> host messages
+    # ------------------------------
+    def add_device_listener(self, callback):
+        """callback(event, value) for DEVICE_EVENT_POWER / DEVICE_EVENT_VERSION; runs on the reader thread."""
+        self._device_listeners.append(callback)
+
+    def _notify_device_listeners(self, event, value):
+        for callback in list(self._device_listeners):
+            try:
+                callback(event, value)
+            except Exception as e:
+                print("SerialCom: device listener error:", e)
+
+    def _reset_device_state(self):
+        # a freshly opened port may be a rebooted (or different) board
+        self.device_on = None
+        self.firmware_version = None
+        self.last_rtt_s = None
+        self._frames_in_flight.clear()
+
+    def _start_reader(self, conn):
+        self._reader_thread = threading.Thread(target=self._reader_worker, args=(conn,),
+                                               name=f"serial-reader {self._port_name}", daemon=True)
+        self._reader_thread.start()
+
+    def _reader_worker(self, conn):
+        buffer = bytearray()
+        while self._conn is conn:
+            try:
+                data = conn.read(conn.in_waiting or 1)
+            except Exception as e:
+                if self._conn is conn:
+                    # the device went away under us; a closed port on disconnect is not a failure
+                    self._link_failed(e)
+                return
+            if not data:
+                continue
+            buffer += data
+            while True:
+                end = buffer.find(b"\n")
+                if end < 0:
+                    break
+                line = bytes(buffer[:end]).strip()
+                del buffer[:end + 1]
+                if line:
+                    self._handle_device_line(line.decode("ascii", "replace"))
+            if len(buffer) > MAX_DEVICE_LINE_BYTES:
+                # no newline in sight: noise (e.g. bytes at the wrong baud rate)
+                buffer.clear()
+
+    def _handle_device_line(self, line):
+        prefix, body = line[:1], line[1:]
+        if prefix == ACK_PREFIX:
+            self._handle_ack(body, time.monotonic())
+        elif prefix == POWER_PREFIX and body in ("0", "1"):
+            self._set_device_on(body == "1")
+        elif prefix == VERSION_PREFIX and body:
+            self.firmware_version = body
+            self._notify_device_listeners(DEVICE_EVENT_VERSION, body)
+        elif prefix == BAUD_COMMAND_PREFIX:
+            self._baud_ack = line
+            self._baud_ack_event.set()
+
+    def _handle_ack(self, body, now):
+        try:
+            seq = int(body)
+        except ValueError:
+            return
+        sent_time = self._frames_in_flight.pop(seq, None)
+        if sent_time is None:
+            return
+        self.last_rtt_s = now - sent_time
+        self._frame_rtt.observe(self.last_rtt_s)
+        self._frames_acked.inc()
+
+    def _set_device_on(self, is_on):
+        was_on, self.device_on = self.device_on, is_on
+        if is_on and not was_on:
+            # the ring switched on in its listening state: the next frame must go out
+            self.change_filter.invalidate()
+        if is_on != was_on:
+            self._ring_version += 1
+            self._notify_device_listeners(DEVICE_EVENT_POWER, is_on)
+
+    def last_sent_ring(self):
+        """
+        (version, pixels): the ring as the last written frame shows it, pixels as from
+        ring_pixels_for_levels, or None before the first frame and while the ring is off.
+        version changes whenever pixels may have; safe from any thread.
+        """
+        version, levels = self._ring_version, self._last_levels
+        if levels is None or self.device_on is False:
+            return version, None
+        return version, ring_pixels_for_levels(levels)
+
+    def supports_rgb_frames(self):
+        return self.firmware_version is not None and _version_tuple(self.firmware_version) >= RGB_FRAME_MIN_VERSION
+
+    def _frame_seq(self):
+        """Sequence number for the next frame; None while the firmware does not acknowledge frames."""
+        return self._next_seq if self.firmware_version is not None else None
+
+    def _track_frame(self, seq, now):
+        if seq is None:
+            return
+        if self._frames_in_flight.pop(seq, None) is not None:
+            # the sequence wrapped around without an ack for this number
+            self._frames_unacked.inc()
+        self._frames_in_flight[seq] = now
+        self._next_seq = (seq + 1) % FRAME_SEQ_MODULO
+        if self._next_seq == RGB_FRAME_SYNC:
+            # never inside an RGB frame body; text frames skip it too, one counter for both
+            self._next_seq += 1
+
+    # ------------------------------
+    # Bandwidth budget
+    # ------------------------------
+    @property
+    def baudrate(self):
+        return self._baudrate
+
+    def bytes_per_second(self):
+        """Raw link capacity in bytes/s for the current baud rate and character frame."""
+        return self._baudrate / bits_per_character(self._bytesize, self._parity, self._stopbits)
+
+    def budget_bytes_per_second(self):
+        return self.bytes_per_second() * SERIAL_BUDGET_HEADROOM
+
+    def frame_rate_for(self, payload_size):
+        """Highest frame rate at which payloads of this size stay under budget."""
+        return min(self.max_frame_rate_hz, self.budget_bytes_per_second() / payload_size)
+
+    def _token_capacity(self):
+        # about one frame interval worth of bytes (so bursts stay small), but always room for the largest frame
+        return max(self.budget_bytes_per_second() / self.max_frame_rate_hz, MAX_FRAME_BYTES)
+
+    def _reset_budget(self):
+        with self._frame_lock:
+            self._tokens = self._token_capacity()
+            self._last_refill = time.monotonic()
+            self._last_frame_time = 0.0
+            self._clear_pending()
+            self.change_filter.invalidate()
+
+    def _refill_tokens(self, now):
+        budget = self.budget_bytes_per_second()
+        self._tokens = min(self._token_capacity(), self._tokens + (now - self._last_refill) * budget)
+        self._last_refill = now
+
+    def _consume_tokens(self, size):
+        with self._frame_lock:
+            self._refill_tokens(time.monotonic())
+            self._tokens -= size
+
+    def _select_payload(self, brightness, pixel_levels, rgb_pixels=None):
+        """Returns the levels that will be shown: the richest payload that fits the budget and the firmware."""
+        if rgb_pixels is not None:
+            if self.supports_rgb_frames() and self.frame_rate_for(RGB_FRAME_BYTES) >= MIN_PIXEL_FRAME_RATE_HZ:
+                return tuple(int(channel) for pixel in rgb_pixels for channel in pixel)
+            self._frames_downgraded.inc()
+            if pixel_levels is None:
+                # Rec. 601 luma of each pixel
+                pixel_levels = [(299 * int(r) + 587 * int(g) + 114 * int(b)) // 1000 for r, g, b in rgb_pixels]
+        if pixel_levels is not None:
+            if self.frame_rate_for(PIXEL_FRAME_BYTES) >= MIN_PIXEL_FRAME_RATE_HZ:
+                return tuple(int(level) for level in pixel_levels)
+            self._frames_downgraded.inc()
+            if brightness is None:
+                brightness = sum(pixel_levels) / len(pixel_levels)
+        return (int(brightness),)
+
+    @staticmethod
+    def _encode_levels(levels, seq=None):
+        if len(levels) == RGB_FRAME_LEVELS:
+            return encode_rgb_frame(levels, seq or 0)
+        return encode_pixel_levels(levels, seq) if len(levels) > 1 else encode_brightness(levels[0], seq)
+
+    def _set_pending(self, levels):
+        self._pending_levels = levels
+        self._pending_seq = self._frame_seq()
+        self._pending_frame = self._encode_levels(levels, self._pending_seq)
+
+    def _clear_pending(self):
+        self._pending_frame = None
+        self._pending_levels = None
+        self._pending_seq = None
+        self._pending_trace = None
+
+    def send_frame(self, brightness=None, pixel_levels=None, rgb_pixels=None, force=False, trace=None):
+        """
+        Budget-aware LED frame send. Picks the richest payload that fits and drops it if it
+        would not visibly change the ring (unless a keyframe is due, or force is set for
+        frames whose small steps are intended, e.g. temporal dithering; force only applies
+        while the frame goes out as RGB). Otherwise writes it
+        if the frame interval and the byte budget allow, or keeps it as the pending frame
+        (replacing an older pending one). Returns True when a frame was written.
+        trace (from latency_tracer) is stamped and finished when the frame bytes are written;
+        a frame that is suppressed or replaced before that leaves its trace unfinished.
+        """
+        if brightness is None and pixel_levels is None and rgb_pixels is None:
             return False
+        with self._frame_lock:
+            if self.device_on is False:
+                # ring switched off with its button: nothing to show, keep the link quiet
+                self._frames_device_off.inc()
+                self._clear_pending()
+                return False
+            levels = self._select_payload(brightness, pixel_levels, rgb_pixels)
+            # downgraded to luma or brightness, a +/-1 dither step means nothing on the ring
+            force = force and len(levels) == RGB_FRAME_LEVELS
+            if not force and not self.change_filter.is_significant(levels, time.monotonic()):
+                # the ring already shows (nearly) this; an older pending frame is stale too
+                self._frames_suppressed.inc()
+                self._clear_pending()
+                return False
+            self._set_pending(levels)
+            self._pending_trace = trace
+        return self.flush_pending()
+
+    def flush_pending(self):
+        """Writes the pending frame if the budget allows now. Safe to call from a timer or any thread."""
+        with self._frame_lock:
+            frame = self._pending_frame
+            if frame is None:
+                return False
+            now = time.monotonic()
+            if self._pending_seq is None and self._frame_seq() is not None:
+                # encoded before the firmware announced itself
+                self._set_pending(self._pending_levels)
+                frame = self._pending_frame
+            self._refill_tokens(now)
+            min_interval = 1.0 / self.frame_rate_for(len(frame))
+            if now - self._last_frame_time < min_interval or self._tokens < len(frame) or self._write_lock.locked():
+                self._frames_deferred.inc()
+                return False
+            # take the frame (and its slot) so no other thread writes it too while we are in I/O
+            levels, seq, trace = self._pending_levels, self._pending_seq, self._pending_trace
+            previous_frame_time, self._last_frame_time = self._last_frame_time, now
+            self._clear_pending()
+
+        written = self._write(frame)
+        with self._frame_lock:
+            if not written:
+                if self._pending_frame is None:
+                    # nothing newer meanwhile: keep it for the next flush
+                    self._pending_levels, self._pending_seq, self._pending_frame = levels, seq, frame
+                    self._pending_trace = trace
+                    self._last_frame_time = previous_frame_time
+                return False
+            if trace is not None and self.latency_tracer is not None:
+                self.latency_tracer.mark(trace, STAGE_SERIAL_WRITE)
+                self.latency_tracer.finish(trace)
+            self._track_frame(seq, now)
+            self.change_filter.mark_sent(levels, now)
+            self._last_levels = levels
+            self._ring_version += 1
+            return True
+
+    # ------------------------------
+    # Baud rate negotiation
+    # ------------------------------
+    def negotiate_baudrate(self, target_baudrate):
+        """
+        Asks the firmware to switch to target_baudrate ("B<baud>" line) and follows it once
+        the acknowledgement arrives. Stays at the current rate if the device does not answer
+        (old firmware, or still booting after the port opened). Returns the active baud rate.
+        A "B" line may still be handled after the host gave up, so a timeout ends with a
+        re-check of which of the two rates the device actually answers on.
+        """
+        if not self.is_connected() or target_baudrate == self._baudrate:
+            return self._baudrate
+        if target_baudrate not in SUPPORTED_BAUDRATES:
+            print("SerialCom: unsupported baud rate", target_baudrate)
+            return self._baudrate
+
+        command = f"{BAUD_COMMAND_PREFIX}{target_baudrate}"
+        with self._write_lock:
+            return self._negotiate_locked(command, target_baudrate)
+
+    def _negotiate_locked(self, command, target_baudrate):
+        # the reader thread hands the "B<baud>" answer over through _baud_ack_event
+        previous_baudrate = self._baudrate
+        try:
+            for _ in range(BAUD_NEGOTIATION_ATTEMPTS):
+                self._baud_ack_event.clear()
+                self._conn.write(f"{command}\n".encode("ascii"))
+                self._conn.flush()
+                if self._baud_ack_event.wait(BAUD_ACK_TIMEOUT_S) and self._baud_ack == command:
+                    time.sleep(BAUD_SWITCH_SETTLE_S)
+                    self._follow_baudrate(target_baudrate)
+                    return self._baudrate
+            self._recheck_baudrate_locked(target_baudrate)
+        except Exception as e:
+            # a probe may have left the port at the other rate; a closed port (_conn None) also lands here
+            print("SerialCom: baud negotiation failed:", e)
+            conn = self._conn
+            if conn is not None and conn.is_open and conn.baudrate != previous_baudrate:
+                try:
+                    conn.baudrate = previous_baudrate
+                except Exception:
+                    pass
+            self._link_failed(e)
+        return self._baudrate
+
+    def _recheck_baudrate_locked(self, target_baudrate):
+        # a "B" handled after we gave up switches the device on its own: take a late
+        # acknowledgement, then probe the target rate and the current one (the leading newline
+        # ends any half-received line) and follow whichever rate the device answers on
+        target_ack = f"{BAUD_COMMAND_PREFIX}{target_baudrate}"
+        previous_baudrate = self._baudrate
+        if self._baud_ack_event.is_set() and self._baud_ack == target_ack:
+            self._follow_baudrate(target_baudrate)
+            return
+        for baudrate in (target_baudrate, previous_baudrate):
+            command = f"{BAUD_COMMAND_PREFIX}{baudrate}"
+            self._baud_ack_event.clear()
+            self._conn.baudrate = baudrate
+            self._conn.write(f"\n{command}\n".encode("ascii"))
+            self._conn.flush()
+            if not self._baud_ack_event.wait(BAUD_ACK_TIMEOUT_S):
+                continue
+            if self._baud_ack == target_ack:
+                # answered on the target rate, or the queued "B" was only handled now
+                time.sleep(BAUD_SWITCH_SETTLE_S)
+                self._follow_baudrate(target_baudrate)
+                return
+            if self._baud_ack == command:
+                break
+        self._conn.baudrate = previous_baudrate
+        print(f"SerialCom: no answer to {target_ack}, staying at {previous_baudrate} baud")
+
+    def _follow_baudrate(self, baudrate):
+        self._conn.baudrate = baudrate
+        self._baudrate = baudrate
+        self._negotiated_baudrate = baudrate
+        self._reset_budget()
+        print(f"SerialCom: switched to {baudrate} baud")
@@ -0,0 +1,249 @@
+# serial_group.py
+"""
+Serial device group: one audio stream fanned out to several Arduinos (one LED ring each).
+Responsibility:
+ - Open several ports, each with its own SerialCom (budget, change suppression, baud).
+ - Map the shared frame to each device: which channel it follows (left / right / mix),
+   a gain, and which slice of a group-wide pixel array it shows.
+ - Write to every device from its own writer thread so a slow or stalled port never
+   delays the others or the UI.
+ - Keep per-device health counters (published, overwritten, written, failed, last error).
+Design rationale:
+ - Each writer has a single-slot mailbox (latest wins): publish() replaces any frame the
+   writer has not picked up yet, so a slow device shows the freshest frame, not a backlog.
+ - The mapping lives in a JSON file next to the app (SERIAL_DEVICES_FILE), so an
+   installation can be rewired without code changes; without the file the app keeps
+   using the single port picked in the combo box. Ports the group owns are left out of
+   the combo box, so no second handle ever writes to them.
+"""
+import os
+import json
+import time
+import threading
+
+from serial_com import SerialCom, NUM_PIXELS
+from metrics import MetricsRegistry
+
+SERIAL_DEVICES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "serial_devices.json")
+CHANNEL_LEFT = "left"
+CHANNEL_RIGHT = "right"
+CHANNEL_MIX = "mix"
+WRITER_IDLE_WAKEUP_S = 0.02   # writers wake up this often to flush frames held back by the budget
+WRITER_JOIN_TIMEOUT_S = 1.0
+
+
+class DeviceMapping:
+    def __init__(self, port, gain=1.0, channel=CHANNEL_MIX, pixel_range=None, baudrate=9600, target_baudrate=None):
+        self.port = port
+        self.gain = gain
+        self.channel = channel
+        # (start, stop) slice of the group pixel array shown by this ring; None = brightness only
+        self.pixel_range = tuple(pixel_range) if pixel_range else None
+        self.baudrate = baudrate
+        self.target_baudrate = target_baudrate
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(entry["port"], entry.get("gain", 1.0), entry.get("channel", CHANNEL_MIX),
+                   entry.get("pixel_range"), entry.get("baudrate", 9600), entry.get("target_baudrate"))
+
+    def channel_value(self, left, right):
+        """Normalized (0..1) input this device follows, after gain."""
+        if self.channel == CHANNEL_LEFT:
+            value = left
+        elif self.channel == CHANNEL_RIGHT:
+            value = right
+        else:
+            value = (left + right) / 2.0
+        return max(0.0, min(1.0, value * self.gain))
+
+    def pixel_slice(self, pixel_levels):
+        """This device's part of the group pixel array, scaled by gain and resampled to NUM_PIXELS."""
+        if self.pixel_range is None or pixel_levels is None:
+            return None
+        start, stop = self.pixel_range
+        part = pixel_levels[start:stop]
+        if not len(part):
+            return None
+        step = len(part) / NUM_PIXELS
+        return [min(255, int(part[int(i * step)] * self.gain)) for i in range(NUM_PIXELS)]
+
+
+class _DeviceHealth:
+    def __init__(self, metrics, port):
+        labels = {"device": port}
+        self.published = metrics.counter("serial_device_frames_published_total",
+                                         "Frames handed to a device writer", labels)
+        self.overwritten = metrics.counter("serial_device_frames_overwritten_total",
+                                           "Frames replaced before the device writer picked them up", labels)
+        self.written = metrics.counter("serial_device_frames_written_total",
+                                       "Frames written to a device", labels)
+        self.failed = metrics.counter("serial_device_write_failures_total",
+                                      "Published frames that raised or found the port closed", labels)
+        self.write_seconds = metrics.histogram("serial_device_write_seconds",
+                                               "Time one device write took", labels=labels)
+        self.last_error = None
+        self.last_write_time = None
+
+
+class SerialDevice:
+    """One port, its mapping and its writer thread."""
+
+    def __init__(self, mapping: DeviceMapping, metrics: MetricsRegistry):
+        self.mapping = mapping
+        self.serial = SerialCom(baudrate=mapping.baudrate, metrics=metrics, metric_labels={"device": mapping.port})
+        self.health = _DeviceHealth(metrics, mapping.port)
+        self._mailbox = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def open(self):
+        if not self.serial.connect(self.mapping.port):
+            self.health.last_error = "connect failed"
+            return False
+        self._running = True
+        self._thread = threading.Thread(target=self._writer, name=f"serial-writer {self.mapping.port}", daemon=True)
+        self._thread.start()
+        return True
+
+    def close(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=WRITER_JOIN_TIMEOUT_S)
+            self._thread = None
+        self.serial.disconnect()
+
+    def publish(self, brightness, pixel_levels):
+        """Never blocks on I/O: drops the frame into the mailbox, replacing an unsent one."""
+        with self._condition:
+            if self._mailbox is not None:
+                self.health.overwritten.inc()
+            self._mailbox = (brightness, pixel_levels)
+            self.health.published.inc()
+            self._condition.notify()
+
+    def _writer(self):
+        if self.mapping.target_baudrate:
+            self.serial.negotiate_baudrate(self.mapping.target_baudrate)
+        while True:
+            with self._condition:
+                if self._mailbox is None and self._running:
+                    self._condition.wait(WRITER_IDLE_WAKEUP_S)
+                if not self._running:
+                    return
+                frame, self._mailbox = self._mailbox, None
+            self._write(frame)
+
+    def _write(self, frame):
+        start = time.perf_counter()
+        try:
+            if frame is None:
+                # nothing new: give a frame held back by the budget its chance
+                written = self.serial.flush_pending()
+            else:
+                written = self.serial.send_frame(*frame)
+        except Exception as e:
+            self.health.failed.inc()
+            self.health.last_error = str(e)
+            return
+        if not self.serial.is_connected():
+            # link-down state shows in connected/reconnecting; idle wakeups are not failures
+            if frame is not None:
+                self.health.failed.inc()
+            self.health.last_error = "link down, reconnecting" if self.serial.is_reconnecting() else "port closed"
+            return
+        if written:
+            self.health.written.inc()
+            self.health.last_write_time = time.time()
+            self.health.write_seconds.observe(time.perf_counter() - start)
+
+    def health_report(self):
+        return {
+            "port": self.mapping.port,
+            "connected": self.serial.is_connected(),
+            "reconnecting": self.serial.is_reconnecting(),
+            "uptime_s": self.serial.link_uptime_s(),
+            "device_on": self.serial.device_on,
+            "firmware_version": self.serial.firmware_version,
+            "last_rtt_ms": None if self.serial.last_rtt_s is None else self.serial.last_rtt_s * 1000.0,
+            "baudrate": self.serial.baudrate,
+            "published": int(self.health.published.value),
+            "overwritten": int(self.health.overwritten.value),
+            "written": int(self.health.written.value),
+            "failed": int(self.health.failed.value),
+            "last_error": self.health.last_error,
+            "last_write_time": self.health.last_write_time,
+        }
+
+
+class SerialDeviceGroup:
+    def __init__(self, metrics: MetricsRegistry = None, luts=None):
+        self._metrics = metrics or MetricsRegistry()
+        # led_lut.LedLuts: channel levels go through the configured mapping and gamma (None: linear)
+        self._luts = luts
+        self._devices = {}
+
+    @property
+    def devices(self):
+        return list(self._devices.values())
+
+    def __len__(self):
+        return len(self._devices)
+
+    def owns_port(self, port):
+        """True if port, or the device a configured symlink (e.g. /dev/serial/by-id/...) points to, is in the group."""
+        resolved = os.path.realpath(port)
+        return any(os.path.realpath(device_port) == resolved for device_port in self._devices)
+
+    def load_config(self, path=SERIAL_DEVICES_FILE):
+        """Adds the devices listed in a JSON file ([{"port": ..., "gain": ..., ...}]). Returns how many."""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            for entry in entries:
+                self.add_device(DeviceMapping.from_dict(entry))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print("SerialDeviceGroup: could not load", path, e)
+        return len(self._devices)
+
+    def add_device(self, mapping: DeviceMapping):
+        if mapping.port in self._devices:
+            self.remove_device(mapping.port)
+        device = SerialDevice(mapping, self._metrics)
+        self._devices[mapping.port] = device
+        return device
+
+    def remove_device(self, port):
+        device = self._devices.pop(port, None)
+        if device:
+            device.close()
+
+    def open_all(self):
+        """Opens every port; a port that fails to open does not stop the others. Returns the open count."""
+        return sum(1 for device in self._devices.values() if device.open())
+
+    def close_all(self):
+        for device in self._devices.values():
+            device.close()
+
+    def publish(self, left, right, pixel_levels=None):
+        """
+        Fans one frame out to every device. left / right are normalized (0..1) channel levels,
+        pixel_levels an optional group-wide pixel array that devices slice by pixel_range.
+        """
+        for device in self._devices.values():
+            mapping = device.mapping
+            value = mapping.channel_value(left, right)
+            if self._luts is not None:
+                brightness = self._luts.brightness_byte(self._luts.map_amplitude(value))
+            else:
+                brightness = int(value * 255)
+            device.publish(brightness, mapping.pixel_slice(pixel_levels))
+
+    def health(self):
+        return [device.health_report() for device in self._devices.values()]
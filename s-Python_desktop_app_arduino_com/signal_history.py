@@ -0,0 +1,72 @@
+# signal_history.py
+"""
+Fixed-size history of the LED signal chain, for tuning the README parameters.
+Responsibility:
+ - Keep the last HISTORY_SECONDS of a few series (raw, normalized, held, eased: one row per
+   animation tick) in a preallocated NumPy ring buffer.
+ - Reduce any span of it to one (min, max) pair per display column, so a plot draws
+   `width` vertical strokes per series no matter how many samples the span holds.
+Design rationale:
+ - One writer (the animation engine thread, or the poll tick when the engine is off), any
+   number of readers. A row is written before the write index moves, so a reader sees at
+   worst the one row being overwritten as it copies; for a plot that is invisible.
+ - Min/max (not mean) decimation keeps short peaks visible: a 1-frame transient at 60 Hz
+   still shows up as a full-height stroke when 60 s are squeezed into 400 pixels.
+"""
+import numpy as np
+
+HISTORY_SECONDS = 60.0
+SERIES_NAMES = ("raw", "normalized", "held", "eased")
+
+
+class SignalHistory:
+    def __init__(self, rate_hz, seconds=HISTORY_SECONDS, series=SERIES_NAMES):
+        self.rate_hz = float(rate_hz)
+        self.series = tuple(series)
+        self.capacity = max(1, int(round(self.rate_hz * seconds)))
+        self._data = np.zeros((self.capacity, len(self.series)), dtype=np.float32)
+        self._written = 0   # rows ever appended; the next row goes to _written % capacity
+
+    def __len__(self):
+        return min(self._written, self.capacity)
+
+    def clear(self):
+        self._written = 0
+
+    def append(self, values):
+        """One row: a value per series."""
+        self._data[self._written % self.capacity] = values
+        self._written += 1
+
+    def latest(self, count):
+        """The last count rows (oldest first) as a copy, shape (<= count, num_series)."""
+        written = self._written
+        count = min(count, written, self.capacity)
+        start = (written - count) % self.capacity
+        if start + count <= self.capacity:
+            return self._data[start:start + count].copy()
+        return np.concatenate((self._data[start:], self._data[:start + count - self.capacity]))
+
+    def decimate(self, columns, seconds=HISTORY_SECONDS):
+        """
+        The last `seconds` reduced to `columns` buckets. Returns (mins, maxs), each shaped
+        (filled, num_series) with filled <= columns: the rightmost columns are the newest,
+        and a history shorter than the span fills only the right part of the plot. A span
+        holding fewer rows than columns repeats each row over the columns it covers, so
+        column x always maps to the same time.
+        """
+        span = max(1, min(int(round(seconds * self.rate_hz)), self.capacity))
+        columns = max(1, int(columns))
+        rows = self.latest(span)
+        if len(rows) == 0:
+            empty = np.zeros((0, len(self.series)), dtype=np.float32)
+            return empty, empty
+
+        # bucket k of the full span covers rows [k * span / columns, (k + 1) * span / columns),
+        # shifted so that row 0 is the oldest row we actually have
+        edges = (np.arange(columns + 1) * span) // columns - (span - len(rows))
+        starts, ends = edges[:-1], edges[1:]
+        # drop buckets from before the history began; an empty bucket shows the row it falls in
+        starts = np.maximum(starts[(ends > 0) | (starts >= 0)], 0)
+        # reduceat over equal consecutive starts yields rows[start], the covering row
+        return np.minimum.reduceat(rows, starts, axis=0), np.maximum.reduceat(rows, starts, axis=0)
@@ -0,0 +1,180 @@
+# spectral_analyzer.py
+"""
+Streaming multi-band spectral analyzer.
+Responsibility:
+ - Take int16 audio chunks as they arrive (Furhat speaker stream, mono or interleaved
+   stereo) and cut them into overlapping blocks (BLOCK_SIZE samples every HOP_SIZE).
+ - Window each block, rfft it and sum the power into NUM_BANDS log-spaced bands
+   (one per ring pixel), then smooth every band with separate attack / release times.
+ - Publish the latest band levels (0..1, dB-scaled between LEVEL_FLOOR_DB and 0 dBFS) for
+   the LED animation engine and the intensity canvas.
+ - Optionally hand every block, reduced to SPECTROGRAM_ROWS log-spaced rows of 8-bit
+   levels, to column listeners (the spectrogram view).
+Design rationale:
+ - Everything that depends only on the parameters is computed once: the Hann window, its
+   normalisation and the FFT bin where each band starts. A chunk is handled with one
+   batched rfft over all of its complete blocks and one np.add.reduceat for the bands.
+ - Samples that do not fill a block are carried over to the next chunk, so block
+   boundaries do not depend on how the stream is chunked.
+ - At 16 kHz a 512-sample block with 50 % overlap is 62.5 blocks per second per stream:
+   about a millisecond of CPU per second of audio (see benchmarks.py, group "spectrum").
+ - process() runs on the event loop; readers on other threads (the animation engine)
+   only ever see a complete array, because levels are replaced, never updated in place.
+   Column listeners are called on the event loop too, once per chunk with all its blocks,
+   and the spectrogram rows are only computed while someone listens.
+"""
+import time
+import functools
+import numpy as np
+
+from metrics import MetricsRegistry
+from serial_com import NUM_PIXELS
+
+SPECTRUM_SAMPLE_RATE = 16000
+BLOCK_SIZE = 512                 # samples per FFT block (32 ms at 16 kHz)
+HOP_SIZE = 256                   # 50 % overlap
+NUM_BANDS = NUM_PIXELS
+BAND_MIN_HZ = 100.0
+BAND_MAX_HZ = 7000.0
+LEVEL_FLOOR_DB = -60.0           # band level 0 .. 1 spans LEVEL_FLOOR_DB .. 0 dBFS
+ATTACK_S = 0.015
+RELEASE_S = 0.200
+STALE_AFTER_S = 0.5              # levels older than this are not used (stream stopped)
+SPECTROGRAM_ROWS = 128           # log-spaced rows per spectrogram column
+
+INT16_FULL_SCALE = 32768.0
+
+
+@functools.lru_cache(maxsize=4)
+def build_window(block_size=BLOCK_SIZE):
+    """Hann window scaled so a full-scale sine reads 0 dBFS in its bin."""
+    window = np.hanning(block_size).astype(np.float32)
+    return window * np.float32(2.0 / (window.sum() * INT16_FULL_SCALE))
+
+
+@functools.lru_cache(maxsize=4)
+def build_band_starts(sample_rate=SPECTRUM_SAMPLE_RATE, block_size=BLOCK_SIZE, num_bands=NUM_BANDS,
+                      min_hz=BAND_MIN_HZ, max_hz=BAND_MAX_HZ):
+    """
+    First rfft bin of each band (len num_bands + 1, last = end of the top band).
+    Edges are log-spaced; narrow low bands are widened to at least one bin each.
+    """
+    bins = block_size // 2 + 1
+    edges = np.geomspace(min_hz, min(max_hz, sample_rate / 2.0), num_bands + 1) * block_size / sample_rate
+    starts = np.round(edges).astype(np.intp)
+    for i in range(1, len(starts)):
+        starts[i] = max(starts[i], starts[i - 1] + 1)
+    return np.minimum(starts, bins - 1)
+
+
+def smoothing_coefficient(time_constant_s, hop_size=HOP_SIZE, sample_rate=SPECTRUM_SAMPLE_RATE):
+    """One-pole coefficient per hop: level += (1 - c) * (target - level)."""
+    return float(np.exp(-hop_size / (sample_rate * time_constant_s)))
+
+
+class SpectralAnalyzer:
+    def __init__(self, sample_rate=SPECTRUM_SAMPLE_RATE, channels=1, metrics: MetricsRegistry = None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+        # Precomputed once per parameter set
+        self._window = build_window(BLOCK_SIZE)
+        self._band_starts = build_band_starts(sample_rate, BLOCK_SIZE, NUM_BANDS)
+        self._attack = smoothing_coefficient(ATTACK_S, HOP_SIZE, sample_rate)
+        self._release = smoothing_coefficient(RELEASE_S, HOP_SIZE, sample_rate)
+
+        # Streaming state
+        self._carry = np.zeros(0, dtype=np.float32)   # mono samples not yet in a full hop
+        self._partial_frame = np.zeros(0, dtype=np.float32)   # interleaved samples of an incomplete frame
+        self._smoothed = np.zeros(NUM_BANDS, dtype=np.float32)
+        self._levels = self._smoothed.copy()
+        self._updated_at = None
+        self._column_listeners = []
+        self._row_starts = build_band_starts(sample_rate, BLOCK_SIZE, SPECTROGRAM_ROWS)
+
+        metrics = metrics or MetricsRegistry()
+        self._blocks = metrics.counter("spectrum_blocks_total", "FFT blocks analysed")
+        self._process_seconds = metrics.histogram("spectrum_process_seconds", "Time to analyse one audio chunk")
+
+    @property
+    def levels(self):
+        """Latest smoothed band levels (NUM_BANDS floats 0..1); do not modify."""
+        return self._levels
+
+    @property
+    def is_active(self):
+        return self._updated_at is not None and time.monotonic() - self._updated_at < STALE_AFTER_S
+
+    def latest_levels(self):
+        """Band levels if audio arrived recently, None otherwise; safe from any thread."""
+        return self._levels if self.is_active else None
+
+    def add_column_listener(self, listener):
+        """listener(columns): uint8 array (blocks, SPECTROGRAM_ROWS), lowest frequency first, 0..255 = floor..0 dBFS."""
+        self._column_listeners.append(listener)
+
+    def remove_column_listener(self, listener):
+        if listener in self._column_listeners:
+            self._column_listeners.remove(listener)
+
+    def reset(self):
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._partial_frame = np.zeros(0, dtype=np.float32)
+        self._smoothed = np.zeros(NUM_BANDS, dtype=np.float32)
+        self._levels = self._smoothed.copy()
+        self._updated_at = None
+
+    def process_bytes(self, raw):
+        """Little-endian int16 PCM (interleaved when channels > 1)."""
+        return self.process(np.frombuffer(raw, dtype='<i2'))
+
+    def process(self, samples):
+        """
+        Adds int16 samples (interleaved when channels > 1) to the stream and analyses every
+        block completed by them. Returns the band levels after the chunk.
+        """
+        with self._process_seconds.time():
+            mono = np.asarray(samples, dtype=np.float32)
+            if self.channels > 1:
+                if len(self._partial_frame):
+                    mono = np.concatenate((self._partial_frame, mono))
+                usable = len(mono) - len(mono) % self.channels
+                self._partial_frame = mono[usable:].copy()
+                mono = mono[:usable].reshape(-1, self.channels).mean(axis=1)
+            stream = np.concatenate((self._carry, mono)) if len(self._carry) else mono
+
+            count = (len(stream) - BLOCK_SIZE) // HOP_SIZE + 1 if len(stream) >= BLOCK_SIZE else 0
+            if count <= 0:
+                self._carry = stream
+                return self._levels
+
+            blocks = np.lib.stride_tricks.sliding_window_view(stream, BLOCK_SIZE)[:count * HOP_SIZE:HOP_SIZE]
+            spectrum = np.fft.rfft(blocks * self._window, axis=1)
+            power = spectrum.real ** 2 + spectrum.imag ** 2
+            band_power = np.add.reduceat(power[:, :self._band_starts[-1]], self._band_starts[:-1], axis=1)
+            targets = np.clip(1.0 - 10.0 * np.log10(band_power + 1e-12) / LEVEL_FLOOR_DB, 0.0, 1.0)
+
+            smoothed = self._smoothed
+            for target in targets.astype(np.float32):
+                coefficient = np.where(target > smoothed, self._attack, self._release).astype(np.float32)
+                smoothed = target + coefficient * (smoothed - target)
+            self._smoothed = smoothed
+
+            self._carry = stream[count * HOP_SIZE:].copy()
+            self._levels = smoothed.copy()
+            self._updated_at = time.monotonic()
+            self._blocks.inc(count)
+
+            if self._column_listeners:
+                self._emit_columns(power)
+        return self._levels
+
+    def _emit_columns(self, power):
+        rows = np.maximum.reduceat(power[:, :self._row_starts[-1]], self._row_starts[:-1], axis=1)
+        levels = np.clip(1.0 - 10.0 * np.log10(rows + 1e-12) / LEVEL_FLOOR_DB, 0.0, 1.0)
+        columns = (levels * 255.0).astype(np.uint8)
+        for listener in list(self._column_listeners):
+            try:
+                listener(columns)
+            except Exception as e:
+                print("SpectralAnalyzer: column listener failed:", e)
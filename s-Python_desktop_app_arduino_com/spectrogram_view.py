@@ -0,0 +1,110 @@
+# spectrogram_view.py
+"""
+SpectrogramView (SpectrogramWidget):
+ - Live spectrogram of the analysed audio stream: one column per FFT hop, newest on the
+   right, lowest frequency at the bottom.
+ - Columns come from SpectralAnalyzer column listeners as 8-bit levels and are written
+   straight into a preallocated Indexed8 QImage; the colour table is the colormap LUT,
+   so no per-pixel colour conversion happens in Python.
+Design rationale:
+ - The image is a ring: a column overwrites the oldest one and the paint draws the two
+   halves side by side, so scrolling never moves pixel data.
+ - Writes only mark the widget dirty; a display-rate timer turns that into at most one
+   repaint per refresh interval however many hops arrived, so a burst of audio costs a
+   few array stores on the loop, not a burst of repaints.
+"""
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QImage
+from PySide6.QtCore import QRectF, QTimer
+
+from spectral_analyzer import SPECTROGRAM_ROWS, SPECTRUM_SAMPLE_RATE, HOP_SIZE
+
+SPECTROGRAM_COLUMNS = 512          # hops kept on screen (about 8 s at 16 kHz / 256)
+SPECTROGRAM_HEIGHT = 100
+REFRESH_INTERVAL_MS = 16           # ~60 FPS
+
+# Colormap stops (level 0..1 -> colour); dark at the floor, bright near 0 dBFS
+COLORMAP_STOPS = (
+    (0.00, (0, 0, 4)),
+    (0.25, (60, 15, 110)),
+    (0.50, (150, 40, 120)),
+    (0.75, (240, 110, 50)),
+    (1.00, (252, 255, 164)),
+)
+
+
+def build_colormap(stops=COLORMAP_STOPS, size=256):
+    """size ARGB values for QImage.setColorTable."""
+    x = np.linspace(0.0, 1.0, size)
+    positions = [position for position, _ in stops]
+    r, g, b = (np.interp(x, positions, [color[channel] for _, color in stops]).astype(np.uint32)
+               for channel in range(3))
+    return [int(value) for value in (0xFF000000 | (r << 16) | (g << 8) | b)]
+
+
+class SpectrogramWidget(QWidget):
+    def __init__(self, rows=SPECTROGRAM_ROWS, columns=SPECTROGRAM_COLUMNS, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+        self.columns = columns
+        self.setMinimumHeight(SPECTROGRAM_HEIGHT)
+        self.setToolTip(f"Last {columns * HOP_SIZE / SPECTRUM_SAMPLE_RATE:.1f} s of audio spectrum")
+
+        # Preallocated pixel ring; the QImage shares its memory (keep self._pixels alive)
+        self._pixels = np.zeros((rows, columns), dtype=np.uint8)
+        self._image = QImage(self._pixels.data, columns, rows, columns, QImage.Format_Indexed8)
+        self._image.setColorTable(build_colormap())
+        self._write_x = 0
+        self._dirty = False
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self._on_refresh)
+        self._refresh_timer.start()
+
+    def push_columns(self, columns):
+        """columns: uint8 (count, rows), lowest frequency first. Cheap; repaint happens on the timer."""
+        count = len(columns)
+        if count == 0:
+            return
+        if count > self.columns:
+            columns = columns[-self.columns:]
+            count = self.columns
+        # image row 0 is the top: highest frequency
+        block = columns[:, ::-1].T
+        end = self._write_x + count
+        if end <= self.columns:
+            self._pixels[:, self._write_x:end] = block
+        else:
+            split = self.columns - self._write_x
+            self._pixels[:, self._write_x:] = block[:, :split]
+            self._pixels[:, :end - self.columns] = block[:, split:]
+        self._write_x = end % self.columns
+        self._dirty = True
+
+    def clear(self):
+        self._pixels[:] = 0
+        self._write_x = 0
+        self._dirty = True
+
+    def _on_refresh(self):
+        if self._dirty and self.isVisible():
+            self._dirty = False
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        width, height = self.width(), self.height()
+        if width <= 0 or height <= 0:
+            painter.end()
+            return
+        scale = width / self.columns
+        # oldest columns (from the write position to the end) on the left, newest on the right
+        older = self.columns - self._write_x
+        painter.drawImage(QRectF(0, 0, older * scale, height), self._image,
+                          QRectF(self._write_x, 0, older, self.rows))
+        if self._write_x:
+            painter.drawImage(QRectF(older * scale, 0, self._write_x * scale, height), self._image,
+                              QRectF(0, 0, self._write_x, self.rows))
+        painter.end()
@@ -9,11 +9,13 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QSize
 
-from plot_view import AudioIntensityCanvas
-
 WINDOW_WIDTH = 400
-WINDOW_HEIGHT = 720
+WINDOW_HEIGHT = 1000
 WINDOW_TITLE = "Modular PySide6 For Research Projects"
+PROFILE_BUTTON_START_TEXT = "Start profiling"
+PROFILE_BUTTON_STOP_TEXT = "Stop profiling"
+PLOT_AREA_INDEX = 2                                   # plot widgets go after title and description
+PLOT_AREA_SLOTS = ("plot", "led_preview", "spectrogram", "history")  # top to bottom
 
 class View(QMainWindow):
     def __init__(self, model):
@@ -43,6 +45,7 @@ class View(QMainWindow):
         self.combo_box = QComboBox()
         self.combo_result_label = QLabel("Select Arduino Port")
         self.combo_box.addItems([])  # Controller will populate
+        self.button_profile = QPushButton(PROFILE_BUTTON_START_TEXT)
 
         self.async_status_label = QLabel("Waiting for async call...")
 
@@ -56,22 +59,40 @@ class View(QMainWindow):
         self.layout.addWidget(self.combo_result_label)
         self.layout.addWidget(self.combo_box)
         self.layout.addWidget(self.async_status_label)
+        self.layout.addWidget(self.button_profile)
         self.layout.addStretch()
 
-        # Plot area placeholder (view owns insertion)
-        self._plot_widget = None
+        # Plot area placeholders (view owns insertion): slot name -> widget
+        self._plot_area = {}
 
     # small API so Controller doesn't touch layout indices
     def set_plot_widget(self, widget):
         """Place or replace the plot widget at a known position near the top."""
-        if self._plot_widget:
-            self.layout.removeWidget(self._plot_widget)
-            self._plot_widget.setParent(None)
-            self._plot_widget = None
+        self._set_plot_area_widget("plot", widget)
+
+    def set_led_preview_widget(self, widget):
+        """Place or replace the virtual LED ring, right below the intensity plot."""
+        self._set_plot_area_widget("led_preview", widget)
+
+    def set_spectrogram_widget(self, widget):
+        """Place or replace the spectrogram, below the LED ring preview."""
+        self._set_plot_area_widget("spectrogram", widget)
 
-        self._plot_widget = widget
-        # insert near top after title and description -> index 2
-        self.layout.insertWidget(2, self._plot_widget)
+    def set_history_widget(self, widget):
+        """Place or replace the signal history plot, below the spectrogram."""
+        self._set_plot_area_widget("history", widget)
+
+    def _set_plot_area_widget(self, slot, widget):
+        old = self._plot_area.pop(slot, None)
+        if old:
+            self.layout.removeWidget(old)
+            old.setParent(None)
+
+        # slots keep their order whichever is set first
+        position = PLOT_AREA_SLOTS.index(slot)
+        index = PLOT_AREA_INDEX + sum(1 for other in PLOT_AREA_SLOTS[:position] if other in self._plot_area)
+        self._plot_area[slot] = widget
+        self.layout.insertWidget(index, widget)
 
     # convenience setters for labels
     def set_combo_result_text(self, text):
@@ -79,3 +100,6 @@ class View(QMainWindow):
 
     def set_async_status(self, text):
         self.async_status_label.setText(text)
+
+    def set_profiling(self, running):
+        self.button_profile.setText(PROFILE_BUTTON_STOP_TEXT if running else PROFILE_BUTTON_START_TEXT)
@@ -13,10 +13,20 @@ import asyncio
 import struct
 from websockets.asyncio.client import connect
 
+from latency_trace import LatencyTracer
+from metrics import MetricsRegistry
+
 class WebSocketClient:
-    def __init__(self, url: str, out_queue: asyncio.Queue):
+    def __init__(self, url: str, out_queue: asyncio.Queue, tracer: LatencyTracer = None,
+                 metrics: MetricsRegistry = None):
         self.url = url
         self._out_queue = out_queue
+        # Optional latency tracer; each queued item is ((left, right), trace)
+        self._tracer = tracer
+        metrics = metrics or MetricsRegistry()
+        self._frames_received = metrics.counter("ws_frames_received_total", "WebSocket frames received")
+        self._frames_malformed = metrics.counter("ws_frames_malformed_total", "WebSocket frames that were not 4 bytes")
+        self._listener_errors = metrics.counter("ws_listener_errors_total", "WebSocket listener exits on error")
         self._ws = None
         self._listener_task = None
         self._processor_task = None
@@ -59,18 +69,22 @@ class WebSocketClient:
                 return
             while True:
                 frame = await self._ws.recv()
+                trace = self._tracer.start() if self._tracer else None
+                self._frames_received.inc()
                 # common format used in your project: two 16-bit little-endian ints
                 if len(frame) == 4:
                     left, right = struct.unpack('<hh', frame)
-                    await self._out_queue.put((left, right))
+                    await self._out_queue.put(((left, right), trace))
                 else:
                     # put a marker or ignore
-                    await self._out_queue.put((0, 0))
+                    self._frames_malformed.inc()
+                    await self._out_queue.put(((0, 0), trace))
         except asyncio.CancelledError:
             raise
         except Exception as e:
             # swallow/log, let caller decide what's next
             print("WebSocket listener error:", e)
+            self._listener_errors.inc()
         finally:
             self._is_fetching = False
 
@@ -91,8 +105,8 @@ class WebSocketClient:
         if self._listener_task and not self._listener_task.done():
             # already running
             return
-        self._listener_task = loop.create_task(self._listener())
-        self._processor_task = loop.create_task(self._processor())
+        self._listener_task = loop.create_task(self._listener(), name="ws-listener")
+        self._processor_task = loop.create_task(self._processor(), name="ws-processor")
 
     def stop_fetching(self):
         """Stop the internal tasks (non-blocking)."""
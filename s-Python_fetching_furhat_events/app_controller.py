@@ -9,6 +9,7 @@ from PySide6.QtWidgets import QApplication
 # Import Model and View classes from their respective files
 from model import AppModel 
 from view import AudioIntensityCanvas, View
+from wav_source import frame_rms
 
 # --- GLOBAL CONSTANTS ---
 PLOT_UPDATE_INTERVAL = 50 # 50ms = 20 FPS
@@ -33,16 +34,8 @@ class AppController:
         # ? Hiding plot while testing WS
         self.view.layout.insertWidget(6, self.view.intensity_plot) 
 
-        # 3. Load Audio Data and Set Frame Pointers (CORRECTED DATA ASSIGNMENT)
-        self.sample_rate, self.full_audio_samples = self.model.load_audio_samples(ASSET_AUDIO_URL)
-        
-        if self.full_audio_samples.size > 0:
-            # Calculate frame size based on update interval
-            self.samples_per_frame = int(self.sample_rate * (PLOT_UPDATE_INTERVAL / 1000.0))
-        else:
-            self.samples_per_frame = 1 # Safe fallback if no data loaded
-
-        self.current_sample_index = 0
+        # 3. Open the audio file as a looping, memory-mapped frame source
+        self.audio_source = self.model.open_audio_source(ASSET_AUDIO_URL, PLOT_UPDATE_INTERVAL)
         # 4. Initialize QTimer
         #self.plot_timer = QTimer()
         #self.plot_timer.setInterval(PLOT_UPDATE_INTERVAL)
@@ -152,8 +145,9 @@ class AppController:
             self.view.button_a.setText("▶️ Start Audio Plot")
             print("CONTROLLER: Audio visualization paused.")
         else:
-            # Reset the index to start from the beginning of the file
-            self.current_sample_index = 0
+            # Reset the source to start from the beginning of the file
+            if self.audio_source is not None:
+                self.audio_source.rewind()
             self.plot_timer.start()
             self.view.button_a.setText("⏸️ Pause Audio Plot")
             print("CONTROLLER: Audio visualization started.")
@@ -219,7 +213,7 @@ class AppController:
     # ======== 
     # --- Audio Visualization
 
-    def update_audio_bar_from_audio_file(self, data):
+    def update_audio_bar_from_audio_file(self):
         """
         Processes the next frame of audio data, updates the visualization,
         and sends the normalized intensity over serial.
@@ -227,30 +221,16 @@ class AppController:
         """
         
         # Ensure we have data
-        #total_samples = len(self.full_audio_samples) # from File
-        total_samples = data
-
-        if total_samples == 0 or self.full_audio_samples.size == 0:
+        if self.audio_source is None:
             self.view.intensity_plot.plot_frame_intensity(0, 0)
             return
 
         # 1. Retrieve Raw Audio Frame (Simulation of Input Stream)
-        start_index = self.current_sample_index
-        end_index = start_index + self.samples_per_frame
-        
-        # Handle circular wrapping
-        if end_index >= total_samples:
-            # Logic to wrap the frame back to the start of the audio array
-            frame = np.concatenate((self.full_audio_samples[start_index:], 
-                                    self.full_audio_samples[:end_index - total_samples]))
-            self.current_sample_index = end_index - total_samples
-        else:
-            frame = self.full_audio_samples[start_index:end_index]
-            self.current_sample_index += self.samples_per_frame
+        # The source loops by itself and returns views into the mapped file (two when wrapping)
+        frame_parts = self.audio_source.next_frame()
 
         # 2. Process Data (RMS Calculation & Normalization)
-        # Note: Must handle potential conversion to float/int types
-        raw_rms = np.sqrt(np.mean(frame.astype(float)**2))
+        raw_rms = frame_rms(frame_parts)
         MAX_16BIT = 32768.0 
         normalized_value = min(raw_rms / MAX_16BIT, 1.0) # Normalized from 0.0 to 1.0
         
@@ -263,49 +243,11 @@ class AppController:
         #rgd_bounded_val = int(normalized_value * 255)
         #self.model.send_serial_data(rgd_bounded_val)
 
-    def update_live_bar(self, data):
+    def update_live_bar(self):
         """
-        Processes the next frame of audio data, updates the visualization,
-        and sends the normalized intensity over serial.
-        (This method is connected to the QTimer's timeout signal).
+        Same as update_audio_bar_from_audio_file; kept for the timer wiring that uses this name.
         """
-        
-        # Ensure we have data
-        #total_samples = len(self.full_audio_samples) # from File
-        total_samples = data
-        
-        if total_samples == 0 or self.full_audio_samples.size == 0:
-            self.view.intensity_plot.plot_frame_intensity(0, 0)
-            return
-
-        # 1. Retrieve Raw Audio Frame (Simulation of Input Stream)
-        start_index = self.current_sample_index
-        end_index = start_index + self.samples_per_frame
-        
-        # Handle circular wrapping
-        if end_index >= total_samples:
-            # Logic to wrap the frame back to the start of the audio array
-            frame = np.concatenate((self.full_audio_samples[start_index:], 
-                                    self.full_audio_samples[:end_index - total_samples]))
-            self.current_sample_index = end_index - total_samples
-        else:
-            frame = self.full_audio_samples[start_index:end_index]
-            self.current_sample_index += self.samples_per_frame
-
-        # 2. Process Data (RMS Calculation & Normalization)
-        # Note: Must handle potential conversion to float/int types
-        raw_rms = np.sqrt(np.mean(frame.astype(float)**2))
-        MAX_16BIT = 32768.0 
-        normalized_value = min(raw_rms / MAX_16BIT, 1.0) # Normalized from 0.0 to 1.0
-        
-        # 3. Update View and Send Data to Model
-        
-        # A. Update View: Pass raw and normalized values to the plotter
-        self.view.intensity_plot.plot_frame_intensity(raw_rms, normalized_value)
-
-        # 4. Send to Arduino through the Serial port
-        #rgd_bounded_val = int(normalized_value * 255)
-        #self.model.send_serial_data(rgd_bounded_val)
+        self.update_audio_bar_from_audio_file()
     # =====================================================================
     # =====================================================================
     # ------ Serial Communication
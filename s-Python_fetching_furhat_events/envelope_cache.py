@@ -0,0 +1,114 @@
+# envelope_cache.py
+"""
+On-disk cache for analysis results of WAV assets (envelopes, LED tracks).
+Responsibility:
+ - Key every entry by a fingerprint of the audio asset plus a hash of the DSP parameters,
+   so a parameter change never returns stale data.
+ - Store arrays as .npy files and hand them back memory-mapped (np.load mmap_mode="r").
+ - Keep the directory under a size budget with least-recently-used eviction.
+Design rationale:
+ - The same stimulus WAVs are replayed across study sessions; analysing them again on
+   every start is wasted work.
+ - Recency is the entry's mtime (touched on every hit), so no separate LRU bookkeeping
+   has to survive crashes.
+ - The fingerprint is the asset name, its size and a hash of its first FINGERPRINT_HEAD_BYTES
+   (the WAV header and the first block of samples), so a warm start reads only that much
+   instead of hashing the whole file. An edit that keeps the name, the size and the first
+   block unchanged is not noticed; clear the cache directory after such an edit.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".envelope_cache")
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = ".npy"
+FINGERPRINT_HEAD_BYTES = 64 * 1024
+
+
+def fingerprint(name: str, size: int, head: bytes) -> str:
+    """Cheap asset key: name, total size and the first FINGERPRINT_HEAD_BYTES of the file."""
+    digest = hashlib.sha256(f"{name}\0{size}\0".encode("utf-8"))
+    digest.update(head[:FINGERPRINT_HEAD_BYTES])
+    return digest.hexdigest()
+
+
+def params_digest(params: dict) -> str:
+    """Stable hash of a DSP parameter set."""
+    encoded = json.dumps(params, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class EnvelopeCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # ------------------------------
+    # Entries
+    # ------------------------------
+    def _entry_path(self, content_digest: str, params: dict, name: str) -> str:
+        file_name = f"{content_digest[:32]}-{params_digest(params)}-{name}{ENTRY_SUFFIX}"
+        return os.path.join(self.cache_dir, file_name)
+
+    def get(self, content_digest: str, params: dict, name: str):
+        """Returns the cached array memory-mapped read-only, or None on a miss."""
+        path = self._entry_path(content_digest, params, name)
+        try:
+            array = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        # mark as recently used; a read-only or shared cache directory still serves hits
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return array
+
+    def put(self, content_digest: str, params: dict, name: str, array):
+        """Stores an array (atomically) and returns it memory-mapped from the cache."""
+        path = self._entry_path(content_digest, params, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(array))
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return np.load(path, mmap_mode="r")
+
+    def get_or_compute(self, content_digest: str, params: dict, name: str, compute):
+        """Cache lookup; on a miss calls compute() and stores its result."""
+        array = self.get(content_digest, params, name)
+        if array is not None:
+            return array
+        return self.put(content_digest, params, name, compute())
+
+    # ------------------------------
+    # Eviction
+    # ------------------------------
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(ENTRY_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def evict(self, keep: str = None):
+        """Deletes least-recently-used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                print("EnvelopeCache: eviction failed:", e)
@@ -0,0 +1,109 @@
+# envelope_track.py
+"""
+Precomputed loudness envelope for a whole audio file.
+Responsibility:
+ - Compute the RMS envelope of a file once, at load time, fully vectorized:
+   samples are reshaped into (hops, hop_size) blocks and a moving sum over hops
+   turns the per-hop energy into a sliding-window RMS.
+ - Turn the envelope into an LED track (README steps 2-3: decaying peak normalization
+   and exponential perceptual mapping) as 0..255 brightness values.
+ - Answer "how loud is the audio at position t (ms)?" in O(1) during playback.
+Design rationale:
+ - Looping playback replays the same file, so analysing it every timer tick is wasted work.
+ - Looking values up by the media player's position keeps the bar in sync with what is
+   actually audible instead of with a separate sample counter.
+"""
+import numpy as np
+
+ENVELOPE_HOP_MS = 10      # time resolution of the lookup table
+ENVELOPE_WINDOW_MS = 50   # RMS window, same as the old per-tick frame
+
+# README signal processing parameters
+PEAK_DECAY = 0.98         # k_d, applied once per hop
+PEAK_FLOOR = 0.001        # epsilon
+EXP_MAPPING_BETA = 10.0   # beta in 1 - e^(-beta x)
+
+
+def _full_scale(samples):
+    if np.issubdtype(samples.dtype, np.integer):
+        return float(np.iinfo(samples.dtype).max) + 1.0
+    return 1.0
+
+
+def compute_envelope(samples, sample_rate, hop_ms=ENVELOPE_HOP_MS, window_ms=ENVELOPE_WINDOW_MS):
+    """
+    Returns the normalized RMS envelope in [0, 1], one float32 value per hop.
+    Value i covers the window that ends at the end of hop i.
+    """
+    hop_size = max(1, int(sample_rate * hop_ms / 1000.0))
+    n_hops = len(samples) // hop_size
+    if n_hops == 0:
+        return np.zeros(1, dtype=np.float32)
+
+    # (hops, hop_size) view over the samples; energy per hop without a float copy
+    hops = np.asarray(samples[:n_hops * hop_size]).reshape(n_hops, hop_size)
+    hop_energy = np.einsum("ij,ij->i", hops, hops, dtype=np.float64)
+
+    # moving sum over window_hops hops using a cumulative sum
+    window_hops = max(1, int(round(window_ms / hop_ms)))
+    cumulative = np.concatenate(([0.0], np.cumsum(hop_energy)))
+    ends = np.arange(1, n_hops + 1)
+    starts = np.maximum(ends - window_hops, 0)
+    window_energy = cumulative[ends] - cumulative[starts]
+    window_count = (ends - starts) * hop_size
+
+    rms = np.sqrt(window_energy / window_count) / _full_scale(samples)
+    return np.minimum(rms, 1.0).astype(np.float32)
+
+
+def compute_led_track(envelope, peak_decay=PEAK_DECAY, peak_floor=PEAK_FLOOR, beta=EXP_MAPPING_BETA):
+    """
+    Maps an envelope to uint8 LED brightness with the README's dynamic peak tracking
+    and exponential mapping. The peak recursion P[n] = max(x[n], k_d * P[n-1]) is solved
+    without a Python loop: in the log domain it is a running maximum.
+    """
+    x = np.asarray(envelope, dtype=np.float64)
+    n = np.arange(x.size)
+    log_decay = np.log(peak_decay)
+    with np.errstate(divide="ignore"):
+        log_x = np.log(x)
+    # log P[n] = n log k_d + max_{k<=n}(log x[k] - k log k_d)
+    log_peak = n * log_decay + np.maximum.accumulate(log_x - n * log_decay)
+    peak = np.maximum(np.exp(log_peak), peak_floor)
+
+    normalized = np.minimum(x / peak, 1.0)
+    mapped = 1.0 - np.exp(-beta * normalized)
+    return np.round(mapped * 255.0).astype(np.uint8)
+
+
+class EnvelopeTrack:
+    def __init__(self, envelope, hop_ms=ENVELOPE_HOP_MS, led_track=None):
+        self.envelope = envelope
+        self.hop_ms = hop_ms
+        self.led_track = led_track
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate, hop_ms=ENVELOPE_HOP_MS, window_ms=ENVELOPE_WINDOW_MS):
+        return cls(compute_envelope(samples, sample_rate, hop_ms, window_ms), hop_ms)
+
+    @property
+    def duration_ms(self):
+        return len(self.envelope) * self.hop_ms
+
+    def _index_at(self, position_ms):
+        index = int(position_ms // self.hop_ms)
+        if index < 0:
+            return 0
+        if index >= len(self.envelope):
+            return len(self.envelope) - 1
+        return index
+
+    def value_at(self, position_ms):
+        """Normalized envelope at a playback position (ms). Positions past the end clamp."""
+        return float(self.envelope[self._index_at(position_ms)])
+
+    def led_value_at(self, position_ms):
+        """LED brightness (0..255) at a playback position (ms); computed on first use if needed."""
+        if self.led_track is None:
+            self.led_track = compute_led_track(self.envelope)
+        return int(self.led_track[self._index_at(position_ms)])
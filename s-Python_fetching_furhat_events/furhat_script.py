@@ -27,6 +27,10 @@ import struct
 from furhat_realtime_api import AsyncFurhatClient, Events
 import base64 # <--- 1. Import base64 module
 import logging
+from hot_path_log import get_logger
+
+# One audio event per chunk: keep 1 in 10 and at most 5/s per call site
+audio_log = get_logger("furhat.audio", sample_every=10)
 
 #furhat = AsyncFurhatClient("130.237.67.202", "test")
 #furhat = AsyncFurhatClient("ws://127.0.0.1:9000/v1/events", "test")
@@ -45,7 +49,7 @@ async def on_speak_end(event):
 
 async def on_audio_stream(event):
     #print("streaming")
-    print(event)
+    audio_log.debug("audio_stream_event", event=event)
 
 async def furhat_microphone_data(data):
     """
@@ -55,8 +59,8 @@ async def furhat_microphone_data(data):
     # 2. Safely get the base64 string from the 'speaker' key
     base64_audio_data = data.get('speaker')
     
-    # NEW: Print the raw base64 data fragment
-    print(f"Getting raw (first 30 chars): {base64_audio_data[:30]}...")
+    # NEW: Log the raw base64 data fragment
+    audio_log.debug("raw_chunk", head=(base64_audio_data or "")[:30])
           
     if base64_audio_data:
         try:
@@ -64,7 +68,7 @@ async def furhat_microphone_data(data):
             raw_audio_bytes = base64.b64decode(base64_audio_data)
             
             # Now, raw_audio_bytes is the 16-bit PCM audio you can process
-            print(f"Received audio chunk: {len(raw_audio_bytes)} raw bytes.")
+            audio_log.info("audio_chunk", bytes=len(raw_audio_bytes))
             
             # --- NEW LOGIC: Calculate RMS for Left Channel ---
             l_channel_samples = []
@@ -86,15 +90,15 @@ async def furhat_microphone_data(data):
                 sum_of_squares = sum(s**2 for s in l_channel_samples)
                 rms = (sum_of_squares / len(l_channel_samples))**0.5
                 # The RMS value is printed as a measure of "frequency/activity"
-                print(f"L-Channel Activity (RMS Amplitude): {rms:.2f}")
+                audio_log.info("left_channel_rms", rms=f"{rms:.2f}")
             else:
-                print("Not enough samples to process L-Channel data.")
+                audio_log.warning("not_enough_samples")
             # --- END NEW LOGIC ---
             
         except Exception as e:
-            print(f"Failed to decode or process audio data: {e}")
+            audio_log.error("decode_failed", error=e)
     else:
-        print("Received audio event without 'speaker' (Base64 data).")
+        audio_log.warning("missing_speaker_data")
 
 
 
@@ -1,15 +1,29 @@
 import os
+import sys
 import json
 import asyncio
+import base64
+import collections
 import websockets
 import signal
+import numpy as np
 from dotenv import load_dotenv
 from furhat_realtime_api import AsyncFurhatClient, Events
 import argparse
 import logging
 
+from voice_activity import VoiceActivityDetector
+
+MICROPHONE_SAMPLE_RATE = 24000
+# Chunks kept while silent, sent ahead of the first speech chunk so word onsets are not clipped
+VAD_PREROLL_CHUNKS = 3
+# Messages for the Arduino: 'A' is the listening state, anything else is a brightness
+LED_LISTENING_STATE = "A"
+LED_IDLE_STATE = "0"
+
 class OpenAIRealtimeFurhatBridge:
-    def __init__(self, host: str = "127.0.0.1", auth_key = None):
+    def __init__(self, host: str = "127.0.0.1", auth_key = None, serial_com = None, profiler = None,
+                 profile_at_start = False):
         load_dotenv(override=True)
         self.url = "wss://api.openai.com/v1/realtime?model=gpt-realtime"
         self.headers = {
@@ -24,6 +38,15 @@ class OpenAIRealtimeFurhatBridge:
         self.stop_event = asyncio.Event()
         self.shutting_down = False
         self.furhat = AsyncFurhatClient(self.host, auth_key=auth_key)
+        # Local VAD: only speech (plus its hangover) is uploaded to OpenAI
+        self.vad = VoiceActivityDetector(sample_rate=MICROPHONE_SAMPLE_RATE)
+        self._preroll = collections.deque(maxlen=VAD_PREROLL_CHUNKS)
+        # Optional SerialCom (or anything with send(payload)) that gets the listening state
+        self.serial_com = serial_com
+        # Optional SamplingProfiler (desktop app's profiler.py); toggled with SIGUSR1, sampling from
+        # start-up only when profile_at_start is set
+        self.profiler = profiler
+        self.profile_at_start = profile_at_start
         #self.furhat.set_logging_level(logging.DEBUG)
         self.furhat.add_handler(Events.response_speak_end, self.furhat_speak_end)
         self.furhat.add_handler(Events.response_audio_data, self.furhat_microphone_data)
@@ -57,16 +80,47 @@ class OpenAIRealtimeFurhatBridge:
     async def furhat_speak_end(self, data):
         # This is called when Furhat finishes speaking
         self.user_turn = True
-        await self.furhat.request_audio_start(sample_rate=24000, microphone=True, speaker=False)
+        self._reset_voice_activity()
+        await self.furhat.request_audio_start(sample_rate=MICROPHONE_SAMPLE_RATE, microphone=True, speaker=False)
 
     async def furhat_microphone_data(self, data):
         # This is called when Furhat received user audio
         # We only send audio data to OpenAI if it's the user's turn and not shutting down
-        if self.user_turn and self.ws and not self.shutting_down:
-            await self.ws.send(json.dumps({
-                "type": "input_audio_buffer.append",
-                "audio": data.get("microphone")
-            }))
+        if not (self.user_turn and self.ws and not self.shutting_down):
+            return
+        audio = data.get("microphone")
+        if not audio:
+            return
+
+        samples = np.frombuffer(base64.b64decode(audio), dtype="<i2")
+        if self.vad.process(samples):
+            self._send_led_state(LED_LISTENING_STATE if self.vad.is_speaking else LED_IDLE_STATE)
+
+        if not self.vad.is_speaking:
+            # Silence: keep a short pre-roll instead of uploading
+            self._preroll.append(audio)
+            return
+
+        while self._preroll:
+            await self._append_input_audio(self._preroll.popleft())
+        await self._append_input_audio(audio)
+
+    async def _append_input_audio(self, audio):
+        await self.ws.send(json.dumps({
+            "type": "input_audio_buffer.append",
+            "audio": audio
+        }))
+
+    def _reset_voice_activity(self):
+        was_speaking = self.vad.is_speaking
+        self.vad.reset()
+        self._preroll.clear()
+        if was_speaking:
+            self._send_led_state(LED_IDLE_STATE)
+
+    def _send_led_state(self, state):
+        if self.serial_com is not None:
+            self.serial_com.send(state)
 
     async def session_created(self):
         # This is called when the OpenAI session is created
@@ -89,6 +143,7 @@ class OpenAIRealtimeFurhatBridge:
         # This is called when OpenAI has created a response and is ready to speak
         await self.furhat.request_audio_stop()
         self.user_turn = False
+        self._reset_voice_activity()
 
     async def response_audio_delta(self, data):
         # This is called when OpenAI sends a delta of audio data
@@ -141,6 +196,11 @@ class OpenAIRealtimeFurhatBridge:
 
     async def run(self):
         self.setup_signal_handlers()
+        if self.profiler:
+            loop = asyncio.get_running_loop()
+            self.profiler.install_signal_toggle(loop)
+            if self.profile_at_start:
+                self.profiler.start(loop)
         print("Starting OpenAI Realtime Furhat Bridge...")
         print("Press Ctrl+C to stop gracefully")
         
@@ -151,16 +211,36 @@ class OpenAIRealtimeFurhatBridge:
             exit(0)
         
         try:
-            await self.websocket_handler()
+            # own task so the profiler can attribute the OpenAI event handlers to it
+            await asyncio.get_running_loop().create_task(self.websocket_handler(), name="openai-websocket")
         except Exception as e:
             print(f"Error in main loop: {e}")
         finally:
             print("Shutting down...")
             await self.furhat.disconnect()
+            if self.profiler and self.profiler.is_running:
+                self.profiler.stop()
        
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Furhat robot IP address")
     parser.add_argument("--auth_key", type=str, default=None, help="Authentication key for Realtime API")
+    parser.add_argument("--serial_port", type=str, default=None, help="Arduino serial port that shows the listening state")
+    parser.add_argument("--profile", action="store_true", help="Start sampling at start-up (SIGUSR1 toggles it either way; a .folded file is written on stop)")
     args = parser.parse_args()
-    asyncio.run(OpenAIRealtimeFurhatBridge(args.host, auth_key=args.auth_key).run())
\ No newline at end of file
+
+    # SerialCom and the profiler live in the desktop app next to this folder
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "s-Python_desktop_app_arduino_com"))
+
+    serial_com = None
+    if args.serial_port:
+        from serial_com import SerialCom
+        serial_com = SerialCom()
+        serial_com.connect(args.serial_port)
+
+    # always there, so a running bridge can be profiled with `kill -USR1 <pid>` without a restart
+    from profiler import SamplingProfiler, TaskCpuAccounting
+    profiler = SamplingProfiler(task_accounting=TaskCpuAccounting())
+
+    asyncio.run(OpenAIRealtimeFurhatBridge(args.host, auth_key=args.auth_key, serial_com=serial_com, profiler=profiler,
+                                           profile_at_start=args.profile).run())
\ No newline at end of file
@@ -0,0 +1,142 @@
+# hot_path_log.py
+"""
+Logging for the streaming hot paths (serial sends, websocket drains, audio chunks).
+Responsibility:
+ - Replace per-frame print() calls with loggers that never block the caller on terminal I/O:
+   records go through a QueueHandler and are formatted and written by a QueueListener thread.
+ - Rate-limit per call site (token bucket keyed by file:line) and optionally sample 1-in-N,
+   reporting how many records were suppressed on the next one that gets through.
+ - Structured fields: log.info("serial_sent", payload=128, bytes=4) renders as
+   "... serial_sent payload=128 bytes=4", so the output stays grep/parse friendly.
+Design rationale:
+ - At stream rates, stdout writes (and string formatting) cost more than the work being logged.
+   Filtering happens before anything is formatted, and formatting happens off the hot thread.
+ - Rate limits are per call site, so a noisy drain loop cannot starve a rare error message.
+ - Built only on the standard logging module; other code can still attach handlers as usual.
+"""
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+LOG_LEVEL = logging.INFO
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+# Defaults per call site
+DEFAULT_RATE_PER_S = 5.0   # sustained records per second
+DEFAULT_BURST = 5          # records allowed back to back
+DEFAULT_SAMPLE_EVERY = 1   # 1 = keep every record that passes the rate limit
+
+_setup_lock = threading.Lock()
+_log_queue = None
+_listener = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues the record as-is; the listener thread formats it (QueueHandler would format here)."""
+
+    def prepare(self, record):
+        return record
+
+
+class StructuredFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class CallSiteRateLimitFilter(logging.Filter):
+    """Token bucket plus 1-in-N sampling, per (file, line) call site."""
+
+    def __init__(self, rate_per_s=DEFAULT_RATE_PER_S, burst=DEFAULT_BURST, sample_every=DEFAULT_SAMPLE_EVERY):
+        super().__init__()
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.sample_every = max(1, int(sample_every))
+        # site -> [tokens, last_refill, seen, suppressed]
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None:
+                state = [float(self.burst), now, 0, 0]
+                self._sites[site] = state
+            state[2] += 1
+            if state[2] % self.sample_every:
+                state[3] += 1
+                return False
+            state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate_per_s)
+            state[1] = now
+            if state[0] < 1.0:
+                state[3] += 1
+                return False
+            state[0] -= 1.0
+            suppressed, state[3] = state[3], 0
+        if suppressed:
+            fields = dict(getattr(record, "fields", None) or {})
+            fields["suppressed"] = suppressed
+            record.fields = fields
+        return True
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Keyword arguments that logging does not know become structured fields."""
+
+    _LOGGING_KWARGS = ("exc_info", "stack_info", "stacklevel", "extra")
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in self._LOGGING_KWARGS}
+        if fields:
+            extra = dict(kwargs.get("extra") or {})
+            extra["fields"] = fields
+            kwargs["extra"] = extra
+        return msg, kwargs
+
+
+def _ensure_listener():
+    global _log_queue, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _log_queue
+        _log_queue = queue.SimpleQueue()
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(StructuredFormatter(LOG_FORMAT))
+        _listener = logging.handlers.QueueListener(_log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _log_queue
+
+
+def stop_logging():
+    """Flushes queued records and stops the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name, rate_per_s=DEFAULT_RATE_PER_S, burst=DEFAULT_BURST, sample_every=DEFAULT_SAMPLE_EVERY,
+               level=LOG_LEVEL):
+    """
+    Returns a structured, rate-limited logger that writes through the shared queue.
+    The limits apply to every call site of this logger name; the first call configures them.
+    """
+    log_queue = _ensure_listener()
+    logger = logging.getLogger(f"hot_path.{name}")
+    if not logger.handlers:
+        logger.setLevel(level)
+        logger.propagate = False
+        logger.addFilter(CallSiteRateLimitFilter(rate_per_s, burst, sample_every))
+        logger.addHandler(_DeferredQueueHandler(log_queue))
+    return StructuredLogger(logger, {})
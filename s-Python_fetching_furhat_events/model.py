@@ -11,12 +11,19 @@ import asyncio # New import for async functionality
 import struct # Get data from the Websocket
 from websockets.asyncio.client import connect
 
+from wav_source import WavFileSource
+from hot_path_log import get_logger
+
 # --- GLOBAL CONSTANTS ---
 SERIAL_BAUDRATE = 9600
 WEB_SOCKET_SERVER_URL = "ws://127.0.0.1:8765"
 # Example options list for the QComboBox
 COMBO_OPTIONS = [f"Item {i}" for i in range(1, 11)]
 
+# Rate-limited loggers for the per-frame paths (print would block the loop on terminal I/O)
+serial_log = get_logger("model.serial")
+stream_log = get_logger("model.stream")
+
 
 class AppModel(QAbstractListModel):
     """
@@ -125,11 +132,11 @@ class AppModel(QAbstractListModel):
             print(f"Model: Attempting to load audio from: {absolute_file_path}")
             
             # 2. Read the WAV file using scipy
-            # fs = sample rate (int), samples = raw audio data (NumPy array)
-            fs, samples = wavfile.read(absolute_file_path)
+            # fs = sample rate (int), samples = raw audio data (NumPy memmap, read lazily from disk)
+            fs, samples = wavfile.read(absolute_file_path, mmap=True)
             
             # 3. Handle Stereo Data (If the audio has multiple channels)
-            # Visualization usually works better with mono, so we select the first channel.
+            # Visualization usually works better with mono, so we select the first channel (a view, no copy).
             if samples.ndim > 1:
                 samples = samples[:, 0]
                 print("Model: Converted stereo audio to mono (first channel).")
@@ -151,6 +158,22 @@ class AppModel(QAbstractListModel):
             # Fallback to a safe, empty result
             return 44100, np.array([0], dtype=np.int16)
 
+    def open_audio_source(self, file_path, frame_ms):
+        """
+        Opens a looping, memory-mapped WavFileSource that yields frames of frame_ms.
+        Returns None on failure so the caller can fall back to silence.
+        """
+        absolute_file_path = os.path.join(os.path.dirname(__file__), file_path)
+        try:
+            source = WavFileSource(absolute_file_path, frame_ms)
+            print(f"Model: Audio source opened. Sample rate: {source.sample_rate} Hz. Total samples: {source.total_samples}.")
+            return source
+        except FileNotFoundError:
+            print(f"Model Error: Audio file '{file_path}' not found at {absolute_file_path}.")
+        except Exception as e:
+            print(f"Model Error: Failed to open WAV file as a stream source: {e}.")
+        return None
+
     # =====================================================================
     # =====================================================================
     # --- ASYNCIO IMPLEMENTATION ---
@@ -164,7 +187,7 @@ class AppModel(QAbstractListModel):
                 frame = await self._websocket_conn.recv()
                 left, right = struct.unpack('<hh', frame)
                 #self.ws_data_arrived.emit(f"${left}")
-                print(f"Audio Frame: L={left}, R={right}")
+                stream_log.debug("audio_frame", left=left, right=right)
 
         except Exception as e:
             print(f"Connection closed: {e}")
@@ -230,7 +253,7 @@ class AppModel(QAbstractListModel):
                     await self._ws_data_queue.put((left, right)) 
                     # Process data...
                 else:
-                    print(f"Warning: Received frame of unexpected size {len(frame)}. Expected 4 bytes.")
+                    stream_log.warning("unexpected_frame_size", size=len(frame), expected=4)
                     
         except asyncio.CancelledError:
             print("Listener: Task received cancellation signal.")
@@ -401,7 +424,7 @@ class AppModel(QAbstractListModel):
         """
         # 1. Invariance Check: Is the connection open?
         if not self.is_serial_connected():
-            print("Model: Cannot send data, serial connection is not active.")
+            serial_log.warning("send_skipped_not_connected", payload=data)
             return False
 
         try:
@@ -411,20 +434,20 @@ class AppModel(QAbstractListModel):
             
             # 3. Write data to the port
             self._serial_conn.write(data_to_send)
-            print(f"Model: Data sent successfully: {data}") # Uncomment for debugging
+            serial_log.info("serial_sent", payload=data, bytes=len(data_to_send))
             return True
             
         except serial.SerialTimeoutException:
             # This handles cases where the write buffer times out
-            print("Model Error: Serial write timeout occurred.")
+            serial_log.error("write_timeout", payload=data)
             return False
             
         except serial.SerialException as e:
             # This handles unexpected disconnections during transmission
-            print(f"Model Error: Connection lost during write: {e}")
+            serial_log.error("connection_lost", error=e)
             self.disconnect_serial() # Clean up the broken connection
             return False
         
         except Exception as e:
-            print(f"Model Error: Unexpected error during data send: {e}")
+            serial_log.error("send_failed", error=e)
             return False
\ No newline at end of file
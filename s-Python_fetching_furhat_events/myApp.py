@@ -20,6 +20,12 @@ from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 
+from envelope_track import (
+    EnvelopeTrack, compute_envelope, compute_led_track,
+    ENVELOPE_HOP_MS, ENVELOPE_WINDOW_MS, PEAK_DECAY, PEAK_FLOOR, EXP_MAPPING_BETA
+)
+from envelope_cache import EnvelopeCache, fingerprint, FINGERPRINT_HEAD_BYTES
+
 # --- GLOBAL CONSTANTS ---
 ASSET_AUDIO_URL = "qrc:audio_test.wav" 
 LOCAL_AUDIO_FILE_PATH = os.path.join(os.path.dirname(__file__), 'audio_test.wav')
@@ -208,10 +214,10 @@ class MainWindow(QMainWindow):
         self.model = model
         
         # --- AUDIO/VISUALIZATION DATA INITIALIZATION ---
-        self.full_audio_samples = self.read_audio_file()
-        self.sample_rate = 44100
-        self.samples_per_frame = int(self.sample_rate * (PLOT_UPDATE_INTERVAL / 1000.0))
-        self.current_sample_index = 0
+        # Envelope of the whole file, computed once (or reused from the on-disk cache);
+        # playback looks it up by position
+        self.envelope_cache = EnvelopeCache()
+        self.envelope_track = self.load_envelope_track()
         
         # Setup the QTimer for continuous plot updates
         self.plot_timer = QTimer(self)
@@ -294,41 +300,84 @@ class MainWindow(QMainWindow):
         duration = 1.0
         t = np.linspace(0., duration, int(fs * duration), endpoint=False)
         samples = (0.5 * np.sin(2. * np.pi * 440. * t) * (2**15 - 1)).astype(np.int16)
-        return samples
+        return fs, samples
 
-    def read_audio_file(self):
-        """Reads the entire WAV file from the Qt Resource System (qrc:/) once."""
-        try:
-            from scipy.io import wavfile
-            
-            qrc_path = QUrl(ASSET_AUDIO_URL).path() 
-            q_file = QFile(qrc_path)
-            
-            if not q_file.open(QFile.ReadOnly):
-                print(f"ERROR: Could not open resource file: {qrc_path}. Using dummy data.")
-                return self._generate_dummy_samples()
+    def read_audio_fingerprint(self):
+        """Cache key of the audio resource from its size and first block only. Returns None on failure."""
+        qrc_path = QUrl(ASSET_AUDIO_URL).path()
+        q_file = QFile(qrc_path)
 
-            data_qbytearray = q_file.readAll()
-            q_file.close()
+        if not q_file.open(QFile.ReadOnly):
+            print(f"ERROR: Could not open resource file: {qrc_path}. Using dummy data.")
+            return None
 
-            data_bytes = bytes(data_qbytearray.data())
-            byte_stream = io.BytesIO(data_bytes)
-            
-            # Read the WAV file data using scipy
-            fs, samples = wavfile.read(byte_stream)
+        head = bytes(q_file.read(FINGERPRINT_HEAD_BYTES).data())
+        size = q_file.size()
+        q_file.close()
+        return fingerprint(qrc_path, size, head)
+
+    def read_audio_bytes(self):
+        """Reads the raw WAV bytes from the Qt Resource System (qrc:/) once. Returns None on failure."""
+        qrc_path = QUrl(ASSET_AUDIO_URL).path() 
+        q_file = QFile(qrc_path)
+        
+        if not q_file.open(QFile.ReadOnly):
+            print(f"ERROR: Could not open resource file: {qrc_path}. Using dummy data.")
+            return None
+
+        data_qbytearray = q_file.readAll()
+        q_file.close()
+        return bytes(data_qbytearray.data())
+
+    def read_audio_file(self, data_bytes):
+        """Parses WAV bytes. Returns (sample_rate, samples); raises if they cannot be parsed."""
+        from scipy.io import wavfile
+        
+        byte_stream = io.BytesIO(data_bytes)
+        
+        # Read the WAV file data using scipy
+        fs, samples = wavfile.read(byte_stream)
+        
+        # Ensure we only have one channel (mono) for visualization
+        if samples.ndim > 1:
+            samples = samples[:, 0]
             
-            # Ensure we only have one channel (mono) for visualization
-            if samples.ndim > 1:
-                samples = samples[:, 0]
-                
-            return samples
+        return fs, samples
+
+    def load_envelope_track(self):
+        """
+        Builds the envelope and LED track of the audio asset. Both are cached on disk by
+        asset fingerprint + DSP parameters, so a replayed stimulus skips reading, parsing
+        and analysing the whole file.
+        """
+        content_digest = self.read_audio_fingerprint()
+        if content_digest is None:
+            fs, samples = self._generate_dummy_samples()
+            return EnvelopeTrack.from_samples(samples, fs)
+
+        envelope_params = {"hop_ms": ENVELOPE_HOP_MS, "window_ms": ENVELOPE_WINDOW_MS}
+        led_params = dict(envelope_params, peak_decay=PEAK_DECAY, peak_floor=PEAK_FLOOR, beta=EXP_MAPPING_BETA)
+
+        def analyse_audio():
+            # cache miss only: the whole file is read here
+            data_bytes = self.read_audio_bytes()
+            if data_bytes is None:
+                raise OSError(f"cannot read {ASSET_AUDIO_URL}")
+            fs, samples = self.read_audio_file(data_bytes)
+            return compute_envelope(samples, fs)
+
+        try:
+            envelope = self.envelope_cache.get_or_compute(content_digest, envelope_params, "envelope", analyse_audio)
+            led_track = self.envelope_cache.get_or_compute(content_digest, led_params, "led_track",
+                                                           lambda: compute_led_track(envelope))
+            return EnvelopeTrack(envelope, ENVELOPE_HOP_MS, led_track)
             
         except ImportError:
             print("WARNING: scipy not installed. Cannot parse WAV file samples. Using dummy data.")
-            return self._generate_dummy_samples()
         except Exception as e:
             print(f"Error reading or parsing WAV resource: {e}. Using dummy data.")
-            return self._generate_dummy_samples()
+        fs, samples = self._generate_dummy_samples()
+        return EnvelopeTrack.from_samples(samples, fs)
         
     def _check_and_reset_loop(self, position):
         """Checks media player position to implement infinite loop."""
@@ -336,7 +385,6 @@ class MainWindow(QMainWindow):
         if self.media_player.duration() > 0 and position >= self.media_player.duration() - 100:
             print("Looping audio...")
             self.media_player.setPosition(0)
-            self.current_sample_index = 0 # Reset visualization index
             self.media_player.play()
 
 
@@ -344,39 +392,23 @@ class MainWindow(QMainWindow):
 
     def update_live_bar(self):
         """
-        Processes the next frame of audio data, updates the visualization,
-        and sends the normalized intensity over serial.
+        Looks up the intensity of what is currently audible, updates the visualization,
+        and sends the matching LED brightness (0..255, README mapping) over serial.
         """
-        total_samples = len(self.full_audio_samples)
-        if total_samples == 0:
-            self.intensity_plot.plot_frame_intensity(0, 0)
-            return
-
-        # --- 1. Get Audio Frame (Input Stream Simulation) ---
-        start_index = self.current_sample_index
-        end_index = start_index + self.samples_per_frame
-        
-        # Handle circular wrapping
-        if end_index >= total_samples:
-            frame = np.concatenate((self.full_audio_samples[start_index:], 
-                                    self.full_audio_samples[:end_index - total_samples]))
-            self.current_sample_index = end_index - total_samples
-        else:
-            frame = self.full_audio_samples[start_index:end_index]
-            self.current_sample_index += self.samples_per_frame
-
-        # --- 2. Process Data (RMS Calculation) ---
-        raw_rms = np.sqrt(np.mean(frame.astype(float)**2))
+        # --- 1. Envelope and LED track lookup by playback position (O(1), precomputed at load time) ---
+        position = self.media_player.position()
+        normalized_value = self.envelope_track.value_at(position)
+        led_value = self.envelope_track.led_value_at(position)
         MAX_16BIT = 32768.0 
-        normalized_value = min(raw_rms / MAX_16BIT, 1.0) # Normalized from 0.0 to 1.0
+        raw_rms = normalized_value * MAX_16BIT
         
-        # --- 3. Update View and Send Data ---
+        # --- 2. Update View and Send Data ---
         
         # Update the plot visualization
         self.intensity_plot.plot_frame_intensity(raw_rms, normalized_value)
         
-        # Send the normalized value to Arduino (Controller passes data to Model)
-        self.model.send_data(f"{normalized_value:.4f}") 
+        # Send the LED brightness to Arduino (Controller passes data to Model)
+        self.model.send_data(f"{led_value}") 
         
         # Update status if connection was lost during transmission
         if not self.model.is_serial_connected():
@@ -415,7 +447,6 @@ class MainWindow(QMainWindow):
             self.plot_timer.stop()
         elif current_state == QMediaPlayer.PlaybackState.StoppedState:
             # Start fresh: reset and play both
-            self.current_sample_index = 0
             self.media_player.setPosition(0)
             self.media_player.play()
             self.plot_timer.start()
@@ -8,9 +8,14 @@ import time
 # LOAD AUDIO
 # -------------------------------
 soundfile_path = "npc-arnold-greetings.wav"
-data, samplerate = sf.read(soundfile_path)  # shape = (frames, channels)
-num_frames, num_channels = data.shape
-current_frame = 0
+FRAME_RATE = 30  # visual updates per second
+info = sf.info(soundfile_path)
+samplerate = info.samplerate
+block_size = max(1, samplerate // FRAME_RATE)  # samples per visual frame
+block_duration = block_size / samplerate       # seconds of audio per block
+blocks = None        # streaming block reader, created on play
+playback_start = 0.0 # monotonic time of the first block
+block_index = 0
 playing = False
 
 # -------------------------------
@@ -27,14 +32,30 @@ ax.add_patch(circle)
 # -------------------------------
 # BUTTON CALLBACK
 # -------------------------------
+def start_playback():
+    global blocks, playback_start, block_index
+    # read the file lazily, one block per visual frame, instead of sf.read-ing all of it
+    blocks = sf.blocks(soundfile_path, blocksize=block_size, always_2d=True)
+    playback_start = time.monotonic()
+    block_index = 0
+
+def stop_playback():
+    global blocks, playing
+    playing = False
+    btn.label.set_text("Play Audio")
+    if blocks is not None:
+        blocks.close()
+        blocks = None
+    circle.radius = 50
+
 def toggle_play(event):
-    global playing, current_frame
+    global playing
     playing = not playing
     if playing:
         btn.label.set_text("Stop Audio")
+        start_playback()
     else:
-        btn.label.set_text("Play Audio")
-        current_frame = 0  # reset
+        stop_playback()  # reset
 
 ax_button = plt.axes([0.4, 0.05, 0.2, 0.075])
 btn = Button(ax_button, "Play Audio")
@@ -43,11 +64,11 @@ btn.on_clicked(toggle_play)
 # -------------------------------
 # UTILITY
 # -------------------------------
-def get_sample(frame_idx=0, channel=0):
-    """Return normalized sample in [0,1]"""
-    sample = data[frame_idx, channel]
-    sample = (sample + 1.0) / 2.0
-    return min(sample, 1.0)
+def get_block_envelope(block, channel=0):
+    """Return the block's peak amplitude in [0,1] (vectorized over the whole block)"""
+    if block.size == 0:
+        return 0.0
+    return min(float(np.max(np.abs(block[:, channel]))), 1.0)
 
 # -------------------------------
 # MAIN LOOP
@@ -55,12 +76,22 @@ def get_sample(frame_idx=0, channel=0):
 plt.ion()
 while True:
     if playing:
-        sample = get_sample(current_frame)
-        circle.radius = 50 + sample * 100  # radius changes with audio
-        current_frame += 1
-        if current_frame >= num_frames:
-            playing = False
-            btn.label.set_text("Play Audio")
-            current_frame = 0
+        # audio time that should be showing now, from the wall clock
+        due_index = int((time.monotonic() - playback_start) / block_duration)
+        block = None
+        finished = False
+        # catch up if drawing fell behind: skip blocks instead of slowing down
+        while block_index <= due_index:
+            block = next(blocks, None)
+            if block is None:
+                finished = True
+                break
+            block_index += 1
+        if finished:
+            stop_playback()
+        elif block is not None:
+            circle.radius = 50 + get_block_envelope(block) * 100  # radius changes with audio
     fig.canvas.draw_idle()
-    plt.pause(1 / samplerate)  # approximate real-time playback
+    # sleep until the next block is due (keeps the GUI responsive without spinning)
+    next_due = playback_start + block_index * block_duration if playing else time.monotonic() + block_duration
+    plt.pause(max(next_due - time.monotonic(), 0.001))
@@ -0,0 +1,85 @@
+# voice_activity.py
+"""
+Streaming voice-activity detection (VAD) for decoded microphone audio.
+Responsibility:
+ - Split incoming 16-bit PCM chunks into fixed frames (vectorized, no per-sample loop).
+ - Classify each frame as speech from short-time energy plus zero-crossing rate.
+ - Keep the speech state alive for a hangover period so word gaps do not toggle it.
+Design rationale:
+ - Keeps the bridge free of DSP details; it only asks "is the user speaking?" and
+   whether that answer changed since the last chunk.
+ - Samples that do not fill a whole frame are carried over to the next chunk.
+"""
+import math
+import numpy as np
+
+DEFAULT_FRAME_MS = 20
+# RMS of a frame (on the [-1, 1] scale) above which it may be speech (~ -40 dBFS)
+DEFAULT_ENERGY_THRESHOLD = 0.01
+# Broadband noise crosses zero about every other sample; voiced speech much less often
+DEFAULT_MAX_ZERO_CROSSING_RATE = 0.45
+# Keep the trailing silence long enough for OpenAI's server VAD to see the end of the turn
+DEFAULT_HANGOVER_MS = 600
+
+MAX_16BIT = 32768.0
+
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate: int = 24000,
+                 frame_ms: int = DEFAULT_FRAME_MS,
+                 energy_threshold: float = DEFAULT_ENERGY_THRESHOLD,
+                 max_zero_crossing_rate: float = DEFAULT_MAX_ZERO_CROSSING_RATE,
+                 hangover_ms: int = DEFAULT_HANGOVER_MS):
+        self.sample_rate = sample_rate
+        self.frame_size = max(2, int(sample_rate * frame_ms / 1000))
+        # compare mean squares so we never take a square root per frame
+        self._energy_threshold_sq = energy_threshold ** 2
+        self._max_zcr = max_zero_crossing_rate
+        self._hangover_frames = max(1, math.ceil(hangover_ms / frame_ms))
+
+        self._remainder = np.empty(0, dtype=np.int16)
+        self._hangover = 0
+        self._is_speaking = False
+
+    @property
+    def is_speaking(self):
+        return self._is_speaking
+
+    def reset(self):
+        """Forget buffered samples and return to the silent state."""
+        self._remainder = np.empty(0, dtype=np.int16)
+        self._hangover = 0
+        self._is_speaking = False
+
+    def process(self, samples: np.ndarray) -> bool:
+        """Feed a chunk of int16 mono samples. Returns True if the speech state changed."""
+        if self._remainder.size:
+            samples = np.concatenate((self._remainder, samples))
+
+        n_frames = samples.size // self.frame_size
+        used = n_frames * self.frame_size
+        self._remainder = samples[used:].copy()
+        if n_frames == 0:
+            return False
+
+        frames = samples[:used].reshape(n_frames, self.frame_size).astype(np.float32)
+        frames /= MAX_16BIT
+
+        # short-time energy (mean square) per frame
+        energy = np.einsum("ij,ij->i", frames, frames) / self.frame_size
+        # zero-crossing rate per frame
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_size - 1)
+
+        voiced = np.flatnonzero((energy > self._energy_threshold_sq) & (zcr < self._max_zcr))
+        if voiced.size:
+            # hangover restarts at the last voiced frame of this chunk
+            frames_since_voice = n_frames - 1 - voiced[-1]
+            self._hangover = self._hangover_frames - frames_since_voice
+        else:
+            self._hangover -= n_frames
+        self._hangover = max(self._hangover, 0)
+
+        was_speaking = self._is_speaking
+        self._is_speaking = self._hangover > 0
+        return self._is_speaking != was_speaking
@@ -0,0 +1,67 @@
+# wav_source.py
+"""
+Memory-mapped WAV source for file-driven visualization.
+Responsibility:
+ - Open a WAV file with scipy's mmap=True so samples stay on disk until touched.
+ - Hand out fixed-size frames as views into the mapped array (no copies).
+ - Loop forever: a frame that crosses the end of the file is returned as two views
+   (tail + head) instead of being glued together with np.concatenate.
+Design rationale:
+ - Hour-long session recordings should cost page cache, not RAM.
+ - Consumers reduce over the parts (see frame_rms), so a file source feeds the same
+   "one intensity value per tick" pipeline as a live stream.
+"""
+import numpy as np
+from scipy.io import wavfile
+
+
+class WavFileSource:
+    def __init__(self, file_path: str, frame_ms: float, channel: int = 0):
+        # mmap=True returns a np.memmap backed by the file (PCM integer formats only)
+        self.sample_rate, samples = wavfile.read(file_path, mmap=True)
+        if samples.ndim > 1:
+            # column slice of a memmap is a strided view, still no copy
+            samples = samples[:, channel]
+        if len(samples) == 0:
+            # nothing to loop over: next_frame could never wrap
+            raise ValueError(f"{file_path} contains no samples")
+        self._samples = samples
+        frame_size = int(self.sample_rate * frame_ms / 1000.0)
+        self.frame_size = max(1, min(frame_size, len(samples)))
+        self._position = 0
+
+    @property
+    def samples(self):
+        return self._samples
+
+    @property
+    def total_samples(self):
+        return len(self._samples)
+
+    def rewind(self):
+        self._position = 0
+
+    def next_frame(self):
+        """Returns the next frame as a tuple of one or two views (two when it wraps)."""
+        total = len(self._samples)
+        start = self._position
+        end = start + self.frame_size
+        if end < total:
+            self._position = end
+            return (self._samples[start:end],)
+        self._position = end - total
+        if self._position == 0:
+            return (self._samples[start:],)
+        return (self._samples[start:], self._samples[:self._position])
+
+
+def frame_rms(parts) -> float:
+    """RMS over a frame given as views; no temporary float copy of the samples."""
+    count = 0
+    sum_of_squares = 0.0
+    for part in parts:
+        count += part.size
+        sum_of_squares += float(np.einsum("i,i->", part, part, dtype=np.float64))
+    if count == 0:
+        return 0.0
+    return (sum_of_squares / count) ** 0.5
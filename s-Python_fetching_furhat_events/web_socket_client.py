@@ -9,6 +9,8 @@ from PySide6.QtCore import QTimer, QCoreApplication
 from PySide6.QtWidgets import QApplication
 import qasync
 
+from hot_path_log import get_logger
+
 ws_server_instance = None
 ws_data_queue = asyncio.Queue()
 # Ensure initial data point is a tuple (L, R) for consistency
@@ -18,6 +20,9 @@ LISTENING_TIME = 0.05 # seconds
 GUI_SIMULATOR_RENDER_TIMEOUT = 50 #milliseconds
 WEB_SOCKET_SERVER_URL = "ws://127.0.0.1:8765"
 
+# Rate-limited logger for the listener / drain loops
+stream_log = get_logger("ws_client.stream")
+
 async def connect_to_server():
     """Establishes and stores a persistent WebSocket connection."""
     global ws_server_instance # MINIMAL FIX 1: Required to modify the global variable
@@ -59,7 +64,7 @@ async def listen_indefinitely():
                 #print(f"Audio Frame: L={left}, R={right}")
                 await ws_data_queue.put((left, right)) 
             else:
-                print(f"Warning: Received frame of unexpected size {len(frame)}. Expected 4 bytes.")
+                stream_log.warning("unexpected_frame_size", size=len(frame), expected=4)
     except asyncio.CancelledError:
         # This is the expected exception when the task is cancelled after 50ms
         print("Listener: Task received cancellation signal.")
@@ -81,14 +86,14 @@ async def process_websocket_data_continuously():
                 # Use get_nowait to avoid blocking on empty queue
                 latest_frame = ws_data_queue.get_nowait()
             except asyncio.QueueEmpty:
-                print(f"Emptying queue!")
+                stream_log.debug("queue_emptied")
                 # We found the most recent frame—break out and process it
                 break
 
         # 3. Process ONLY the 'latest_frame' and update the single state variable
         # In a real app, this is where you'd calculate RMS and normalization
         ws_latest_data_point = latest_frame
-        print(f"Queue data point: {latest_frame}")
+        stream_log.info("queue_data_point", left=latest_frame[0], right=latest_frame[1])
         # Yield control back to the event loop briefly after processing a burst
         await asyncio.sleep(0) 
 
@@ -4,6 +4,26 @@
 * A Java Processing program sends integers [0, 255], and the Arduino takes care of it.
 * https://github.com/DavidGiraldoCode/s-Arduino_Audio_Wave_Vizualization_for_Conversational_Robots.git
 *
+* Serial protocol: one command per '\n'-terminated line, the last complete line wins.
+*   "NNN"      brightness 0..255 for the whole ring (floored at BASE_STATE)
+*   "A"        listening state
+*   "P<hex>"   per-pixel levels, 2 hex digits per pixel (NUM_PIXELS * 2 chars)
+*   "B<baud>"  switch baud rate; acknowledged with "B<baud>" at the old rate first
+*   "V"        report firmware version and power state
+* Binary RGB frame (starts where a line would; not '\n'-terminated):
+*   0xC3, seq, NUM_PIXELS * (r, g, b), checksum = 8-bit sum of seq and the RGB bytes
+*   The host never sends 0xC3 after the sync byte (seq skips it, colours and checksum are
+*   nudged by one level), so 0xC3 always marks a frame start, even inside a frame.
+*   The pixels are latched as sent (the host computes colour, gamma and easing) and the
+*   frame is acknowledged with "K<seq>".
+* Frame lines ("NNN", "A", "P<hex>") may end in "#<seq>" (0..255); the frame is acknowledged
+* with "K<seq>" once it is on the ring.
+*
+* Device -> host lines:
+*   "V<version>"  firmware version (on boot and on "V")
+*   "S1" / "S0"   ring switched on / off with the button (on boot and on "V")
+*   "K<seq>"      frame <seq> shown
+*
 */
 
 #include <Adafruit_NeoPixel.h>
@@ -14,7 +34,9 @@
 Adafruit_NeoPixel ring(NUM_PIXELS, LED_PIN, NEO_GRB + NEO_KHZ800);
 uint8_t brightness;
 
+constexpr char            FIRMWARE_VERSION[] = "1.3.0";
 constexpr unsigned long   BAUD_RATE         = 9600;
+const     unsigned long   SUPPORTED_BAUD_RATES[] = { 9600, 19200, 38400, 57600, 115200 };
 
 const     uint8_t   BTN_PIN                 = 2;
 const     unsigned int TALKING_STATE        = 255;
@@ -25,6 +47,30 @@ unsigned  int       turn_on_counter         = 0;
           
           char      furhat_state            = '0';        // Data received from the serial port
 
+// Serial line parsing
+constexpr uint8_t   LINE_BUFFER_SIZE        = 40;         // "P" + 32 hex digits + margin
+          char      line_buffer[LINE_BUFFER_SIZE];
+          uint8_t   line_length             = 0;
+          bool      line_overflow           = false;
+
+// Binary RGB frame parsing
+constexpr uint8_t   RGB_FRAME_SYNC          = 0xC3;
+constexpr uint8_t   RGB_FRAME_LEVELS        = NUM_PIXELS * 3;
+          uint8_t   rgb_buffer[1 + RGB_FRAME_LEVELS + 1];  // seq, RGB, checksum
+          uint8_t   rgb_received            = 0;
+          bool      in_rgb_frame            = false;
+          uint8_t   rgb_resync_skip         = 0;      // after a corrupted frame: bytes left to skip unless a sync comes first
+
+// Last command received
+enum LedMode { MODE_BRIGHTNESS, MODE_LISTENING, MODE_PIXELS, MODE_RGB };
+          LedMode   led_mode                = MODE_BRIGHTNESS;
+          uint8_t   target_brightness       = BASE_STATE;
+          uint8_t   pixel_levels[NUM_PIXELS];
+          uint8_t   pixel_rgb[RGB_FRAME_LEVELS];
+          bool      needs_show              = false;
+          bool      has_pending_ack         = false;
+          uint8_t   pending_ack_seq         = 0;
+
 // Controlling turn On and Off
 constexpr uint8_t   BOUNCE_DELAY            = 10; // milliseconds
 unsigned  long      last_debounce_time      = 0;
@@ -46,6 +92,19 @@ void setup()
   ring.show();
 
   Serial.begin(BAUD_RATE);
+  reportVersion();
+  reportPowerState();
+}
+
+void reportVersion()
+{
+  Serial.print('V');
+  Serial.println(FIRMWARE_VERSION);
+}
+
+void reportPowerState()
+{
+  Serial.println(is_on ? "S1" : "S0");
 }
 
 void controllNeoPixel(const unsigned int brightness)
@@ -58,7 +117,27 @@ void controllNeoPixel(const unsigned int brightness)
     ring.setPixelColor(i, ring.Color(250, 200, 200));
   }
   ring.show();
-  delay(100);
+}
+
+void controllNeoPixelLevels(const uint8_t *levels)
+{
+  ring.setBrightness(255);
+  for (int i = 0; i < NUM_PIXELS; i++)
+  {
+    const uint16_t level = levels[i] < BASE_STATE ? BASE_STATE : levels[i];
+    ring.setPixelColor(i, ring.Color(250 * level / 255, 200 * level / 255, 200 * level / 255));
+  }
+  ring.show();
+}
+
+void controllNeoPixelRGB(const uint8_t *rgb)
+{
+  ring.setBrightness(255);
+  for (int i = 0; i < NUM_PIXELS; i++)
+  {
+    ring.setPixelColor(i, ring.Color(rgb[3 * i], rgb[3 * i + 1], rgb[3 * i + 2]));
+  }
+  ring.show();
 }
 
 void toogleSystem(uint8_t state)
@@ -77,12 +156,15 @@ void toogleSystem(uint8_t state)
       if( btn_state == HIGH)
         {
 
+          const bool was_on = is_on;
           if(last_system_state == false)
             is_on = true;
           else
             is_on = false;
 
           controllNeoPixel(is_on ? LISTENING_STATE : LOW);
+          if (is_on != was_on)
+            reportPowerState();
         }
   }
 
@@ -90,31 +172,196 @@ void toogleSystem(uint8_t state)
     
 }
 
-void changeLedBaseOnSerialMessages()
+int8_t hexValue(const char c)
+{
+  if (c >= '0' && c <= '9') return c - '0';
+  if (c >= 'a' && c <= 'f') return c - 'a' + 10;
+  if (c >= 'A' && c <= 'F') return c - 'A' + 10;
+  return -1;
+}
+
+void changeBaudRate(const unsigned long baud)
+{
+  for (unsigned int i = 0; i < sizeof(SUPPORTED_BAUD_RATES) / sizeof(SUPPORTED_BAUD_RATES[0]); i++)
+  {
+    if (SUPPORTED_BAUD_RATES[i] == baud)
+    {
+      // Acknowledge at the current rate, then switch
+      Serial.print('B');
+      Serial.println(baud);
+      Serial.flush();
+      Serial.end();
+      Serial.begin(baud);
+      return;
+    }
+  }
+}
+
+void handleLine(char *line)
+{
+  // optional "#<seq>" suffix: acknowledged after the frame is shown
+  char *seq_separator = strchr(line, '#');
+  if (seq_separator != NULL)
+  {
+    *seq_separator = '\0';
+    pending_ack_seq = atoi(seq_separator + 1);
+    has_pending_ack = true;
+  }
+
+  furhat_state = line[0];
+
+  if (line[0] == 'A')
+  {
+    led_mode = MODE_LISTENING;
+  }
+  else if (line[0] == 'B')
+  {
+    changeBaudRate(strtoul(line + 1, NULL, 10));
+    return;
+  }
+  else if (line[0] == 'V')
+  {
+    reportVersion();
+    reportPowerState();
+    return;
+  }
+  else if (line[0] == 'P')
+  {
+    for (int i = 0; i < NUM_PIXELS; i++)
+    {
+      const int8_t high = hexValue(line[1 + 2 * i]);
+      const int8_t low  = high < 0 ? -1 : hexValue(line[2 + 2 * i]);
+      if (low < 0)
+        return;                       // short or malformed frame, keep the previous one
+      pixel_levels[i] = (high << 4) | low;
+    }
+    led_mode = MODE_PIXELS;
+  }
+  else if (line[0] >= '0' && line[0] <= '9')
+  {
+    const int value = atoi(line);
+    target_brightness = value > 255 ? 255 : value;
+    led_mode = MODE_BRIGHTNESS;
+  }
+  else
+  {
+    has_pending_ack = false;
+    return;
+  }
+  needs_show = true;
+}
+
+void handleRGBFrame()
+{
+  uint8_t checksum = 0;
+  for (uint8_t i = 0; i < 1 + RGB_FRAME_LEVELS; i++)
+    checksum += rgb_buffer[i];
+  if (checksum != rgb_buffer[1 + RGB_FRAME_LEVELS])
+  {
+    rgb_resync_skip = sizeof(rgb_buffer);  // corrupted (e.g. bytes lost during ring.show()), keep the previous frame
+    return;
+  }
+
+  memcpy(pixel_rgb, rgb_buffer + 1, RGB_FRAME_LEVELS);
+  pending_ack_seq = rgb_buffer[0];
+  has_pending_ack = true;
+  led_mode = MODE_RGB;
+  needs_show = true;
+}
+
+void readSerialLines()
 {
   while (Serial.available())          // If data is available to read,
-  {            
-    furhat_state = Serial.read();     // read it and store it in val
+  {
+    const char c = Serial.read();
+    if ((uint8_t)c == RGB_FRAME_SYNC)
+    {
+      // never part of a text line or a frame body: always (re)starts a frame, dropping a
+      // partial line or a frame that lost bytes
+      in_rgb_frame = true;
+      rgb_resync_skip = 0;
+      rgb_received = 0;
+      line_length = 0;
+      line_overflow = false;
+    }
+    else if (in_rgb_frame)
+    {
+      rgb_buffer[rgb_received++] = (uint8_t)c;
+      if (rgb_received == sizeof(rgb_buffer))
+      {
+        in_rgb_frame = false;
+        handleRGBFrame();
+      }
+    }
+    else if (rgb_resync_skip > 0)
+    {
+      rgb_resync_skip--;              // rest of a misaligned binary frame, at most one frame's worth
+    }
+    else if (c == '\n' || c == '\r')
+    {
+      if (line_length > 0 && !line_overflow)
+      {
+        line_buffer[line_length] = '\0';
+        handleLine(line_buffer);
+      }
+      line_length = 0;
+      line_overflow = false;
+    }
+    else if (line_length < LINE_BUFFER_SIZE - 1)
+    {
+      line_buffer[line_length++] = c;
+    }
+    else
+    {
+      line_overflow = true;           // drop the rest of an oversized line
+    }
   }
+}
+
+void changeLedBaseOnSerialMessages()
+{
+  if (!needs_show)
+    return;
+  needs_show = false;
 
-  if (furhat_state == 'A')
+  if (led_mode == MODE_LISTENING)
   {          
     controllNeoPixel( LISTENING_STATE);
   } 
+  else if (led_mode == MODE_PIXELS)
+  {
+    controllNeoPixelLevels(pixel_levels);
+  }
+  else if (led_mode == MODE_RGB)
+  {
+    controllNeoPixelRGB(pixel_rgb);
+  }
   else
   {
-    controllNeoPixel( furhat_state < BASE_STATE ? BASE_STATE : furhat_state);
+    controllNeoPixel( target_brightness < BASE_STATE ? BASE_STATE : target_brightness);
+  }
+
+  if (has_pending_ack)
+  {
+    has_pending_ack = false;
+    Serial.print('K');
+    Serial.println(pending_ack_seq);
   }
-  
-  delay(100);
 }
 
 void loop()
 {
   toogleSystem(digitalRead(BTN_PIN)); 
 
+  // keep reading while off so queries are answered; frames received meanwhile are dropped
+  readSerialLines();
+
   if(!is_on)
-      return;
+  {
+    needs_show = false;
+    has_pending_ack = false;
+    return;
+  }
   else
     changeLedBaseOnSerialMessages();
 